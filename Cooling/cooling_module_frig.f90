@@ -1,9 +1,222 @@
 !! comes from frig version and then all the specific development done by Valeska
 !! to take into account extinction have been moved there
 !! PH 19/01/2017
+!=======================================================================
+module cooling_tables
+!=======================================================================
+  ! Tables of the cooling and heating rates in log nH and log T, so that calc_temp
+  ! looks them up instead of working out cooling_low and cooling_high twice every substep
+  ! Metals only add to the low temperature rate in proportion to zsolar, so it is
+  ! tabulated without metals and per solar metallicity, covering every metallicity
+  ! All of the rates are divided by nH^2, and the derivatives are in T
+  ! Cells outside the tables use the analytic rates
+  implicit none
+  ! Use the tables (= 1) or work out the rates analytically (= 0), e.g. to check the tables
+  integer :: usetable = 1
+  ! Have the tables been made yet? (see make_cooling_tables)
+  integer :: tablebuilt = 0
+  ! Size of the tables, going up to T = 10035 K for cooling_low and from there to 10^9 K for cooling_high
+  integer, parameter :: nlognh = 141, nlogtlow = 801, nlogthigh = 1001
+  real(kind=8), parameter :: lognhmin = -6d0, lognhmax = 8d0, logtmin = 0d0, logtmax = 9d0
+  real(kind=8) :: logtlow, dlognh, dlogtlow, dlogthigh
+  ! Rates and their derivatives below T = 10035 K without metals (0) and per solar metallicity (z)
+  real(kind=8), dimension(nlognh,nlogtlow) :: ratelow0, ratelowz, dratelow0, dratelowz
+  ! Rate and its derivative above T = 10035 K (only depends on T)
+  real(kind=8), dimension(nlogthigh) :: ratehigh, dratehigh
+end module cooling_tables
+
+!=======================================================================
+module cooling_exact
+!=======================================================================
+  ! Exact integration of the cooling above T = 10035 K (Townsend 2009, ApJS 181, 391)
+  ! cooling_high is a piecewise power law in T with no heating, so
+  !  Y(T) = integral from T to T_ref of dT / Lambda(T)
+  ! grows by (gamma - 1) nH / kB * dt over a step, and T is found from Y in one go without substeps
+  ! Below 10035 K the heating and cooling don't scale with nH in the same way, so calc_temp is used there
+  implicit none
+  ! Integrate exactly (= 1) or in substeps with calc_temp (= 0)
+  integer :: useexact = 0
+  ! Has yexact been made yet? (see make_exact_tables)
+  integer :: exactbuilt = 0
+  ! Segments of cooling_high, log10(Lambda) = cexact + aexact * log10(T) from texact(k) to texact(k+1)
+  ! The last segment carries on above T_ref = texact(nexact+1)
+  integer, parameter :: nexact = 8
+  real(kind=8), dimension(nexact+1), parameter :: texact = (/ 10035d0, 10d0**4.25d0, 10d0**4.35d0, &
+       10d0**4.9d0, 10d0**5.4d0, 10d0**5.9d0, 10d0**6.2d0, 10d0**6.7d0, 1d9 /)
+  real(kind=8), dimension(nexact), parameter :: aexact = (/ 12.64d0, -0.3d0, 1.745d0, 0d0, -1.795d0, 0d0, -1.261d0, 0d0 /)
+  real(kind=8), dimension(nexact), parameter :: cexact = (/ -75.56d0, -20.565d0, -29.463d0, -20.9125d0, -11.219d0, &
+       -21.8095d0, -13.991d0, -22.44d0 /)
+  ! Y at the start of each segment
+  real(kind=8), dimension(nexact+1) :: yexact
+end module cooling_exact
+
+!=======================================================================
+module cooling_batch
+!=======================================================================
+  ! Settings for substepping many cells together (see calc_temp_batch)
+  implicit none
+  ! Substep the cells in batches (= 1) or one cell at a time with calc_temp (= 0)
+  integer :: usebatch = 1
+  ! Number of cells in each batch, the batches are split between OpenMP threads
+  integer :: ncellbatch = 128
+end module cooling_batch
+
+!=======================================================================
+subroutine make_cooling_tables
+!=======================================================================
+  ! Fill the cooling tables from cooling_low and cooling_high
+  ! The derivatives use the same offset in T as calc_temp
+  use cooling_tables
+  implicit none
+  integer :: i, j
+  real(kind=8) :: T, n, eps, ref0, ref1, ref0e, ref1e, dummy
+  eps = 1d-5
+  logtlow = log10(10035d0)
+  dlognh = (lognhmax - lognhmin) / (nlognh - 1)
+  dlogtlow = (logtlow - logtmin) / (nlogtlow - 1)
+  dlogthigh = (logtmax - logtlow) / (nlogthigh - 1)
+  do j=1,nlogtlow
+     T = 10d0**(logtmin + (j-1)*dlogtlow)
+     do i=1,nlognh
+        n = 10d0**(lognhmin + (i-1)*dlognh)
+        call cooling_low(T,n,0d0,ref0,dummy)
+        call cooling_low(T,n,1d0,ref1,dummy)
+        call cooling_low(T*(1d0+eps),n,0d0,ref0e,dummy)
+        call cooling_low(T*(1d0+eps),n,1d0,ref1e,dummy)
+        ratelow0(i,j) = ref0 / n**2
+        ratelowz(i,j) = (ref1 - ref0) / n**2
+        dratelow0(i,j) = (ref0e - ref0) / (T*eps) / n**2
+        dratelowz(i,j) = ((ref1e - ref0e) - (ref1 - ref0)) / (T*eps) / n**2
+     end do
+  end do
+  do j=1,nlogthigh
+     T = 10d0**(logtlow + (j-1)*dlogthigh)
+     call cooling_high(T,1d0,1d0,ref0)
+     call cooling_high(T*(1d0+eps),1d0,1d0,ref0e)
+     ratehigh(j) = ref0
+     dratehigh(j) = (ref0e - ref0) / (T*eps)
+  end do
+  tablebuilt = 1
+end subroutine make_cooling_tables
+
+!=======================================================================
+subroutine make_exact_tables
+!=======================================================================
+  ! Find Y at the edges of the segments of cooling_high, from Y(T_ref) = 0 down
+  use cooling_exact
+  implicit none
+  integer :: k
+  yexact(nexact+1) = 0d0
+  do k=nexact,1,-1
+     yexact(k) = yexact(k+1) + exact_integral(k, texact(k), texact(k+1))
+  end do
+  exactbuilt = 1
+
+contains
+
+  function exact_integral(k, Ta, Tb)
+    ! Integral of dT / Lambda from Ta to Tb in segment k
+    integer, intent(in) :: k
+    real(kind=8), intent(in) :: Ta, Tb
+    real(kind=8) :: exact_integral
+    exact_integral = 10d0**(-cexact(k)) * (Tb**(1d0-aexact(k)) - Ta**(1d0-aexact(k))) / (1d0-aexact(k))
+  end function exact_integral
+
+end subroutine make_exact_tables
+
+!=======================================================================
+subroutine exact_temp(NN,TT,dt_tot,gamma,tleft)
+!=======================================================================
+  ! Cool a cell over dt_tot with the exact integration in cooling_exact
+  ! Gas that is or gets below 10035 K is left at 10035 K with tleft of the step
+  !  still to do in substeps (tleft = 0 if the gas stays hotter)
+  use cooling_exact
+  implicit none
+  real(kind=8),intent(in) :: NN,dt_tot,gamma
+  real(kind=8),intent(inout) :: TT
+  real(kind=8),intent(out) :: tleft
+  integer :: k
+  real(kind=8) :: kb, rate, Y, Yend
+  kb = 1.38062d-16   ! erg/degre
+  tleft = dt_tot
+  if (TT < texact(1)) return
+  tleft = 0d0
+  ! Segment the cell starts in and Y(TT)
+  k = nexact
+  do while (TT < texact(k))
+     k = k - 1
+  end do
+  Y = yexact(k+1) + 10d0**(-cexact(k)) * (texact(k+1)**(1d0-aexact(k)) - TT**(1d0-aexact(k))) / (1d0-aexact(k))
+  ! dY/dt = (gamma - 1) nH / kB, as calc_temp has alpha_ct dT/dt = - nH^2 Lambda
+  rate = (gamma-1d0)*NN/kb
+  Yend = Y + rate*dt_tot
+  if (Yend >= yexact(1)) then
+     ! Cools below 10035 K in this step, so do the rest of it in substeps
+     tleft = dt_tot - (yexact(1) - Y)/rate
+     TT = texact(1)
+     return
+  end if
+  do while (Yend > yexact(k))
+     k = k - 1
+  end do
+  TT = (texact(k+1)**(1d0-aexact(k)) - (1d0-aexact(k)) * 10d0**cexact(k) * (Yend - yexact(k+1)))**(1d0/(1d0-aexact(k)))
+end subroutine exact_temp
+
+!=======================================================================
+subroutine table_rates(T,n,zsolar,low,ref,dRefdT,found)
+!=======================================================================
+  ! Look up the total rate (heating - cooling) and its derivative in T in the cooling tables
+  ! low picks the rate of cooling_low or cooling_high, as calc_temp does from the temperature
+  ! found is false if the cell is outside the tables
+  use cooling_tables
+  implicit none
+  real(kind=8),intent(in)::T,n,zsolar
+  logical,intent(in)::low
+  real(kind=8),intent(out)::ref,dRefdT
+  logical,intent(out)::found
+  integer :: i, j
+  real(kind=8) :: lognh, logt, fn, ft, w00, w10, w01, w11
+  found = .false.
+  ref = 0d0
+  dRefdT = 0d0
+  if (T <= 0d0 .or. n <= 0d0) return
+  logt = log10(T)
+  if (low) then
+     lognh = log10(n)
+     if (logt < logtmin .or. logt > logtlow .or. lognh < lognhmin .or. lognh > lognhmax) return
+     fn = (lognh - lognhmin) / dlognh
+     i = min(int(fn) + 1, nlognh - 1)
+     fn = fn - (i - 1)
+     ft = (logt - logtmin) / dlogtlow
+     j = min(int(ft) + 1, nlogtlow - 1)
+     ft = ft - (j - 1)
+     w00 = (1d0-fn)*(1d0-ft)
+     w10 = fn*(1d0-ft)
+     w01 = (1d0-fn)*ft
+     w11 = fn*ft
+     ref = w00*(ratelow0(i,j) + zsolar*ratelowz(i,j)) + w10*(ratelow0(i+1,j) + zsolar*ratelowz(i+1,j)) &
+         + w01*(ratelow0(i,j+1) + zsolar*ratelowz(i,j+1)) + w11*(ratelow0(i+1,j+1) + zsolar*ratelowz(i+1,j+1))
+     dRefdT = w00*(dratelow0(i,j) + zsolar*dratelowz(i,j)) + w10*(dratelow0(i+1,j) + zsolar*dratelowz(i+1,j)) &
+         + w01*(dratelow0(i,j+1) + zsolar*dratelowz(i,j+1)) + w11*(dratelow0(i+1,j+1) + zsolar*dratelowz(i+1,j+1))
+  else
+     if (logt < logtlow .or. logt > logtmax) return
+     ft = (logt - logtlow) / dlogthigh
+     j = min(int(ft) + 1, nlogthigh - 1)
+     ft = ft - (j - 1)
+     ref = (1d0-ft)*ratehigh(j) + ft*ratehigh(j+1)
+     dRefdT = (1d0-ft)*dratehigh(j) + ft*dratehigh(j+1)
+  end if
+  ref = ref * n**2
+  dRefdT = dRefdT * n**2
+  found = .true.
+end subroutine table_rates
+
 !=======================================================================
 subroutine solve_cooling_frig(nH,T2,zsolar,dt,gamma,ncell,deltaT2)
 !=======================================================================
+  use cooling_tables, only : usetable, tablebuilt
+  use cooling_exact, only : useexact, exactbuilt
+  use cooling_batch, only : usebatch, ncellbatch
   implicit none
   ! BRIDGE FUNCTION WITH SAME INTERFACE AS SOLVE_COOLING 
   ! Input/output variables to this function
@@ -17,23 +230,129 @@ subroutine solve_cooling_frig(nH,T2,zsolar,dt,gamma,ncell,deltaT2)
   real(kind=8),intent(in)::dt,gamma
   real(kind=8),dimension(1:ncell),intent(in)::nH,T2,zsolar
   real(kind=8),dimension(1:ncell),intent(out)::deltaT2
-  ! Input/output variables to analytic function calc_temp 
-  real(kind=8)::NN,TT, ZZ, dt_tot
+  ! Temperature of each cell and the time left to substep it for
+  ! NOTE!! THE CODE BELOW ASSUMES scale_nH=1 !!
+  ! SO WE LEAVE THIS AS IT IS TO KEEP UNITS CONSISTENCY
+  real(kind=8),dimension(1:ncell)::TT, tleft
   ! Temporary variables
+  integer::i, first, last
+  ! Make the cooling tables the first time they are needed
+  if (usetable == 1 .and. tablebuilt == 0) call make_cooling_tables
+  if (useexact == 1 .and. exactbuilt == 0) call make_exact_tables
+  TT = T2
+  tleft = dt
+  ! Integrate the hot gas exactly, leaving gas below 10035 K to the substeps
+  if (useexact == 1) then
+     !$omp parallel do schedule(static)
+     do i=1,ncell
+        call exact_temp(nH(i),TT(i),dt,gamma,tleft(i))
+     end do
+     !$omp end parallel do
+  end if
+  ! Substep the cells in batches, split between threads, or one at a time
+  if (usebatch == 1) then
+     !$omp parallel do private(last) schedule(dynamic)
+     do first=1,ncell,ncellbatch
+        last = min(first+ncellbatch-1,ncell)
+        call calc_temp_batch(nH(first:last),TT(first:last),zsolar(first:last),tleft(first:last),gamma,last-first+1)
+     end do
+     !$omp end parallel do
+  else
+     !$omp parallel do schedule(dynamic,64)
+     do i=1,ncell
+        if (tleft(i) > 0d0) call calc_temp(nH(i),TT(i),zsolar(i),tleft(i),gamma)
+     end do
+     !$omp end parallel do
+  end if
+  deltaT2 = TT - T2
+end subroutine solve_cooling_frig
+
+!=======================================================================
+subroutine cooling_time(nH,T2,zsolar,gamma,ncell,tcool,theat)
+!=======================================================================
+  ! Cooling time of each cell, the thermal energy over the rate it is lost
+  ! Cells that are heating up have tcool = huge(tcool), and a heating time theat,
+  !  the thermal energy over the rate it is gained (huge(theat) for cells cooling down)
+  ! Uses the same rates as the cooling solver (see solve_cooling_frig)
+  use cooling_tables, only : usetable, tablebuilt
+  implicit none
+  integer,intent(in)::ncell
+  real(kind=8),intent(in)::gamma
+  real(kind=8),dimension(1:ncell),intent(in)::nH,T2,zsolar
+  real(kind=8),dimension(1:ncell),intent(out)::tcool,theat
   integer::i
-  real(kind=8)::TT_ini, mu
-  ! Loop over cells
-  dt_tot = dt
+  real(kind=8)::kb, ref, dummy
+  logical::intable
+  kb  =  1.38062d-16   ! erg/degre
+  if (usetable == 1 .and. tablebuilt == 0) call make_cooling_tables
+  !$omp parallel do private(ref, dummy, intable) schedule(static)
   do i=1,ncell
-     NN = nH(i) ! NOTE!! THE CODE BELOW ASSUMES scale_nH=1 !!
-                ! SO WE LEAVE THIS AS IT IS TO KEEP UNITS CONSISTENCY
-     TT = T2(i)
-     TT_ini = TT
-     ZZ = zsolar(i)
-     call calc_temp(NN,TT,ZZ,dt_tot,gamma)
-     deltaT2(i) = (TT - TT_ini)
+     intable = .false.
+     if (usetable == 1) call table_rates(T2(i),nH(i),zsolar(i),T2(i) < 10035.d0,ref,dummy,intable)
+     if (.not. intable) then
+        if (T2(i) < 10035.d0) then
+           call cooling_low(T2(i),nH(i),zsolar(i),ref,dummy)
+        else
+           call cooling_high(T2(i),nH(i),zsolar(i),ref)
+        end if
+     end if
+     tcool(i) = huge(tcool(i))
+     theat(i) = huge(theat(i))
+     if (ref < 0d0) tcool(i) = nH(i)*kb/(gamma-1.)*T2(i)/(-ref)
+     if (ref > 0d0) theat(i) = nH(i)*kb/(gamma-1.)*T2(i)/ref
   end do
-end subroutine solve_cooling_frig
+  !$omp end parallel do
+end subroutine cooling_time
+
+!=======================================================================
+subroutine calc_temp_batch(NN,TT,zsolar,dt_tot,gamma,ncell)
+!=======================================================================
+  ! Substep a batch of cells as calc_temp does, each over its own dt_tot
+  ! Each pass takes one substep (see cooling_substep) in every cell still going,
+  !  then packs the cells that have got to the end of their step out of the list,
+  !  so the passes only run over the cells that still need them
+  ! This gives the same temperatures as calling calc_temp on each cell
+  implicit none
+  integer,intent(in)::ncell
+  real(kind=8),intent(in)::gamma
+  real(kind=8),dimension(1:ncell),intent(in)::NN,zsolar,dt_tot
+  real(kind=8),dimension(1:ncell),intent(inout)::TT
+  integer::i, m, nactive, nstill
+  integer,dimension(1:ncell)::active, iter
+  real(kind=8),dimension(1:ncell)::alpha_ct, temps, dt, eps
+  real(kind=8)::kb
+  kb  =  1.38062d-16   ! erg/degre
+  ! Start every cell as calc_temp does
+  nactive = 0
+  do i=1,ncell
+     alpha_ct(i) = NN(i)*kb/(gamma-1.)
+     eps(i) = 1d-5
+     iter(i) = 0
+     temps(i) = 0.
+     dt(i) = 0.
+     if (TT(i) .le. 0.) then
+        TT(i) = 10.
+     else if (temps(i) < dt_tot(i)) then
+        nactive = nactive + 1
+        active(nactive) = i
+     end if
+  end do
+  do while (nactive > 0)
+     do m=1,nactive
+        i = active(m)
+        call cooling_substep(NN(i),TT(i),zsolar(i),alpha_ct(i),dt_tot(i),temps(i),dt(i),eps(i),iter(i))
+     end do
+     nstill = 0
+     do m=1,nactive
+        i = active(m)
+        if (temps(i) < dt_tot(i)) then
+           nstill = nstill + 1
+           active(nstill) = i
+        end if
+     end do
+     nactive = nstill
+  end do
+end subroutine calc_temp_batch
 
 !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
 !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
@@ -47,12 +366,12 @@ subroutine  calc_temp(NN,TT,zsolar,dt_tot,gamma)
 
     integer :: n,i,j,k,idim, iter, itermax,ii
 
-    real(kind=8) :: dt, dt_tot, temps, dt_max, itermoy
+    real(kind=8) :: dt, dt_tot, temps, itermoy
     real(kind=8) :: rho,temp
 
     !alpha replaced by alpha_ct because of conflict with another alpha by PH 19/01/2017
     real(kind=8) :: mm,uma, kb, alpha_ct,mu,kb_mm
-    real(kind=8) :: NN,TT,zsolar, TTold, ref,ref2,dRefdT, eps, vardt,varrel, dTemp,dummy
+    real(kind=8) :: NN,TT,zsolar, eps
     real(kind=8) :: rhoutot2,gamma
     ! HARD-CODED mu TO MAKE TEMPERATURE AGREE WITH HENNEBELLE CODE
     mu = 1.4d0
@@ -72,8 +391,6 @@ subroutine  calc_temp(NN,TT,zsolar,dt_tot,gamma)
         return
     endif
 
-    vardt = 10.**(1./10.); varrel = 0.2
-
     !  nn = (rho/(gramme/cm3)) /mm
 
     itermax = 0 ; itermoy = 0.
@@ -92,20 +409,51 @@ subroutine  calc_temp(NN,TT,zsolar,dt_tot,gamma)
     ! eps - a small offset of T to find gradient in T
     eps = 1d-5
 
-    iter  = 0 ; temps = 0.
+    iter  = 0 ; temps = 0. ; dt = 0.
     do while ( temps < dt_tot)
-        if (TT .lt.0) then
-            write(*,*) 'prob Temp',TT, NN
-            !         write(*,*) 'repair assuming isobariticity'
-            !NN = max(NN,smallr)
-            TT = min(4000./NN,8000.)  !2.*4000. / NN
-        endif
+        call cooling_substep(NN,TT,zsolar,alpha_ct,dt_tot,temps,dt,eps,iter)
+    enddo
+
+    return
+end subroutine calc_temp
+
+subroutine cooling_substep(NN,TT,zsolar,alpha_ct,dt_tot,temps,dt,eps,iter)
+    ! One substep of calc_temp, moving the time temps on by dt
+    ! dt, eps and iter carry the length of the substep, the last relative change in TT
+    !  and the number of substeps from one substep to the next
+    use cooling_tables, only : usetable
+
+    implicit none
 
+    integer :: iter
+    real(kind=8) :: NN,TT,zsolar,alpha_ct,dt_tot,temps,dt,eps
+    real(kind=8) :: dt_max, TTold, ref,ref2,dRefdT, vardt,varrel, dTemp,dummy
+    logical :: intable
 
-        TTold = TT
+    vardt = 10.**(1./10.); varrel = 0.2
+
+    if (TT .lt.0) then
+        write(*,*) 'prob Temp',TT, NN
+        !         write(*,*) 'repair assuming isobariticity'
+        !NN = max(NN,smallr)
+        TT = min(4000./NN,8000.)  !2.*4000. / NN
+    endif
 
-        ! Calculate cooling rate
-        !NN is assumed to be in cc and TT in Kelvin
+
+    TTold = TT
+
+    ! Calculate cooling rate
+    !NN is assumed to be in cc and TT in Kelvin
+    ! Look it up in the cooling tables if they cover this cell
+    intable = .false.
+    if (usetable == 1) call table_rates(TT,NN,zsolar,TT < 10035.d0,ref,dRefdT,intable)
+    ! After the first substep the slope is taken over the last change in T, as below
+    ! (the tables have the slope for the first substep)
+    if (intable .and. eps > 1d-5) then
+        call table_rates(TT*(1d0+eps),NN,zsolar,TT < 10035.d0,ref2,dummy,intable)
+        if (intable) dRefdT = (ref2-ref)/(TT*eps)
+    end if
+    if (.not. intable) then
         if (TT < 10035.d0) then
             call cooling_low(TT,NN,zsolar,ref,dummy)
             call cooling_low(TT*(1d0+eps),NN,zsolar,ref2,dummy)
@@ -113,56 +461,55 @@ subroutine  calc_temp(NN,TT,zsolar,dt_tot,gamma)
             call cooling_high(TT,NN,zsolar,ref)
             call cooling_high(TT*(1d0+eps),NN,zsolar,ref2)
         end if
-        
+    
         ! dT = T*(1+eps)-T = eps*T
         dRefdT = (ref2-ref)/(TT*eps)
+    end if
 
-        ! TODO STG - COPY THIS FUNCTION UP TO HERE, USE ref, drefdT TO 
-        !            REPLACE rt_cmp_metals SOMEHOW
+    ! TODO STG - COPY THIS FUNCTION UP TO HERE, USE ref, drefdT TO 
+    !            REPLACE rt_cmp_metals SOMEHOW
 
 
-        !       write(*,*) 'check',TTold, TT,NN,ref,dRefdT,iter
+    !       write(*,*) 'check',TTold, TT,NN,ref,dRefdT,iter
 
 
-        if (iter == 0) then
-            if (dRefDT .ne. 0.) then
-                dt = abs(1.0E-1 * alpha_ct/dRefDT)
-            else
-                dt = 1.0E-1 * dt_tot
-            endif
-            dt_max = dt_tot - temps
-            if (dt > 0.7*dt_max) dt = dt_max*(1.+1.0E-12)
+    if (iter == 0) then
+        if (dRefDT .ne. 0.) then
+            dt = abs(1.0E-1 * alpha_ct/dRefDT)
+        else
+            dt = 1.0E-1 * dt_tot
         endif
+        dt_max = dt_tot - temps
+        if (dt > 0.7*dt_max) dt = dt_max*(1.+1.0E-12)
+    endif
 
-        dTemp = ref/(alpha_ct/dt - dRefdT)
+    dTemp = ref/(alpha_ct/dt - dRefdT)
 
-        eps = abs(dTemp/TT)
-        if (eps > 0.2) dTemp = 0.2*TTold*dTemp/abs(dTemp)
+    eps = abs(dTemp/TT)
+    if (eps > 0.2) dTemp = 0.2*TTold*dTemp/abs(dTemp)
 
-        TT = TTold + dTemp
-        if (TT < 0.) then
-            write(*,*) 'Temperature negative !!!'
-            write(*,*) 'TTold,TT   = ',TTold,TT
-            write(*,*) 'rho   = ',rho
-            TT = 10.  !*kelvin
-        endif
+    TT = TTold + dTemp
+    if (TT < 0.) then
+        write(*,*) 'Temperature negative !!!'
+        write(*,*) 'TTold,TT   = ',TTold,TT
+        write(*,*) 'NN    = ',NN
+        TT = 10.  !*kelvin
+    endif
 
 
-        iter = iter + 1
+    iter = iter + 1
 
-        temps = temps + dt
+    temps = temps + dt
 
-        dt = vardt*varrel*dt/Max(vardt*eps, varrel)
+    dt = vardt*varrel*dt/Max(vardt*eps, varrel)
 
-        dt_max = dt_tot - temps
-        if (dt > 0.7*dt_max) dt = dt_max*(1.+1.0E-12)
-        !        write(*,987) temps, TT
-        !987     format(E10.3,2x,E10.3)
-        !        read (*,*)
-    enddo
+    dt_max = dt_tot - temps
+    if (dt > 0.7*dt_max) dt = dt_max*(1.+1.0E-12)
+    !        write(*,987) temps, TT
+    !987     format(E10.3,2x,E10.3)
+    !        read (*,*)
 
-    return
-end subroutine calc_temp
+end subroutine cooling_substep
 
 !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
 !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!
@@ -9,16 +9,16 @@ subroutine trace_radiation(dr,Qion,sigmaDust,nH,drecombinationsdr,ncell)
 implicit none
 
 ! Interface variables
-real(kind=8)::dr
+! dr is the width of each cell, so the grid can be non-uniform
 integer::ncell
-real(kind=8),dimension(1:ncell)::Qion,sigmaDust,nH,drecombinationsdr
+real(kind=8),dimension(1:ncell)::dr,Qion,sigmaDust,nH,drecombinationsdr
 ! Internal variables
 integer::icell
 
 ! Loop through cells
 do icell=2,ncell
     ! See Draine (2011) equation 2
-    Qion(icell) = Qion(icell-1) - (drecombinationsdr(icell) + nH(icell) * sigmaDust(icell) * Qion(icell-1))*dr
+    Qion(icell) = Qion(icell-1) - (drecombinationsdr(icell) + nH(icell) * sigmaDust(icell) * Qion(icell-1))*dr(icell)
     ! If no photons left, set the remaining bins to zero and exit the loop
     if (Qion(icell) .lt. 0.0) then
         Qion(icell:ncell) = 0.0
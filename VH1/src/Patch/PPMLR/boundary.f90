@@ -77,7 +77,9 @@ else if ( nleft == 3 ) then
   enddo
 endif
 
-if ( nright == 0 ) then     
+if ( frozenright ) then
+  ! ghost zones already hold the frozen zones outside the active region (see sweepxrow)
+else if ( nright == 0 ) then     
   do n = 1, 6
     dx (nmax+n)= dx (nmax+1-n)
     dx0(nmax+n)= dx0(nmax+1-n)
@@ -7,18 +7,42 @@ subroutine evolve( umid, pmid )
 use global
 use sweeps
       
+IMPLICIT NONE
+! LOCALS
+REAL(kind=8), DIMENSION(maxsweep) :: umid, pmid, dvol1
+
+!------------------------------------------------------------------------
+
+! Zone volumes at the start of the step, on the Eulerian grid (cached for x sweeps)
+if (cachedsweep) then
+  call evolvezones( umid, pmid, dvolx )
+else
+  call volume (nmin, nmax, ngeom, radius, xa , dx , dvol1 )
+  call evolvezones( umid, pmid, dvol1 )
+endif
+
+return
+end
+
+subroutine evolvezones( umid, pmid, dvol1 )
+
+! Move the zone boundaries with umid and update the zones, called by evolve.
+! dvol1 holds the zone volumes before the zones are moved
+!-----------------------------------------------------------------------
+! GLOBALS
+use global
+use sweeps
+      
 IMPLICIT NONE
 ! LOCALS
 INTEGER :: n
 REAL(kind=8) :: dtheta
-REAL(kind=8), DIMENSION(maxsweep) :: umid, pmid, amid, uold, xa1, dvol1, upmid, dm, dtbdm
+REAL(kind=8), DIMENSION(maxsweep) :: umid, pmid, amid, xa1, dvol1, upmid, dm, dtbdm
 REAL(kind=8), DIMENSION(maxsweep) :: grav0, grav1, xa2, fict0, fict1, xa3
 REAL(kind=8), PARAMETER :: third = 1.0 / 3.0
 
 !------------------------------------------------------------------------
 
-call volume (nmin, nmax, ngeom, radius, xa , dx , dvol1 )
-
 ! grid position evolution
 
 do n = nmin-3, nmax + 4
@@ -66,7 +90,40 @@ select case (ngeom)
    amid = 1.0
 end select
 
-do n = nmin-3, nmax+3
+! Update the zones, passing the sweep arrays in explicitly so that
+! OpenMP threads work on this thread's (threadprivate) copies
+call evolvecells(nmin-3, nmax+3, dt, r, p, u, v, w, e, q, dvol1, dvol, dtbdm, pmid, upmid, amid, &
+                 grav0, fict0, grav1, fict1)
+
+return
+end 
+
+subroutine evolvecells( lmin, lmax, dt, r, p, u, v, w, e, q, dvol1, dvol, dtbdm, pmid, upmid, amid, &
+                        grav0, fict0, grav1, fict1 )
+
+! Lagrangian update of density, velocity and total energy in zones lmin to lmax, called by evolve.
+! Isothermal gas has no energy equation; instead q is set to the P/rho the zone keeps (see remap).
+! Each zone is independent, so with OpenMP the zones are split between threads
+!-----------------------------------------------------------------------
+! GLOBALS
+use sweepsize
+use global, only : gamm, smallr, smallp, ompcells, isothermal
+
+IMPLICIT NONE
+! LOCALS
+INTEGER :: n, lmin, lmax
+REAL(kind=8) :: dt
+REAL(kind=8), DIMENSION(maxsweep) :: r, p, u, v, w, e, q, dvol1, dvol, dtbdm, pmid, upmid, amid, uold
+REAL(kind=8), DIMENSION(maxsweep) :: grav0, fict0, grav1, fict1
+
+!------------------------------------------------------------------------
+
+!$omp parallel do if(ompcells) schedule(static)
+do n = lmin, lmax
+
+! isothermal zones keep their P/rho (the sound speed squared) as they move
+
+  if (isothermal == 1) q(n) = p(n)/r(n)
 
 ! density evolution. lagrangian code, so all we have to do is watch the change in the geometry.
 
@@ -80,11 +137,13 @@ do n = nmin-3, nmax+3
 
 ! total energy evolution
 
+  if (isothermal == 1) cycle
   e(n) = e(n) - dtbdm(n)*(amid(n+1)*upmid(n+1) - amid(n)*upmid(n)) + 0.5*dt*(uold(n)*grav0(n) + u(n)*grav1(n))
   q(n) = e(n) - 0.5*(u(n)**2+v(n)**2+w(n)**2)
   q(n) = max(q(n),smallp/(gamm*r(n)))
 
 enddo
+!$omp end parallel do
 
 return
-end 
+end
@@ -11,6 +11,7 @@ subroutine parabola( nmin, nmax, para, a, deltaa, a6, al, flat )
 !-----------------------------------------------------------------------
 ! GLOBALS
 use sweepsize
+use global, only : ompcells
 
 IMPLICIT NONE
 
@@ -21,40 +22,52 @@ real(kind=8), dimension(maxsweep) :: a, deltaa, a6, al, flat, da, ar, diffa, scr
 real(kind=8), dimension(maxsweep,5) :: para
 
 !----------------------------------------------------------------------
+!$omp parallel if(ompcells) private(onemfl)
+
+!$omp do schedule(static)
   do n = nmin-2, nmax+1
     diffa(n) = a(n+1) - a(n)
   enddo
+!$omp end do
 
 !                                                       Equation 1.7 of C&W
 !     da(j) = D1 * (a(j+1) - a(j)) + D2 * (a(j) - a(j-1))
+!$omp do schedule(static)
   do n = nmin-1, nmax+1
    da(n) = para(n,4) * diffa(n) + para(n,5) * diffa(n-1)
    da(n) = sign( min(abs(da(n)), 2.0*abs(diffa(n-1)), 2.0*abs(diffa(n))), da(n) )
   enddo
+!$omp end do
 
 !     zero out da(n) if a(n) is a local max/min
+!$omp do schedule(static)
   do n = nmin-1, nmax+1
     if(diffa(n-1)*diffa(n) < 0.0) da(n) = 0.0
   enddo
+!$omp end do
 
 !                                                       Equation 1.6 of C&W
 !     a(j+.5) = a(j) + C1 * (a(j+1)-a(j)) + C2 * dma(j+1) + C3 * dma(j)
 ! MONOT: Limit ar(n) to the range defined by a(n) and a(n+1)
 
+!$omp do schedule(static)
   do n = nmin-1, nmax
     ar(n) = a(n) + para(n,1)*diffa(n) + para(n,2)*da(n+1) + para(n,3)*da(n)
 !    ar(n) = max(ar(n),min(a(n),a(n+1)))
 !    ar(n) = min(ar(n),max(a(n),a(n+1)))
     al(n+1) = ar(n)
   enddo
+!$omp end do
 
 ! eqn. 4.1 - flaten interpolation in zones with a shock ( flat(n)->1. )
 
+!$omp do schedule(static)
   do n = nmin, nmax
     onemfl= 1.0 - flat(n)
     ar(n) = flat(n) * a(n) + onemfl * ar(n)
     al(n) = flat(n) * a(n) + onemfl * al(n)
   enddo
+!$omp end do
 
 ! MONOTONICITY constraints:
 
@@ -64,6 +77,7 @@ real(kind=8), dimension(maxsweep,5) :: para
 !        if parabola exceeds al/ar, reset ar/al so that slope -> 0.
 ! Recalculate delta_a and a_6
 
+!$omp do schedule(static)
 do n = nmin, nmax
   deltaa(n) = ar(n) - al(n)
   a6(n)     = 6. * (a(n) - .5 * (al(n) + ar(n)))
@@ -71,7 +85,9 @@ do n = nmin, nmax
   scrch2(n) = deltaa(n) * deltaa(n)
   scrch3(n) = deltaa(n) * a6(n)
 enddo
+!$omp end do
 
+!$omp do schedule(static)
 do n = nmin, nmax
   if(scrch1(n) <= 0.0) then
     ar(n) = a(n)
@@ -80,11 +96,16 @@ do n = nmin, nmax
   if(scrch2(n) < +scrch3(n)) al(n) = 3. * a(n) - 2. * ar(n)       
   if(scrch2(n) < -scrch3(n)) ar(n) = 3. * a(n) - 2. * al(n)
 enddo
+!$omp end do
 
+!$omp do schedule(static)
 do n = nmin, nmax
   deltaa(n)= ar(n) - al(n)
   a6(n) = 6. * (a(n) - .5 * (al(n) + ar(n)))
 enddo
+!$omp end do
+
+!$omp end parallel
 
 return
 end
@@ -104,6 +125,7 @@ subroutine paraset( nmin, nmax, para, dx, xa )
 !-----------------------------------------------------------------------------------
 ! GLOBALS
 use sweepsize
+use global, only : ompcells
 
 IMPLICIT NONE
 
@@ -114,6 +136,9 @@ real(kind=8), dimension(maxsweep) :: dx, xa, a, b, c, d, ai, bi, ci
 
 !------------------------------------------------------------------------------
 
+!$omp parallel if(ompcells)
+
+!$omp do schedule(static)
 do n = nmin-2, nmax+1
   a (n) = dx(n) + dx(n+1)
   ai(n) = 1.0/a(n)
@@ -122,25 +147,32 @@ do n = nmin-2, nmax+1
   c (n) = a(n) + dx(n+1)
   ci(n) = 1.0/c(n)
 enddo
+!$omp end do
 
 !                                        constants for equation 1.6
 !     a(j+.5) = a(j) + C1 * (a(j+1)-a(j)) + C2 * da(j+1) + C3 * da(j)
 
+!$omp do schedule(static)
 do n = nmin-1, nmax
   d(n)      = 1. / (a(n-1) + a(n+1))
   para(n,1) = dx(n) * ai(n) + 2. * dx(n+1) * dx(n) * d(n) * ai(n) * ( a(n-1) * bi(n) - a(n+1) * ci(n) )
   para(n,2) = - d(n) * dx(n)   * a(n-1) * bi(n)
   para(n,3) =   d(n) * dx(n+1) * a(n+1) * ci(n)
 enddo
+!$omp end do
 
 !                                        constants for equation 1.7
 !     da(j) = D1 * (a(j+1) - a(j)) + D2 * (a(j) - a(j-1))
 
+!$omp do schedule(static)
 do n = nmin-1, nmax+1
   d(n) = dx(n) / ( a(n-1) + dx(n+1) )
   para(n,4) = d(n) * b(n-1) * ai(n)
   para(n,5) = d(n) * c(n)   * ai(n-1)
 enddo
+!$omp end do
+
+!$omp end parallel
 
 return
 end
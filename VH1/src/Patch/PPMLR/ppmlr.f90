@@ -12,6 +12,7 @@ subroutine ppmlr
 ! GLOBALS
 use global
 use sweeps
+use zone, only : nzscalar
 
 IMPLICIT NONE
 
@@ -27,17 +28,23 @@ if (ngeom<3) radius = 1.0
 
 ! Apply boundary conditions by filling ghost zones
 call boundary
+if (nzscalar > 0) call boundaryscalars(sc)
 
 ! Calculate flattening coefficients for smoothing near shocks
 call flatten
 
-! Compute parabolic coefficients 
-call paraset( nmin-4, nmax+5, para, dx, xa )
-
-! Interpolate parabolae for fluid variables 
-call parabola(nmin-4, nmax+4, para, p, dp, p6, pl, flat)
-call parabola(nmin-4, nmax+4, para, r, dr, r6, rl, flat)
-call parabola(nmin-4, nmax+4, para, u, du, u6, ul, flat)
+! Compute parabolic coefficients and interpolate parabolae for fluid variables
+! The grid is still Eulerian here, so x sweeps use the coefficients cached at setup
+if (cachedsweep) then
+  call parabola(nmin-4, nmax+4, parax, p, dp, p6, pl, flat)
+  call parabola(nmin-4, nmax+4, parax, r, dr, r6, rl, flat)
+  call parabola(nmin-4, nmax+4, parax, u, du, u6, ul, flat)
+else
+  call paraset( nmin-4, nmax+5, para, dx, xa )
+  call parabola(nmin-4, nmax+4, para, p, dp, p6, pl, flat)
+  call parabola(nmin-4, nmax+4, para, r, dr, r6, rl, flat)
+  call parabola(nmin-4, nmax+4, para, u, du, u6, ul, flat)
+endif
 
 ! Integrate parabolae to get input states for Riemann problem
 call states( pl, ul, rl, p6, u6, r6, dp, du, dr, plft, ulft, rlft, prgh, urgh, rrgh )
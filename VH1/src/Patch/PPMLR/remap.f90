@@ -2,19 +2,53 @@ subroutine remap
 
 ! Remap mass, momentum, and energy from the updated lagrangian grid
 ! to the fixed Eulerian grid, using piecewise parabolic functions.
+! Isothermal gas has no energy to remap, so P/rho (in q) is remapped with the mass instead.
 !-----------------------------------------------------------------------
 ! GLOBALS
-use global
 use sweeps
 
 IMPLICIT NONE
 
 ! LOCALS
-INTEGER :: n, nn
+REAL(kind=8), DIMENSION(maxsweep) :: dvol0
+
+!---------------------------------------------------------------------------
+! Pass the sweep arrays in explicitly so that OpenMP threads work on
+! this thread's (threadprivate) copies
+! dvol0 are the volumes of the Eulerian zones (cached for x sweeps)
+
+if (cachedsweep) then
+  call remapsweep(r, u, v, w, e, q, p, xa, xa0, dx, dx0, dvol, dvolx, flat, para, radius, sc)
+else
+  call volume (nmin, nmax, ngeom, radius, xa0, dx0, dvol0)
+  call remapsweep(r, u, v, w, e, q, p, xa, xa0, dx, dx0, dvol, dvol0, flat, para, radius, sc)
+endif
+
+return
+end
+
+subroutine remapsweep(r, u, v, w, e, q, p, xa, xa0, dx, dx0, dvol, dvol0, flat, para, radius, sc)
+
+! Remap the sweep arrays, including the passive scalars sc, called by remap.
+! The cell loops are split between threads with OpenMP
+!-----------------------------------------------------------------------
+! GLOBALS
+use global
+use sweepsize
+use sweeps, only : nmin, nmax, ngeom
+use zone, only : nzscalar
+
+IMPLICIT NONE
+
+! LOCALS
+INTEGER :: n, nn, nfl
 REAL(kind=8), DIMENSION(maxsweep) :: du, ul, u6, dv, vl, v6, dw, wl, w6, de, el, e6
-REAL(kind=8), DIMENSION(maxsweep) :: dq, ql, q6, dr, rl, r6, dm, dm0, delta, dvol0
+REAL(kind=8), DIMENSION(maxsweep) :: dq, ql, q6, dr, rl, r6, dm, dm0, delta
 REAL(kind=8), DIMENSION(maxsweep) :: fluxr, fluxu, fluxv, fluxw, fluxe, fluxq
-REAL(kind=8) :: fractn, fractn2, ekin, deltx
+REAL(kind=8), DIMENSION(maxsweep) :: r, u, v, w, e, q, p, xa, xa0, dx, dx0, dvol, dvol0, flat
+REAL(kind=8), DIMENSION(maxsweep,5) :: para
+REAL(kind=8), DIMENSION(maxsweep,nzscalar) :: sc
+REAL(kind=8) :: fractn, fractn2, ekin, deltx, radius
 
 REAL(kind=8), PARAMETER :: third  = 1.0 / 3.0
 REAL(kind=8), PARAMETER :: twothd = 2.0 / 3.0
@@ -30,9 +64,7 @@ call parabola(nmin-1, nmax+1, para, u, du, u6, ul, flat)
 call parabola(nmin-1, nmax+1, para, v, dv, v6, vl, flat)
 call parabola(nmin-1, nmax+1, para, w, dw, w6, wl, flat)
 call parabola(nmin-1, nmax+1, para, q, dq, q6, ql, flat)
-call parabola(nmin-1, nmax+1, para, e, de, e6, el, flat)
-
-call volume (nmin, nmax, ngeom, radius, xa0, dx0, dvol0)
+if (isothermal == 0) call parabola(nmin-1, nmax+1, para, e, de, e6, el, flat)
 
 !%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 ! Calculate the volume of the overlapping subshells (delta)
@@ -80,6 +112,7 @@ fluxw = 0.0
 fluxe = 0.0
 fluxq = 0.0
 
+!$omp parallel do if(ompcells) private(nn, deltx, fractn, fractn2) schedule(static)
 do n = nmin, nmax + 1
   deltx = xa(n) - xa0(n)
   if(deltx >= 0.0) then
@@ -90,7 +123,7 @@ do n = nmin, nmax + 1
     fluxu (n) = (ul(nn) + du(nn) - fractn*(du(nn) - fractn2*u6(nn)))*fluxr(n)
     fluxv (n) = (vl(nn) + dv(nn) - fractn*(dv(nn) - fractn2*v6(nn)))*fluxr(n)
     fluxw (n) = (wl(nn) + dw(nn) - fractn*(dw(nn) - fractn2*w6(nn)))*fluxr(n)
-    fluxe (n) = (el(nn) + de(nn) - fractn*(de(nn) - fractn2*e6(nn)))*fluxr(n)
+    if (isothermal == 0) fluxe (n) = (el(nn) + de(nn) - fractn*(de(nn) - fractn2*e6(nn)))*fluxr(n)
     fluxq (n) = (ql(nn) + dq(nn) - fractn*(dq(nn) - fractn2*q6(nn)))*fluxr(n)
   else
     fractn   = 0.5*deltx/dx(n)
@@ -99,35 +132,58 @@ do n = nmin, nmax + 1
     fluxu(n) = (ul(n) - fractn*(du(n) + fractn2*u6(n)))*fluxr(n)
     fluxv(n) = (vl(n) - fractn*(dv(n) + fractn2*v6(n)))*fluxr(n)
     fluxw(n) = (wl(n) - fractn*(dw(n) + fractn2*w6(n)))*fluxr(n)
-    fluxe(n) = (el(n) - fractn*(de(n) + fractn2*e6(n)))*fluxr(n)
+    if (isothermal == 0) fluxe(n) = (el(n) - fractn*(de(n) + fractn2*e6(n)))*fluxr(n)
     fluxq(n) = (ql(n) - fractn*(dq(n) + fractn2*q6(n)))*fluxr(n)
   endif
 enddo
+!$omp end parallel do
 
 !%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%
 ! Advect mass, momentum, and energy by moving the subshell quantities 
 ! into the appropriate Eulerian zone. 
 
+! Count the zones that hit the density and pressure floors (see timestep.py)
+nfl = 0
+!$omp parallel do if(ompcells) reduction(+:nfl) schedule(static)
 do n = nmin-1, nmax+1  ! must update nmin-1, nmax+1 for possible second remap
   dm (n) = r(n) * dvol(n)
   dm0(n) = (dm(n) + fluxr(n) - fluxr(n+1))
   r  (n) = dm0(n)/dvol0(n)
+  if (r(n) < smallr) nfl = nfl + 1
   r  (n) = max(smallr,r(n))
   dm0(n) = 1./(r(n)*dvol0(n))
   u  (n) = (u(n)*dm(n) + fluxu(n)-fluxu(n+1))*dm0(n)
   v  (n) = (v(n)*dm(n) + fluxv(n)-fluxv(n+1))*dm0(n)
   w  (n) = (w(n)*dm(n) + fluxw(n)-fluxw(n+1))*dm0(n)
-  e  (n) = (e(n)*dm(n) + fluxe(n)-fluxe(n+1))*dm0(n)
+  if (isothermal == 0) e(n) = (e(n)*dm(n) + fluxe(n)-fluxe(n+1))*dm0(n)
   q  (n) = (q(n)*dm(n) + fluxq(n)-fluxq(n+1))*dm0(n)
 enddo
+!$omp end parallel do
+
+! The passive scalars move with the mass
+if (nzscalar > 0) call remapscalars(nmin, nmax, sc, xa, xa0, dx, para, flat, fluxr, dm0)
          
 ! If flow is highly supersonic remap on internal energy, else on total E
+! Isothermal gas gets its pressure from the remapped P/rho
+!$omp parallel do if(ompcells) private(ekin) reduction(+:nfl) schedule(static)
 do n = nmin, nmax
-  ekin = 0.5*(u(n)**2+v(n)**2+w(n)**2)
-  if(ekin/q(n) < 100.0) q(n) = e(n) - ekin
-  p(n) = gamm*r(n)*q(n)
+  if (isothermal == 1) then
+    p(n) = r(n)*q(n)
+  else
+    ekin = 0.5*(u(n)**2+v(n)**2+w(n)**2)
+    if(ekin/q(n) < 100.0) q(n) = e(n) - ekin
+    p(n) = gamm*r(n)*q(n)
+  endif
+  if (p(n) < smallp) nfl = nfl + 1
   p(n) = max(smallp,p(n))
 enddo
+!$omp end parallel do
+
+! Batched rows are remapped in parallel, so add to the total one at a time
+if (nfl > 0) then
+  !$omp atomic
+  nfloor = nfloor + nfl
+endif
 
 return
 end
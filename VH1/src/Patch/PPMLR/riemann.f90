@@ -1,10 +1,53 @@
 subroutine riemann ( lmin, lmax, gamma, prgh, urgh, vrgh, plft, ulft, vlft, pmid, umid )
 
+! Solve the Riemann shock tube problem at each zone interface for the time averaged
+! pressure and velocity (pmid and umid) used by evolve, with the solver set by riemannsolver:
+!   = 0 : two-shock solver iterated to convergence with Newton's method (riemannexact)
+!   = 1 : a single Newton pass of the two-shock solver (riemanntwoshock)
+!   = 2 : HLLC solver with Davis wave speed estimates (riemannhllc)
+! Isothermal gas (isothermal = 1) has gamma = 1, and uses the exact isothermal solver
+! (riemannisothermal) in place of riemannexact
+! The input and output variables are the same for every solver, see riemannexact
+!---------------------------------------------------------------------------------
+! GLOBALS
+use sweepsize
+use global, only : riemannsolver, isothermal
+
+IMPLICIT NONE
+
+! LOCALS
+INTEGER :: lmin, lmax
+REAL(kind=8) :: gamma
+REAL(kind=8), DIMENSION(maxsweep) :: plft, prgh, ulft, urgh, vlft, vrgh, pmid, umid
+
+!----------------------------------------------------------------------
+
+select case (riemannsolver)
+  case (1)
+    call riemanntwoshock( lmin, lmax, gamma, prgh, urgh, vrgh, plft, ulft, vlft, pmid, umid )
+  case (2)
+    call riemannhllc( lmin, lmax, gamma, prgh, urgh, vrgh, plft, ulft, vlft, pmid, umid )
+  case default
+    if (isothermal == 1) then
+      call riemannisothermal( lmin, lmax, prgh, urgh, vrgh, plft, ulft, vlft, pmid, umid )
+    else
+      call riemannexact( lmin, lmax, gamma, prgh, urgh, vrgh, plft, ulft, vlft, pmid, umid )
+    endif
+end select
+
+return
+end
+
+!#######################################################################
+
+subroutine riemannexact ( lmin, lmax, gamma, prgh, urgh, vrgh, plft, ulft, vlft, pmid, umid )
+
 ! Solve the Riemann shock tube problem for the left and right input states,
 ! using the Newton interation procedure described in van Leer (1979).
 !---------------------------------------------------------------------------------
 ! GLOBALS
 use sweepsize
+use global, only : ompcells
 
 IMPLICIT NONE
 
@@ -39,8 +82,13 @@ REAL(kind=8), PARAMETER :: tol = 1.0e-5
 gamfac2 = gamma + 1.0
 gamfac1 = 0.5*(gamfac2)/gamma
 
+! Each interface is independent, so with OpenMP the cells are split between threads
+
+!$omp parallel if(ompcells)
+
 ! Obtain first guess for Pmid by assuming Wlft, Wrgh = Clft, Crgh
 
+!$omp do schedule(static)
 do l = lmin, lmax
   clft(l) = sqrt(gamma*plft(l)*vlft(l))
   crgh(l) = sqrt(gamma*prgh(l)*vrgh(l))
@@ -52,6 +100,7 @@ do l = lmin, lmax
   pmid(l) = plft(l) + pmid(l) * clft(l)/(clft(l)+crgh(l))      
   pmid(l) = max(smallp,pmid(l)) 
 enddo
+!$omp end do
  
 ! Iterate up to 8 times using Newton's method to converge on correct Pmid
 !     -use previous guess for pmid to get wavespeeds: wlft, wrgh
@@ -60,6 +109,7 @@ enddo
 !     -project tangents from (pmid,umidl) and (pmid,umidr) to get new pmid
 !     -make sure pmid does not fall below floor value for pressure
 
+!$omp do schedule(static)
 do l = lmin, lmax
   do n = 1, 12
     pmold(l) = pmid(l)
@@ -78,13 +128,203 @@ do l = lmin, lmax
     if (abs(pmid(l)-pmold(l))/pmid(l) < tol ) exit
   enddo
 enddo
+!$omp end do
 
 ! Calculate umid by averaging umidl, umidr based on new pmid
+!$omp do schedule(static)
 do l = lmin, lmax
   umidl(l) = ulft(l) - (pmid(l) - plft(l)) / wlft(l)      
   umidr(l) = urgh(l) + (pmid(l) - prgh(l)) / wrgh(l)   
   umid (l) = 0.5*(umidl(l) + umidr(l)) 
 enddo
+!$omp end do
+
+!$omp end parallel
  
 return     
-end 
+end
+
+!#######################################################################
+
+subroutine riemanntwoshock ( lmin, lmax, gamma, prgh, urgh, vrgh, plft, ulft, vlft, pmid, umid )
+
+! Approximate solution of the Riemann shock tube problem for the left and right input states,
+! taking a single Newton step of the two-shock solver in riemannexact from the acoustic guess.
+! This is much cheaper than iterating, and is close to the exact solution unless the
+! pressure jump at the interface is very large.
+! The input and output variables are the same as for riemannexact
+!---------------------------------------------------------------------------------
+! GLOBALS
+use sweepsize
+use global, only : ompcells
+
+IMPLICIT NONE
+
+! LOCALS
+INTEGER :: l, lmin, lmax
+REAL(kind=8) :: gamma, gamfac1, gamfac2
+REAL(kind=8) :: clft, crgh, wlft, wrgh, zlft, zrgh, umidl, umidr, pguess
+REAL(kind=8), DIMENSION(maxsweep) :: plft, prgh, ulft, urgh, vlft, vrgh, pmid, umid
+
+REAL(kind=8), PARAMETER :: smallp = 1.0e-25
+
+!----------------------------------------------------------------------
+gamfac2 = gamma + 1.0
+gamfac1 = 0.5*(gamfac2)/gamma
+
+!$omp parallel do if(ompcells) schedule(static) &
+!$omp private(clft, crgh, wlft, wrgh, zlft, zrgh, umidl, umidr, pguess)
+do l = lmin, lmax
+  ! Acoustic first guess for pmid, as in riemannexact (vlft and vrgh are densities here)
+  clft   = sqrt(gamma*plft(l)*vlft(l))
+  crgh   = sqrt(gamma*prgh(l)*vrgh(l))
+  pguess = prgh(l) - plft(l) - crgh*(urgh(l)-ulft(l))
+  pguess = plft(l) + pguess * clft/(clft+crgh)
+  pguess = max(smallp,pguess)
+
+  ! One Newton step using the shock wave speeds at the guess
+  wlft  = clft * sqrt(1.0 + gamfac1*(pguess - plft(l))/plft(l))
+  wrgh  = crgh * sqrt(1.0 + gamfac1*(pguess - prgh(l))/prgh(l))
+  zlft  = 4.0 * wlft * wlft / vlft(l)
+  zrgh  = 4.0 * wrgh * wrgh / vrgh(l)
+  zlft  = -zlft * wlft/(zlft - gamfac2*(pguess - plft(l)))
+  zrgh  =  zrgh * wrgh/(zrgh - gamfac2*(pguess - prgh(l)))
+  umidl = ulft(l) - (pguess - plft(l)) / wlft
+  umidr = urgh(l) + (pguess - prgh(l)) / wrgh
+  pmid(l) = pguess + (umidr - umidl)*(zlft * zrgh) / (zrgh - zlft)
+  pmid(l) = max(smallp,pmid(l))
+
+  ! Average the velocities either side at the new pmid, with the wave speeds of the guess
+  umidl = ulft(l) - (pmid(l) - plft(l)) / wlft
+  umidr = urgh(l) + (pmid(l) - prgh(l)) / wrgh
+  umid(l) = 0.5*(umidl + umidr)
+enddo
+!$omp end parallel do
+
+return
+end
+
+!#######################################################################
+
+subroutine riemannhllc ( lmin, lmax, gamma, prgh, urgh, vrgh, plft, ulft, vlft, pmid, umid )
+
+! Solve the Riemann shock tube problem for the left and right input states with the HLLC solver
+! (Toro, Spruce & Speares 1994), using the wave speed estimates of Davis (1988).
+! umid is the speed of the contact wave and pmid the pressure either side of it,
+! which is all the Lagrangian update needs.
+! The input and output variables are the same as for riemannexact
+!---------------------------------------------------------------------------------
+! GLOBALS
+use sweepsize
+use global, only : ompcells
+
+IMPLICIT NONE
+
+! LOCALS
+INTEGER :: l, lmin, lmax
+REAL(kind=8) :: gamma, clft, crgh, slft, srgh, mlft, mrgh
+REAL(kind=8), DIMENSION(maxsweep) :: plft, prgh, ulft, urgh, vlft, vrgh, pmid, umid
+
+REAL(kind=8), PARAMETER :: smallp = 1.0e-25
+
+!----------------------------------------------------------------------
+
+!$omp parallel do if(ompcells) schedule(static) private(clft, crgh, slft, srgh, mlft, mrgh)
+do l = lmin, lmax
+  ! Fastest waves moving left and right relative to each state (vlft and vrgh are densities here)
+  ! (taken relative to the state so that very cold, fast gas keeps a non-zero mass flux)
+  clft = sqrt(gamma*plft(l)/vlft(l))
+  crgh = sqrt(gamma*prgh(l)/vrgh(l))
+  slft = min(-clft, urgh(l) - crgh - ulft(l))
+  srgh = max(crgh, ulft(l) + clft - urgh(l))
+
+  ! Mass fluxes through the left and right waves, then the contact speed and pressure
+  mlft = vlft(l)*slft
+  mrgh = vrgh(l)*srgh
+  umid(l) = (prgh(l) - plft(l) + mlft*ulft(l) - mrgh*urgh(l)) / (mlft - mrgh)
+  pmid(l) = plft(l) + mlft*(umid(l) - ulft(l))
+  pmid(l) = max(smallp,pmid(l))
+enddo
+!$omp end parallel do
+
+return
+end
+
+!#######################################################################
+
+subroutine riemannisothermal ( lmin, lmax, prgh, urgh, vrgh, plft, ulft, vlft, pmid, umid )
+
+! Solve the Riemann shock tube problem for isothermal gas, where each side of the interface
+! has its own sound speed c = sqrt(P/rho). The gas behind a wave moving into a state K has
+!   u = u_K -/+ c_K (P - P_K)/sqrt(P P_K)   for a shock (P > P_K)
+!   u = u_K -/+ c_K ln(P/P_K)               for a rarefaction (P < P_K)
+! Newton's method in ln(P) finds the pmid where the two sides agree.
+! The input and output variables are the same as for riemannexact
+!---------------------------------------------------------------------------------
+! GLOBALS
+use sweepsize
+use global, only : ompcells
+
+IMPLICIT NONE
+
+! LOCALS
+INTEGER :: l, lmin, lmax, n
+REAL(kind=8) :: clft, crgh, flft, frgh, dflft, dfrgh, pm, dlnp
+REAL(kind=8), DIMENSION(maxsweep) :: plft, prgh, ulft, urgh, vlft, vrgh, pmid, umid
+
+REAL(kind=8), PARAMETER :: smallp = 1.0e-25
+REAL(kind=8), PARAMETER :: tol = 1.0e-5
+
+!----------------------------------------------------------------------
+
+!$omp parallel do if(ompcells) schedule(static) &
+!$omp private(n, clft, crgh, flft, frgh, dflft, dfrgh, pm, dlnp)
+do l = lmin, lmax
+  ! Acoustic first guess, as in riemannexact (vlft and vrgh are densities here)
+  clft = sqrt(plft(l)/vlft(l))
+  crgh = sqrt(prgh(l)/vrgh(l))
+  pm = prgh(l) - plft(l) - vrgh(l)*crgh*(urgh(l)-ulft(l))
+  pm = plft(l) + pm * vlft(l)*clft/(vlft(l)*clft + vrgh(l)*crgh)
+  pm = max(smallp,pm)
+
+  ! Newton iterations in ln(P), where the wave curves are smooth and do not flatten out at low P
+  ! flft, frgh are the velocity changes across each wave and dflft, dfrgh their slopes in ln(P)
+  do n = 1, 12
+    if (pm > plft(l)) then
+      flft  = clft*(pm - plft(l))/sqrt(pm*plft(l))
+      dflft = 0.5*clft*(pm + plft(l))/sqrt(pm*plft(l))
+    else
+      flft  = clft*log(pm/plft(l))
+      dflft = clft
+    endif
+    if (pm > prgh(l)) then
+      frgh  = crgh*(pm - prgh(l))/sqrt(pm*prgh(l))
+      dfrgh = 0.5*crgh*(pm + prgh(l))/sqrt(pm*prgh(l))
+    else
+      frgh  = crgh*log(pm/prgh(l))
+      dfrgh = crgh
+    endif
+    dlnp = -(flft + frgh + urgh(l) - ulft(l))/(dflft + dfrgh)
+    dlnp = max(-20.0d0,min(20.0d0,dlnp))
+    pm = max(smallp,pm*exp(dlnp))
+    if (abs(dlnp) < tol) exit
+  enddo
+
+  ! Average the velocities either side of the contact at the new pmid
+  if (pm > plft(l)) then
+    flft = clft*(pm - plft(l))/sqrt(pm*plft(l))
+  else
+    flft = clft*log(pm/plft(l))
+  endif
+  if (pm > prgh(l)) then
+    frgh = crgh*(pm - prgh(l))/sqrt(pm*prgh(l))
+  else
+    frgh = crgh*log(pm/prgh(l))
+  endif
+  pmid(l) = pm
+  umid(l) = 0.5*(ulft(l) - flft + urgh(l) + frgh)
+enddo
+!$omp end parallel do
+
+return
+end
@@ -0,0 +1,124 @@
+subroutine initactive
+
+! Start restricting the x sweeps of a single 1D grid to its active region.
+! The outermost zone is taken as the quiescent background: every zone out to the last
+! one that differs from it is active, plus activebuffer zones beyond that.
+! The current state is saved so that findactive can tell when a frozen zone is disturbed.
+!-----------------------------------------------------------------------
+
+! GLOBALS
+use global
+use zone
+
+IMPLICIT NONE
+
+! LOCALS
+INTEGER :: i, idisturbed
+REAL(kind=8) :: rho, pres, vel, rhoout, presout, velout
+
+!-----------------------------------------------------------------------
+
+if (.not. allocated(bgro)) allocate(bgro(imax), bgpr(imax))
+do i = 1, imax
+  call zonestate(i, bgro(i), bgpr(i), vel)
+enddo
+
+call zonestate(imax, rhoout, presout, velout)
+idisturbed = 0
+do i = imax, 1, -1
+  call zonestate(i, rho, pres, vel)
+  if (abs(rho-rhoout) > activetol*rhoout .or. &
+      abs(pres-presout) > activetol*presout .or. &
+      abs(vel) > activetol*sqrt(gam*presout/rhoout)) then
+    idisturbed = i
+    exit
+  endif
+enddo
+
+activeregion = 1
+iactive = 0
+call growactive(idisturbed)
+
+return
+end
+
+subroutine findactive
+
+! Grow the active region to keep activebuffer zones outside the outermost disturbed zone.
+! A zone is disturbed once its density or pressure has changed from the background by more than
+! activetol, or it moves faster than activetol times the background sound speed.
+! Only the zones near the edge of the active region need checking, since a disturbance
+! moves less than one zone per step; the active region never shrinks.
+!-----------------------------------------------------------------------
+
+! GLOBALS
+use global
+use zone
+
+IMPLICIT NONE
+
+! LOCALS
+INTEGER :: i, idisturbed
+REAL(kind=8) :: rho, pres, vel
+
+!-----------------------------------------------------------------------
+
+if (activeregion /= 1 .or. iactive >= imax) return
+
+idisturbed = 0
+do i = iactive, max(iactive-activebuffer, 1), -1
+  call zonestate(i, rho, pres, vel)
+  if (abs(rho-bgro(i)) > activetol*bgro(i) .or. &
+      abs(pres-bgpr(i)) > activetol*bgpr(i) .or. &
+      abs(vel) > activetol*sqrt(gam*bgpr(i)/bgro(i))) then
+    idisturbed = i
+    exit
+  endif
+enddo
+
+call growactive(idisturbed)
+
+return
+end
+
+subroutine growactive(idisturbed)
+
+! Make sure the active region reaches activebuffer zones past zone idisturbed.
+! The sweep reads 7 frozen zones past the active region in place of the ghost zones,
+! so once it gets that close to the edge the whole grid is made active.
+!-----------------------------------------------------------------------
+
+! GLOBALS
+use global
+use zone
+
+IMPLICIT NONE
+
+INTEGER, INTENT(IN) :: idisturbed
+
+!-----------------------------------------------------------------------
+
+iactive = max(iactive, idisturbed + activebuffer)
+if (iactive > imax - 7) iactive = imax
+
+return
+end
+
+subroutine stopactive
+
+! Sweep the whole grid again and free the saved background state
+!-----------------------------------------------------------------------
+
+! GLOBALS
+use zone
+
+IMPLICIT NONE
+
+!-----------------------------------------------------------------------
+
+activeregion = 0
+iactive = 0
+if (allocated(bgro)) deallocate(bgro, bgpr)
+
+return
+end
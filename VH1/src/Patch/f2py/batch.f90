@@ -0,0 +1,150 @@
+subroutine dtconrows(tend)
+
+! Set the timestep of each row of batched models (batchmode = 1).
+! Same as the 1D hydro constraint in dtcon, but each row keeps its own dt.
+! Rows that have already reached tend are left alone.
+!-----------------------------------------------------------------------
+
+! GLOBALS
+use global
+use zone
+
+IMPLICIT NONE
+
+! LOCALS
+INTEGER :: i, j
+REAL(kind=8) :: tend, ridt, dtx, dt3, xvel, rowsvel
+
+!------------------------------------------------------------------------
+
+!$omp parallel do private(i, ridt, dtx, dt3, xvel, rowsvel) schedule(static)
+do j = 1, jmax
+  if (rowtime(j) >= tend) cycle
+
+  ridt = 0.
+  do i = 1, imax
+    rowsvel = sqrt(gam*zpr(i,j,1)/zro(i,j,1))/zdx(i)
+    xvel = abs(zux(i,j,1)) / zdx(i)
+    ridt = max(xvel,ridt,rowsvel)
+  enddo
+
+  ridt = max(ridt,rowvdtext(j))
+  dtx  = courant / ridt     ! time constraint for given courant parameter
+
+  if (rowdt(j) .gt. 0d0) then
+    dt3      = dtgrowth * rowdt(j)  ! limiting constraint on rate of increase of dt
+    rowdt(j) = min( dt3, dtx )
+  else
+    rowdt(j) = dtx
+  endif
+
+  ! If the timestep becomes too small (or NaN), flag it and let advancerows stop
+  if (.not. (rowtime(j)/rowdt(j) <= 1.e20)) then
+    !$omp atomic write
+    errorcode = 1
+  endif
+enddo
+!$omp end parallel do
+
+return
+end
+
+!#########################################################################
+
+subroutine sweeprows(tend)
+
+! Perform 1D hydro sweeps in the X direction for batched models (batchmode = 1).
+! Each row is advanced over its own timestep rowdt, shortened to land on tend.
+! Rows that have already reached tend are left alone.
+!-----------------------------------------------------------------------
+
+! GLOBALS
+use zone
+use global
+use sweeps
+
+IMPLICIT NONE
+
+! LOCALS
+INTEGER :: j
+REAL(kind=8) :: tend
+LOGICAL :: landed
+
+!-----------------------------------------------------------------------
+
+sweep  = 'x'
+ngeom  = ngeomx
+nleft  = nleftx
+nright = nrightx
+nmin   = 7
+nmax   = imax + 6
+
+! Reuse the Eulerian grid coefficients from setup (see sweepx)
+cachedsweep = (gridcache == 1 .and. xwig == 0.0)
+
+! Batched rows always sweep the whole grid
+frozenright = .false.
+
+! Rows are threaded rather than cells (see sweepx)
+ompcells = .false.
+
+!$omp parallel private(j, landed)
+call checksweeps
+!$omp do schedule(dynamic)
+do j = 1, jmax
+  if (rowtime(j) >= tend) cycle
+
+  ! The sweep routines read the timestep from dt (one per thread)
+  landed = (rowtime(j) + rowdt(j) >= tend)
+  dt = rowdt(j)
+  if (landed) dt = tend - rowtime(j)
+
+  call injectrow(j)
+  call sweepxrow(j, 1)
+
+  rowtime(j) = rowtime(j) + dt
+  if (landed) rowtime(j) = tend
+enddo
+!$omp end do
+!$omp end parallel
+
+return
+end
+
+!#########################################################################
+
+subroutine injectrow(j)
+
+! Inject the wind of the model in row j into its first cell over dt.
+! Mass is added first keeping the kinetic energy of the cell,
+! then the wind kinetic energy is added (as in sources.py)
+!-----------------------------------------------------------------------
+
+! GLOBALS
+use global
+use zone
+
+IMPLICIT NONE
+
+! LOCALS
+INTEGER :: j
+REAL(kind=8) :: vol, mass, ekin
+
+REAL(kind=8), PARAMETER :: third = 1d0 / 3d0
+
+!-----------------------------------------------------------------------
+
+if (rowmdot(j) <= 0d0 .and. rowlum(j) <= 0d0) return
+
+vol  = 4d0*pi*zdx(1)*(zxa(1)*(zxa(1)+zdx(1))+zdx(1)*zdx(1)*third)
+mass = zro(1,j,1)*vol
+ekin = 0.5d0*mass*zux(1,j,1)**2
+
+mass = mass + rowmdot(j)*dt
+ekin = ekin + rowlum(j)*dt
+
+zro(1,j,1) = mass/vol
+zux(1,j,1) = sqrt(2d0*ekin/mass)
+
+return
+end
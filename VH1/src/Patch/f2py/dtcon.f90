@@ -11,8 +11,8 @@ use zone
 IMPLICIT NONE
 
 ! LOCALS
-INTEGER :: i, j, k
-REAL(kind=8) ::  ridt, dtx, dt3, xvel, yvel, zvel
+INTEGER :: i, j, k, n, iend
+REAL(kind=8) ::  ridt, dtx, dt3, xvel, yvel, zvel, olddt
 REAL(kind=8)::   widthy, widthz, width
 
 !------------------------------------------------------------------------
@@ -21,11 +21,23 @@ ridt = 0.
 
 
 if(ndim==1) then
-  do i = 1, imax
-    svel = sqrt(gam*zpr(i,1,1)/zro(i,1,1))/zdx(i)
-    xvel = abs(zux(i,1,1)) / zdx(i)
-    ridt = max(xvel,ridt,svel)
-  enddo
+  ! Zones outside the active region are frozen, so don't limit the timestep (see active.f90)
+  iend = imax
+  if (activeregion == 1) iend = iactive
+  if (fast1d == 1) then
+    ! 1D fast path, zone i is element i+6 of the 1D arrays (see sweep1d.f90)
+    do n = 7, iend + 6
+      svel = sqrt(gam*pr1d(n)/ro1d(n))/dx1d(n)
+      xvel = abs(ux1d(n)) / dx1d(n)
+      ridt = max(xvel,ridt,svel)
+    enddo
+  else
+    do i = 1, iend
+      svel = sqrt(gam*zpr(i,1,1)/zro(i,1,1))/zdx(i)
+      xvel = abs(zux(i,1,1)) / zdx(i)
+      ridt = max(xvel,ridt,svel)
+    enddo
+  endif
 else if(ndim==2) then
   do j = 1, jmax
    do i = 1, imax
@@ -58,21 +70,32 @@ else if(ndim==3) then
   enddo
 endif
 
+! Keep each constraint so Python can see which one is limiting the run
+dthydro = courant / ridt
+dtext   = huge(dtext)
+if (vdtext > 0.) dtext = courant / vdtext
+dtlimiter = 1
+if (vdtext > ridt) dtlimiter = 2
+
 ridt = max(ridt,vdtext)
 dtx  = courant / ridt     ! global time constraint for given courant parameter
 
+olddt = dt
+dtgrown = huge(dtgrown)
 if (dt .gt. 0d0) then
-   dt3  = 1.1d0 * dt        ! limiting constraint on rate of increase of dt
+   dt3  = dtgrowth * dt     ! limiting constraint on rate of increase of dt
+   dtgrown = dt3
+   if (dt3 < dtx) dtlimiter = 3
    dt   = min( dt3, dtx ) ! use smallest required timestep
 else
    dt = dtx
 endif
       
-if (time/dt > 1.e20) then   ! if timestep becomes too small, stop the program!
-  write(*,*) 'Timestep has become too small: dt = ',dt
-  write(*,*) '                             time = ',time
-  call prin('ABORT')
-  stop
+! If the timestep becomes too small (or NaN), flag it and let the caller stop
+! dt goes back to what it was so that the run can go on once the gas is fixed
+if (.not. (time/dt <= 1.e20)) then
+  errorcode = 1
+  dt = olddt
 endif
 
 return
@@ -8,11 +8,40 @@ module global
  integer :: ncycle, ncycp, ncycm, ncycd  ! cycle number
  integer :: nfile                        ! output file numbers
  integer :: ndim
+ integer :: batchmode = 0                ! = 1 : each j row is an independent 1D model (see batch.f90)
 
  real(kind=8) :: time, dt, timem, timep, svel, vdtext
  real(kind=8) :: gam, gamm
 
- real(kind=8), parameter :: courant = 0.5           ! timestep fraction of courant limit
+ ! Each thread keeps its own dt so that batched rows can be swept in parallel (see sweeprows)
+ ! svel is also per thread since every row's sweep updates it (in states)
+!$omp threadprivate(dt, svel)
+
+ ! OpenMP threading of the cell loops inside a sweep (riemann, parabola, evolve, remap)
+ ! This is only worth it for a single long row; otherwise the rows are threaded
+ logical :: ompcells = .false.           ! thread the cell loops in the current sweep (set in sweepx)
+ integer :: ompmincells = 10000          ! smallest row length to thread the cell loops of
+
+ ! Riemann solver used in the sweeps (see riemann.f90)
+ integer :: riemannsolver = 0            ! = 0 : iterated two-shock, = 1 : single pass two-shock, = 2 : HLLC
+
+ ! Equation of state (see evolve.f90 and remap.f90)
+ ! Isothermal gas has gam = 1 and no energy equation, and each zone keeps its own P/rho as it moves
+ integer :: isothermal = 0               ! = 0 : adiabatic, = 1 : isothermal
+
+ real(kind=8) :: courant = 0.5                      ! timestep fraction of courant limit
+ real(kind=8) :: dtgrowth = 1.1d0                   ! largest factor the timestep can grow by in a step
+
+ ! Timestep constraints found by the last call to dtcon, for Python to log (see timestep.py)
+ real(kind=8) :: dthydro = 0., dtext = 0., dtgrown = 0.  ! hydro, external (vdtext) and growth limits
+ integer :: dtlimiter = 0                ! = 1 : hydro, = 2 : external, = 3 : growth, = 4 : landing on tend
+ integer, dimension(4) :: dtlimitcount = 0  ! steps limited by each constraint since Python reset it
+ ! Zones where the remap had to put the density or pressure up to its floor since Python reset it
+ integer :: nfloor = 0
+
+ ! Error code set when the hydro can't go on, so Python can raise an exception instead of stopping
+ integer :: errorcode = 0                ! = 0 : no error, = 1 : the timestep has collapsed (see dtcon.f90)
+                                         !       = 2 : the logarithmic grid can't be made (see loggrid)
  real(kind=8), parameter :: pi = 3.1415926535897931 ! shouldn't computers know this?
  real(kind=8), parameter :: xwig = 0.00             ! fraction of a zone to wiggle grid for dissipation
  real(kind=8), parameter :: smallp = 1.0e-30        ! Set small values to prevent divide by zero
@@ -26,28 +55,44 @@ end module global
 
 module sweepsize
 !=======================================================================
-! Dimension of 1D sweeps.  maxsweep must be as long as the longest of the 
-! 3D arrays PLUS the ghost zones: 
-! ie, must have maxsweep >= max(imax,jmax,kmax) + 12
+! Dimension of 1D sweeps.  maxsweep is as long as the longest of the 
+! 3D arrays PLUS the ghost zones, plus one zone for the dx(n+1) stencil
+! that paraset reads past the last ghost zone: 
+! ie, maxsweep = max(imax,jmax,kmax) + 13
+! It is set when the grid is allocated in init (see allocsweeps)
 !----------------------------------------------------------------------
 
-integer, parameter :: maxsweep=1048588 
+integer :: maxsweep = 0
 
 end module sweepsize
 
 module sweeps      
 !=======================================================================
 ! Data structures used in 1D sweeps, dimensioned maxsweep  (set in sweepsize.mod)
+! Allocated in allocsweeps (init.f90) once the grid size is known
 !----------------------------------------------------------------------
 
 use sweepsize
 
 character(len=1) :: sweep                                    ! direction of sweep: x,y,z
 integer :: nmin, nmax, ngeom, nleft, nright                  ! number of first and last real zone  
-real(kind=8), dimension(maxsweep) :: r, p, e, q, u, v, w, g          ! fluid variables
-real(kind=8), dimension(maxsweep) :: xa, xa0, dx, dx0, dvol          ! coordinate values
-real(kind=8), dimension(maxsweep) :: f, flat                         ! flattening parameter
-real(kind=8), dimension(maxsweep,5) :: para                          ! parabolic interpolation coefficients
+real(kind=8), allocatable, dimension(:) :: r, p, e, q, u, v, w, g    ! fluid variables
+real(kind=8), allocatable, dimension(:) :: xa, xa0, dx, dx0, dvol    ! coordinate values
+real(kind=8), allocatable, dimension(:) :: f, flat                   ! flattening parameter
+real(kind=8), allocatable, dimension(:,:) :: para                    ! parabolic interpolation coefficients
+real(kind=8), allocatable, dimension(:,:) :: sc                      ! passive scalars (see scalars.f90)
 real(kind=8) :: radius, theta, stheta
 
+! Coefficients that only depend on the Eulerian grid in x, computed once in cachegrid (init.f90)
+! These are shared by every thread and row, since all rows have the same x grid
+real(kind=8), allocatable, dimension(:,:) :: parax                   ! paraset coefficients (ppmlr)
+real(kind=8), allocatable, dimension(:) :: dvolx                     ! zone volumes (evolve, remap)
+integer :: gridcache = 1                                             ! = 1 : use parax, dvolx in x sweeps
+logical :: cachedsweep = .false.                                     ! current sweep uses parax, dvolx
+logical :: frozenright = .false.                                     ! right ghost zones hold frozen zones (active.f90)
+
+! Each OpenMP thread sweeps its own rows, so needs its own copy of the sweep data
+!$omp threadprivate(r, p, e, q, u, v, w, g, xa, xa0, dx, dx0, dvol, f, flat, para, sc)
+!$omp threadprivate(radius, theta, stheta)
+
 end module sweeps
@@ -43,14 +43,24 @@ if(ngeomz >= 3) then
 endif
 
 !======================================================================
-! Allocate hydro variables in zonemod.f90 (module zone)
-allocate(zro(imax,jmax,kmax))
-allocate(zpr(imax,jmax,kmax))
-allocate(zux(imax,jmax,kmax))
-allocate(zuy(imax,jmax,kmax))
-allocate(zuz(imax,jmax,kmax))
-allocate(zfl(imax,jmax,kmax))
-allocate(zgr(imax,jmax,kmax))
+! The 1D spherical fast path only works for a single 1D spherical grid (see sweep1d.f90)
+if (jmax*kmax > 1 .or. batchmode == 1 .or. ngeomx /= 2) fast1d = 0
+
+! Passive scalars are kept in the extra fields of the state block
+nzscalar = min(nzscalar, nzextra)
+
+! Allocate hydro variables in zonemod.f90 (module zone), as fields of one block
+! The fast path keeps them in 1D arrays instead, allocated with the sweep arrays
+if (fast1d /= 1) then
+  allocate(zstate(imax,jmax,kmax,nzhydro+nzextra))
+  zro => zstate(:,:,:,1)
+  zpr => zstate(:,:,:,2)
+  zux => zstate(:,:,:,3)
+  zuy => zstate(:,:,:,4)
+  zuz => zstate(:,:,:,5)
+  zfl => zstate(:,:,:,6)
+  zgr => zstate(:,:,:,7)
+endif
 
 allocate(zxa(imax))
 allocate(zdx(imax))
@@ -64,17 +74,32 @@ allocate(zza(kmax))
 allocate(zdz(kmax))
 allocate(zzc(kmax))
 
-!======================================================================
-! Set up the number of dimensions
+allocate(rowtime(jmax))
+allocate(rowdt(jmax))
+allocate(rowvdtext(jmax))
+allocate(rowmdot(jmax))
+allocate(rowlum(jmax))
+
+! Allocate the 1D sweep arrays to fit the longest row plus ghost zones
+call allocsweeps
 
-! Check that arrays are large enough for desired number of physical zones
-if (max(imax,jmax,kmax)+12 > maxsweep) then
-  write(*,*) 'maxsweep too small, recompile with a larger value!'
-  stop
+if (fast1d == 1) then
+  allocate(state1d(maxsweep,nzhydro+nzextra))
+  ro1d => state1d(:,1)
+  pr1d => state1d(:,2)
+  ux1d => state1d(:,3)
+  fl1d => state1d(:,6)
+  gr1d => state1d(:,7)
+  allocate(xa1d(maxsweep))
+  allocate(dx1d(maxsweep))
 endif
 
+!======================================================================
+! Set up the number of dimensions
+
 ! Set the number of dimensions based on array sizes
-if (jmax*kmax==1) then
+! Batched models are independent 1D rows, so only sweep in x
+if (jmax*kmax==1 .or. batchmode==1) then
   ndim = 1
 else if (kmax==1) then
   ndim = 2
@@ -93,6 +118,7 @@ gamm = gam - 1.0
 time   = 0.0
 timep  = 0.0
 timem  = 0.0
+dt     = 0.0
 ncycle = 0
 ncycp  = 0
 ncycd  = 0
@@ -102,10 +128,17 @@ vdtext = 0.
 
 ! Set up grid coordinates
 
-call grid(imax,xmin,xmax,zxa,zxc,zdx)
+if (xgrid == 1) then
+  call loggrid(imax,xmin,xmax,dxmin,zxa,zxc,zdx)
+else
+  call grid(imax,xmin,xmax,zxa,zxc,zdx)
+endif
 call grid(jmax,ymin,ymax,zya,zyc,zdy)
 call grid(kmax,zmin,zmax,zza,zzc,zdz)
 
+! Precompute the parts of the x sweeps that only depend on the grid
+call cachegrid
+
 if (ndim <= 2) zzc(1) = 0.0
 if (ndim == 1) zyc(1) = 0.0
 
@@ -128,13 +161,22 @@ if (ndim == 1) zyc(1) = 0.0
 !!$write (8,*) 
 
 ! initialize grid to zero (make density and pressure 1 to prevent errors)
-zro = 1d0
-zpr = 1d0
-zux = 0d0
-zuy = 0d0
-zuz = 0d0
-zfl = 0d0
-zgr = 0d0
+! The extra fields are left to the caller, so start them at zero too
+if (fast1d == 1) then
+  state1d = 0d0
+  ro1d = 1d0
+  pr1d = 1d0
+else
+  zstate = 0d0
+  zro = 1d0
+  zpr = 1d0
+endif
+
+rowtime   = 0d0
+rowdt     = 0d0
+rowvdtext = 0d0
+rowmdot   = 0d0
+rowlum    = 0d0
 
 return
 end
@@ -154,13 +196,15 @@ subroutine resetgrid
   
   !======================================================================
   ! Allocate hydro variables in zonemod.f90 (module zone)
-  deallocate(zro)
-  deallocate(zpr)
-  deallocate(zux)
-  deallocate(zuy)
-  deallocate(zuz)
-  deallocate(zfl)
-  deallocate(zgr)
+  if (allocated(state1d)) then
+    nullify(ro1d, pr1d, ux1d, fl1d, gr1d)
+    deallocate(state1d)
+    deallocate(xa1d)
+    deallocate(dx1d)
+  else
+    nullify(zro, zpr, zux, zuy, zuz, zfl, zgr)
+    deallocate(zstate)
+  endif
   
   deallocate(zxa)
   deallocate(zdx)
@@ -173,12 +217,191 @@ subroutine resetgrid
   deallocate(zza)
   deallocate(zdz)
   deallocate(zzc)
+
+  deallocate(rowtime)
+  deallocate(rowdt)
+  deallocate(rowvdtext)
+  deallocate(rowmdot)
+  deallocate(rowlum)
+
+  call stopactive
+  call deallocsweeps
   
   return
 end
 
 !#########################################################################
 
+subroutine allocsweeps
+
+! Allocate the 1D sweep arrays in module sweeps
+! These only need to be as long as the longest row plus 6 ghost zones each side
+! The extra zone is read (but never set) by paraset on the outermost ghost zone
+!-----------------------------------------------------------------------
+! GLOBALS
+use zone
+use sweepsize
+use sweeps
+
+IMPLICIT NONE
+
+!=======================================================================
+
+maxsweep = max(imax,jmax,kmax) + 13
+
+call checksweeps
+
+return
+end
+
+subroutine checksweeps
+
+! Make sure the calling thread has its own 1D sweep arrays of length maxsweep
+! The sweep arrays are threadprivate so that rows can be swept in parallel,
+! so each OpenMP thread calls this at the start of a parallel row loop
+!-----------------------------------------------------------------------
+! GLOBALS
+use sweepsize
+use sweeps
+use zone, only : nzscalar
+
+IMPLICIT NONE
+
+!=======================================================================
+
+if (allocated(r)) then
+  if (size(r) == maxsweep .and. size(sc,2) == nzscalar) return
+  deallocate(r, p, e, q, u, v, w, g)
+  deallocate(xa, xa0, dx, dx0, dvol)
+  deallocate(f, flat, para, sc)
+endif
+
+allocate(r(maxsweep))
+allocate(p(maxsweep))
+allocate(e(maxsweep))
+allocate(q(maxsweep))
+allocate(u(maxsweep))
+allocate(v(maxsweep))
+allocate(w(maxsweep))
+allocate(g(maxsweep))
+
+allocate(xa(maxsweep))
+allocate(xa0(maxsweep))
+allocate(dx(maxsweep))
+allocate(dx0(maxsweep))
+allocate(dvol(maxsweep))
+
+allocate(f(maxsweep))
+allocate(flat(maxsweep))
+allocate(para(maxsweep,5))
+allocate(sc(maxsweep,nzscalar))
+
+r = 0d0
+p = 0d0
+e = 0d0
+q = 0d0
+u = 0d0
+v = 0d0
+w = 0d0
+g = 0d0
+xa = 0d0
+xa0 = 0d0
+dx = 0d0
+dx0 = 0d0
+dvol = 0d0
+f = 0d0
+flat = 0d0
+para = 0d0
+sc = 0d0
+
+return
+end
+
+subroutine deallocsweeps
+
+! Deallocate the 1D sweep arrays so that the grid can be set up again
+! Only the calling thread's arrays are freed; the copies held by other
+! OpenMP threads are resized by checksweeps the next time they are used
+!-----------------------------------------------------------------------
+! GLOBALS
+use sweepsize
+use sweeps
+
+IMPLICIT NONE
+
+!=======================================================================
+
+deallocate(r, p, e, q, u, v, w, g)
+deallocate(xa, xa0, dx, dx0, dvol)
+deallocate(f, flat, para, sc)
+deallocate(parax, dvolx)
+
+maxsweep = 0
+
+return
+end
+
+subroutine cachegrid
+
+! Precompute the coefficients of the x sweeps that only depend on the Eulerian
+! grid, which never changes, so that they are not recalculated every sweep:
+!   parax : parabolic interpolation coefficients (paraset in ppmlr)
+!   dvolx : zone volumes (volume in evolve and remap)
+! The coordinates are padded with ghost zones exactly as in sweepx and ppmlr
+! The Lagrangian coefficients in remap still need to be found every sweep
+!-----------------------------------------------------------------------
+! GLOBALS
+use zone
+use global
+use sweeps
+
+IMPLICIT NONE
+
+! LOCALS
+INTEGER :: i, n
+
+!=======================================================================
+
+sweep  = 'x'
+ngeom  = ngeomx
+nleft  = nleftx
+nright = nrightx
+nmin   = 7
+nmax   = imax + 6
+radius = 1.0
+! The whole grid is padded, even if an earlier grid was left with an active region
+frozenright = .false.
+
+do i = 1, imax
+  n = i + 6
+  xa0(n) = zxa(i)
+  dx0(n) = zdx(i)
+  xa (n) = zxa(i)
+  dx (n) = zdx(i)
+enddo
+
+! Fill the ghost zones
+call boundary
+
+allocate(parax(maxsweep,5))
+allocate(dvolx(maxsweep))
+parax = 0d0
+dvolx = 0d0
+
+call paraset(nmin-4, nmax+5, parax, dx, xa)
+call volume(nmin, nmax, ngeom, radius, xa0, dx0, dvolx)
+
+! The 1D fast path keeps the padded grid, since its sweeps never copy it in (see sweep1d)
+if (fast1d == 1) then
+  xa1d = xa0
+  dx1d = dx0
+endif
+
+return
+end
+
+!#########################################################################
+
 subroutine grid( nzones, xmin, xmax, xa, xc, dx )
 
 ! Create grid to cover physical size from xmin to xmax
@@ -205,3 +428,65 @@ enddo
 
 return
 end
+
+!#########################################################################
+
+subroutine loggrid( nzones, xmin, xmax, dxmin, xa, xc, dx )
+
+! Create a logarithmic grid to cover physical size from xmin to xmax
+! Each zone is a constant factor wider than the one inside it,
+! starting from a zone of width dxmin at xmin
+! This puts high resolution at the centre without needing many zones
+!
+! xa(1) is left boundary location - at xmin
+! xa(nzones+1) is right boundary location - at xmax
+! If the zones can't fit, errorcode is set to 2 and a uniform grid is made instead
+!----------------------------------------------------------------------
+use global, only : errorcode
+
+IMPLICIT NONE
+
+! LOCALS
+integer :: nzones, n, iter
+real(kind=8), dimension(nzones) :: xa, dx, xc
+real(kind=8) :: xmin, xmax, dxmin, ratio, rlo, rhi, width
+
+!=======================================================================
+
+width = xmax - xmin
+if (dxmin <= 0d0 .or. dxmin*nzones >= width) then
+  write(*,*) 'Logarithmic grid needs 0 < dxmin < (xmax-xmin)/nzones: dxmin = ',dxmin
+  errorcode = 2
+  call grid(nzones, xmin, xmax, xa, xc, dx)
+  return
+endif
+
+! Find the ratio of the widths of neighbouring zones by bisection,
+! so that dxmin * (ratio**nzones - 1) / (ratio - 1) = xmax - xmin
+! (the last zone can't be wider than the whole grid, giving the upper bound)
+rlo = 1d0
+rhi = (width/dxmin)**(1d0/max(nzones-1,1))
+do iter = 1, 200
+  ratio = 0.5d0*(rlo + rhi)
+  if (dxmin*(ratio**nzones - 1d0)/(ratio - 1d0) > width) then
+    rhi = ratio
+  else
+    rlo = ratio
+  endif
+enddo
+ratio = 0.5d0*(rlo + rhi)
+
+xa(1) = xmin
+dx(1) = dxmin
+do n = 2, nzones
+  dx(n) = dx(n-1)*ratio
+  xa(n) = xa(n-1) + dx(n-1)
+enddo
+! Make the grid end exactly on xmax
+dx(nzones) = xmax - xa(nzones)
+do n = 1, nzones
+  xc(n) = xa(n) + 0.5*dx(n)
+enddo
+
+return
+end
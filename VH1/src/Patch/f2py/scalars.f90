@@ -0,0 +1,111 @@
+subroutine boundaryscalars(sc)
+
+! Impose boundary conditions on the ghost zones of the passive scalars, as boundary does for rho
+! Fixed inflow has no scalars of its own, so it keeps the scalars of the edge zone
+!-----------------------------------------------------------------------
+
+! GLOBALS
+use zone, only : nzscalar
+use sweepsize
+use sweeps, only : nmin, nmax, nleft, nright, frozenright
+
+IMPLICIT NONE
+
+! LOCALS
+INTEGER :: n
+REAL(kind=8), DIMENSION(maxsweep,nzscalar) :: sc
+
+!-----------------------------------------------------------------------
+
+do n = 1, 6
+  select case (nleft)
+    case (0)
+      sc(nmin-n,:) = sc(nmin+n-1,:)
+    case (1, 2)
+      sc(nmin-n,:) = sc(nmin,:)
+    case (3)
+      sc(nmin-n,:) = sc(nmax+1-n,:)
+  end select
+enddo
+
+! Frozen zones past the active region already fill the ghost zones on the right
+if (frozenright) return
+
+do n = 1, 6
+  select case (nright)
+    case (0)
+      sc(nmax+n,:) = sc(nmax+1-n,:)
+    case (1, 2)
+      sc(nmax+n,:) = sc(nmax,:)
+    case (3)
+      sc(nmax+n,:) = sc(nmin+n-1,:)
+  end select
+enddo
+
+return
+end
+
+!#######################################################################
+
+subroutine remapscalars(lmin, lmax, sc, xa, xa0, dx, para, flat, fluxr, dm0)
+
+! Remap the passive scalars from the Lagrangian zones lmin to lmax back to the Eulerian grid,
+! called by remap and remap1d once they have remapped the mass.
+! The scalars are amounts per unit mass (e.g. the ionisation fraction), so they move with
+! the mass fluxes fluxr, as the velocity does. The Lagrangian update leaves them unchanged.
+! dm0 is one over the mass of each zone after the remap.
+! Only the difference from the old scalar is remapped, so a uniform scalar stays exactly uniform
+! (e.g. fully ionised gas keeps xhii = 1) and mass added by the density floor has the zone's scalars
+!-----------------------------------------------------------------------
+
+! GLOBALS
+use zone, only : nzscalar
+use sweepsize
+use global, only : ompcells
+
+IMPLICIT NONE
+
+! LOCALS
+INTEGER :: lmin, lmax, n, nn, is
+REAL(kind=8), DIMENSION(maxsweep,nzscalar) :: sc
+REAL(kind=8), DIMENSION(maxsweep) :: xa, xa0, dx, flat, fluxr, dm0
+REAL(kind=8), DIMENSION(maxsweep) :: ds, sl, s6, fluxs
+REAL(kind=8), DIMENSION(maxsweep,5) :: para
+REAL(kind=8) :: fractn, fractn2, deltx
+
+REAL(kind=8), PARAMETER :: fourthd= 4.0 / 3.0
+
+!---------------------------------------------------------------------------
+
+do is = 1, nzscalar
+
+  call parabola(lmin-1, lmax+1, para, sc(:,is), ds, s6, sl, flat)
+
+  fluxs = 0.0
+
+  !$omp parallel do if(ompcells) private(nn, deltx, fractn, fractn2) schedule(static)
+  do n = lmin, lmax + 1
+    deltx = xa(n) - xa0(n)
+    if(deltx >= 0.0) then
+      nn = n - 1
+      fractn  = 0.5*deltx/dx(nn)
+      fractn2 = 1. - fourthd*fractn
+      fluxs(n) = (sl(nn) + ds(nn) - fractn*(ds(nn) - fractn2*s6(nn)))*fluxr(n)
+    else
+      fractn   = 0.5*deltx/dx(n)
+      fractn2  = 1. + fourthd*fractn
+      fluxs(n) = (sl(n) - fractn*(ds(n) + fractn2*s6(n)))*fluxr(n)
+    endif
+  enddo
+  !$omp end parallel do
+
+  !$omp parallel do if(ompcells) schedule(static)
+  do n = lmin-1, lmax+1
+    sc(n,is) = sc(n,is) + (fluxs(n) - fluxs(n+1) - sc(n,is)*(fluxr(n) - fluxr(n+1)))*dm0(n)
+  enddo
+  !$omp end parallel do
+
+enddo
+
+return
+end
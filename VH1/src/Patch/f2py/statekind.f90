@@ -0,0 +1,11 @@
+module statekind
+!=======================================================================
+! Kind of the reals that hold the state of the gas in the zone arrays
+! (zro, zpr, ...). Everything else, including the sweeps, is double precision.
+! statekind_single.f90 replaces this file in the single precision build
+! of VH1 (vhone_single), which halves the memory the state takes up
+!-----------------------------------------------------------------------
+
+integer, parameter :: rs = 8
+
+end module statekind
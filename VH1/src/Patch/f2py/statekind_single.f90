@@ -0,0 +1,9 @@
+module statekind
+!=======================================================================
+! Kind of the reals that hold the state of the gas in the zone arrays
+! for the single precision build of VH1 (vhone_single), see statekind.f90
+!-----------------------------------------------------------------------
+
+integer, parameter :: rs = 4
+
+end module statekind
@@ -0,0 +1,507 @@
+subroutine sweep1d
+
+! Specialised x sweep of a single 1D spherical grid (fast1d = 1), used in place of sweepx.
+! The state is kept in the 1D arrays ro1d, pr1d, ux1d, fl1d and gr1d with the ghost zones
+! in place (zone i is element i+6), so the PPMLR steps work on it directly rather than
+! copying each row in and out of the 3D arrays.
+! There are no transverse velocities, so v and w and the fictitious forces are left out,
+! and the Eulerian grid coefficients always come from setup (see cachegrid).
+! Gives the same answer as sweepx with ppmlr for the same grid.
+!-----------------------------------------------------------------------
+
+! GLOBALS
+use zone
+use global
+use sweepsize
+use sweeps, only : sweep, nmin, nmax, ngeom, nleft, nright, parax, frozenright
+
+IMPLICIT NONE
+
+! LOCALS
+INTEGER :: n, nend
+REAL(kind=8), DIMENSION(maxsweep) :: e, q, flat, xa, dx, dvol
+REAL(kind=8), DIMENSION(maxsweep) :: dr, du, dp, r6, u6, p6, rl, ul, pl
+REAL(kind=8), DIMENSION(maxsweep) :: rrgh, urgh, prgh, rlft, ulft, plft, umid, pmid
+REAL(kind=8), DIMENSION(7,4) :: frozen
+REAL(kind=8), DIMENSION(7,nzscalar) :: frozensc
+
+!-----------------------------------------------------------------------
+
+sweep  = 'x'
+ngeom  = ngeomx
+nleft  = nleftx
+nright = nrightx
+nmin   = 7
+nmax   = imax + 6
+
+! Only sweep the active region if there is one (see active.f90)
+! The frozen zones past it take the place of the ghost zones on the right
+frozenright = (activeregion == 1 .and. iactive < imax)
+if (frozenright) nmax = iactive + 6
+
+ompcells = (nmax - 6 >= ompmincells)
+
+! The sweep overwrites its ghost zones, so keep the frozen zones standing in for them
+nend = nmax
+if (frozenright) then
+  nend = nmax + 7
+  frozen(:,1) = ro1d(nmax+1:nmax+7)
+  frozen(:,2) = pr1d(nmax+1:nmax+7)
+  frozen(:,3) = ux1d(nmax+1:nmax+7)
+  frozen(:,4) = fl1d(nmax+1:nmax+7)
+  frozensc = state1d(nmax+1:nmax+7,nzhydro+1:nzhydro+nzscalar)
+endif
+
+do n = nmin, nend
+  pr1d(n) = max(smallp,pr1d(n))
+  if (isothermal == 0) e(n) = pr1d(n)/(ro1d(n)*gamm)+0.5*ux1d(n)**2
+enddo
+
+! Apply boundary conditions by filling ghost zones
+! The passive scalars are in state1d after the hydro fields (see zonemod.f90)
+call boundary1d(e)
+if (nzscalar > 0) call boundaryscalars(state1d(:,nzhydro+1:nzhydro+nzscalar))
+
+! Calculate flattening coefficients for smoothing near shocks
+call flatten1d(flat)
+
+! Interpolate parabolae for fluid variables on the Eulerian grid
+call parabola(nmin-4, nmax+4, parax, pr1d, dp, p6, pl, flat)
+call parabola(nmin-4, nmax+4, parax, ro1d, dr, r6, rl, flat)
+call parabola(nmin-4, nmax+4, parax, ux1d, du, u6, ul, flat)
+
+! Integrate parabolae to get input states for Riemann problem
+call states1d( pl, ul, rl, p6, u6, r6, dp, du, dr, plft, ulft, rlft, prgh, urgh, rrgh )
+
+! Call the Riemann solver to obtain the zone face averages, umid and pmid
+call riemann( nmin-3, nmax+4, gam, prgh, urgh, rrgh, plft, ulft, rlft, pmid, umid )
+
+! do lagrangian update using umid and pmid
+call evolve1d( umid, pmid, e, q, xa, dx, dvol )
+
+! remap onto original Eulerian grid
+call remap1d( e, q, flat, xa, dx, dvol )
+
+if (frozenright) then
+  ro1d(nmax+1:nmax+7) = frozen(:,1)
+  pr1d(nmax+1:nmax+7) = frozen(:,2)
+  ux1d(nmax+1:nmax+7) = frozen(:,3)
+  fl1d(nmax+1:nmax+7) = frozen(:,4)
+  state1d(nmax+1:nmax+7,nzhydro+1:nzhydro+nzscalar) = frozensc
+endif
+
+return
+end
+
+!#######################################################################
+
+subroutine boundary1d(e)
+
+! Impose boundary conditions on the ghost zones of the 1D state arrays, as boundary does for sweeps
+! The grid never moves, so its ghost zones are set once in cachegrid
+!-----------------------------------------------------------------------
+
+! GLOBALS
+use zone
+use global
+use sweepsize
+use sweeps, only : nmin, nmax, nleft, nright, frozenright
+
+IMPLICIT NONE
+
+! LOCALS
+INTEGER :: n
+REAL(kind=8), DIMENSION(maxsweep) :: e
+
+!-----------------------------------------------------------------------
+
+do n = 1, 6
+  select case (nleft)
+    case (0)
+      ro1d(nmin-n) = ro1d(nmin+n-1)
+      ux1d(nmin-n) = -ux1d(nmin+n-1)
+      pr1d(nmin-n) = pr1d(nmin+n-1)
+      e   (nmin-n) = e   (nmin+n-1)
+      fl1d(nmin-n) = fl1d(nmin+n-1)
+    case (1)
+      ro1d(nmin-n) = ro1d(nmin)
+      ux1d(nmin-n) = ux1d(nmin)
+      pr1d(nmin-n) = pr1d(nmin)
+      e   (nmin-n) = e   (nmin)
+      fl1d(nmin-n) = fl1d(nmin)
+    case (2)
+      ro1d(nmin-n) = dinflo
+      ux1d(nmin-n) = uinflo
+      pr1d(nmin-n) = pinflo
+      e   (nmin-n) = pinflo/(dinflo*gamm) + 0.5*uinflo**2
+      fl1d(nmin-n) = 0.0
+    case (3)
+      ro1d(nmin-n) = ro1d(nmax+1-n)
+      ux1d(nmin-n) = ux1d(nmax+1-n)
+      pr1d(nmin-n) = pr1d(nmax+1-n)
+      e   (nmin-n) = e   (nmax+1-n)
+      fl1d(nmin-n) = fl1d(nmax+1-n)
+  end select
+enddo
+
+! Frozen zones past the active region already fill the ghost zones on the right
+if (frozenright) return
+
+do n = 1, 6
+  select case (nright)
+    case (0)
+      ro1d(nmax+n) = ro1d(nmax+1-n)
+      ux1d(nmax+n) = -ux1d(nmax+1-n)
+      pr1d(nmax+n) = pr1d(nmax+1-n)
+      e   (nmax+n) = e   (nmax+1-n)
+      fl1d(nmax+n) = fl1d(nmax+1-n)
+    case (1)
+      ro1d(nmax+n) = ro1d(nmax)
+      ux1d(nmax+n) = ux1d(nmax)
+      pr1d(nmax+n) = pr1d(nmax)
+      e   (nmax+n) = e   (nmax)
+      fl1d(nmax+n) = fl1d(nmax)
+    case (2)
+      ro1d(nmax+n) = dotflo
+      ux1d(nmax+n) = uotflo
+      pr1d(nmax+n) = potflo
+      e   (nmax+n) = potflo/(dotflo*gamm) + 0.5*uotflo**2
+      fl1d(nmax+n) = 0.0
+    case (3)
+      ro1d(nmax+n) = ro1d(nmin+n-1)
+      ux1d(nmax+n) = ux1d(nmin+n-1)
+      pr1d(nmax+n) = pr1d(nmin+n-1)
+      e   (nmax+n) = e   (nmin+n-1)
+      fl1d(nmax+n) = fl1d(nmin+n-1)
+  end select
+enddo
+
+return
+end
+
+!#######################################################################
+
+subroutine flatten1d(flat)
+
+! Flattening coefficients of the 1D state arrays, as flatten does for sweeps
+!-----------------------------------------------------------------------
+
+! GLOBALS
+use zone
+use global
+use sweepsize
+use sweeps, only : nmin, nmax
+
+IMPLICIT NONE
+
+! LOCALS
+INTEGER :: n
+REAL(kind=8), DIMENSION(maxsweep) :: flat, steep
+REAL(kind=8) :: delp1, delp2, shock, temp1, temp2, old_flat
+REAL(kind=8), PARAMETER :: omega1 = 0.75
+REAL(kind=8), PARAMETER :: omega2 = 5.0
+REAL(kind=8), PARAMETER :: epsilon = 0.33
+
+!--------------------------------------------------------------------------
+
+do n = nmin-4, nmax+4
+  delp1 = pr1d(n+1) - pr1d(n-1)
+  delp2 = pr1d(n+2) - pr1d(n-2)
+  if(abs(delp2) < small) delp2 = small
+  shock = abs(delp1)/min(pr1d(n+1),pr1d(n-1))-epsilon
+  shock = max(0.0,shock)
+  if(shock > 0.0) shock = 1.0
+  if(ux1d(n-1) < ux1d(n+1)) shock = 0.0
+  temp1 = ( delp1 / delp2 - omega1 ) * omega2
+  steep(n) = shock * max( 0., temp1 )
+enddo
+
+steep(nmin-5) = steep(nmin-4)
+steep(nmax+5) = steep(nmax+4)
+
+flat = 0.0
+do n = nmin-4, nmax+4
+  temp2   = max( steep(n-1), steep(n), steep(n+1) )
+  flat(n) = max( 0.0, min( 0.5, temp2 ) )
+enddo
+
+! The flattening memory in fl1d is always below 1 in 1D (see flatten)
+do n = nmin-3, nmax+3
+  old_flat = fl1d(n) - int(fl1d(n))
+  if (flat(n) > 0.0) then
+    flat(n) = max(flat(n),old_flat)
+    fl1d(n) = max(flat(n) - 1.0, 0.0)
+  else
+    fl1d(n) = max(0.0, fl1d(n) - 1.0)
+    flat(n) = old_flat
+  endif
+enddo
+
+return
+end
+
+!#######################################################################
+
+subroutine states1d( pl, ul, rl, p6, u6, r6, dp, du, dr, plft, ulft, rlft, prgh, urgh, rrgh )
+
+! Left and right states for the Riemann solver from the 1D state arrays, as states does for sweeps
+! The only force is gravity, since there are no transverse velocities
+!-----------------------------------------------------------------------
+
+! GLOBALS
+use zone
+use global
+use sweepsize
+use sweeps, only : nmin, nmax
+
+IMPLICIT NONE
+
+! LOCALS
+INTEGER :: n, np
+REAL(kind=8), DIMENSION(maxsweep) :: plft, ulft, rlft, prgh, urgh, rrgh, dp, du, dr
+REAL(kind=8), DIMENSION(maxsweep) :: pl, ul, rl, p6, u6, r6, Cdtdx, fCdtdx
+REAL(kind=8) :: hdt
+
+REAL(kind=8), PARAMETER :: fourthd = 4.0 / 3.0
+
+!--------------------------------------------------------------------------
+
+hdt   = 0.5*dt
+do n = nmin-4, nmax+4
+  Cdtdx (n) = sqrt(gam*pr1d(n)/ro1d(n))/dx1d(n)
+  svel      = max(svel,Cdtdx(n))
+  Cdtdx (n) = Cdtdx(n)*hdt
+  fCdtdx(n) = 1. - fourthd*Cdtdx(n)
+enddo
+
+do n = nmin-4, nmax+4
+  np = n+1
+  plft(np) = pl(n)+dp(n)-Cdtdx(n)*(dp(n)-fCdtdx(n)*p6(n))
+  ulft(np) = ul(n)+du(n)-Cdtdx(n)*(du(n)-fCdtdx(n)*u6(n))
+  rlft(np) = rl(n)+dr(n)-Cdtdx(n)*(dr(n)-fCdtdx(n)*r6(n))
+  plft(np) = max(smallp,plft(np))
+  rlft(np) = max(smallr,rlft(np))
+  ulft(np) = ulft(np) + hdt*gr1d(np)
+
+  prgh(n) = pl(n) + Cdtdx(n)*(dp(n)+fCdtdx(n)*p6(n))
+  urgh(n) = ul(n) + Cdtdx(n)*(du(n)+fCdtdx(n)*u6(n))
+  rrgh(n) = rl(n) + Cdtdx(n)*(dr(n)+fCdtdx(n)*r6(n))
+  prgh(n) = max(smallp,prgh(n))
+  rrgh(n) = max(smallr,rrgh(n))
+  urgh(n) = urgh(n) + hdt*gr1d(n)
+enddo
+
+return
+end
+
+!#######################################################################
+
+subroutine evolve1d( umid, pmid, e, q, xa, dx, dvol )
+
+! Lagrangian update of the 1D state arrays in spherical radius, as evolve does for sweeps
+! Returns the moved zone edges xa, widths dx and volumes dvol for remap1d
+! For isothermal gas q is set to the P/rho the zone keeps, as in evolvecells
+!-----------------------------------------------------------------------
+
+! GLOBALS
+use zone
+use global
+use sweepsize
+use sweeps, only : nmin, nmax, dvolx
+
+IMPLICIT NONE
+
+! LOCALS
+INTEGER :: n
+REAL(kind=8) :: uold
+REAL(kind=8), DIMENSION(maxsweep) :: umid, pmid, e, q, xa, dx, dvol
+REAL(kind=8), DIMENSION(maxsweep) :: amid, upmid, dtbdm
+REAL(kind=8), PARAMETER :: third = 1.0 / 3.0
+
+!------------------------------------------------------------------------
+
+! Move the zone edges, starting from the Eulerian grid
+xa(nmin-4) = xa1d(nmin-4)
+do n = nmin-3, nmax + 4
+  dtbdm(n) = dt / (ro1d(n) * dvolx(n))
+  xa   (n) = xa1d(n) + dt * umid(n)
+  upmid(n) = umid(n) * pmid(n)
+  amid (n) = (xa(n)-xa1d(n))*(third*(xa(n)-xa1d(n))+xa1d(n))+xa1d(n)**2
+enddo
+xa(nmax+5) = xa1d(nmax+5)
+xa(nmax+6) = xa1d(nmax+6)
+
+do n = nmin-4, nmax+5
+  dx  (n) = xa(n+1) - xa(n)
+  dvol(n) = dx(n)*(xa(n)*(xa(n)+dx(n))+dx(n)*dx(n)*third)
+enddo
+
+!$omp parallel do if(ompcells) private(uold) schedule(static)
+do n = nmin-3, nmax+3
+
+! isothermal zones keep their P/rho (the sound speed squared) as they move
+
+  if (isothermal == 1) q(n) = pr1d(n)/ro1d(n)
+
+! density evolution. lagrangian code, so all we have to do is watch the change in the geometry.
+
+  ro1d(n) = ro1d(n) * ( dvolx(n) / dvol(n) )
+  ro1d(n) = max(ro1d(n),smallr)
+
+! velocity evolution due to pressure acceleration and gravity.
+
+  uold    = ux1d(n)
+  ux1d(n) = ux1d(n) - dtbdm(n)*(pmid(n+1)-pmid(n))*0.5*(amid(n+1)+amid(n)) + dt*gr1d(n)
+
+! total energy evolution
+
+  if (isothermal == 1) cycle
+  e(n) = e(n) - dtbdm(n)*(amid(n+1)*upmid(n+1) - amid(n)*upmid(n)) + 0.5*dt*(uold*gr1d(n) + ux1d(n)*gr1d(n))
+  q(n) = e(n) - 0.5*ux1d(n)**2
+  q(n) = max(q(n),smallp/(gamm*ro1d(n)))
+
+enddo
+!$omp end parallel do
+
+return
+end
+
+!#######################################################################
+
+subroutine remap1d( e, q, flat, xa, dx, dvol )
+
+! Remap the 1D state arrays from the Lagrangian zones back to the Eulerian grid in spherical radius,
+! as remap does for sweeps (including remapping P/rho in q instead of the energy for isothermal gas)
+!-----------------------------------------------------------------------
+
+! GLOBALS
+use zone
+use global
+use sweepsize
+use sweeps, only : nmin, nmax, dvolx
+
+IMPLICIT NONE
+
+! LOCALS
+INTEGER :: n, nn, nfl
+REAL(kind=8), DIMENSION(maxsweep) :: e, q, flat, xa, dx, dvol
+REAL(kind=8), DIMENSION(maxsweep) :: du, ul, u6, de, el, e6, dq, ql, q6, dr, rl, r6, dm, dm0, delta
+REAL(kind=8), DIMENSION(maxsweep) :: fluxr, fluxu, fluxe, fluxq
+REAL(kind=8), DIMENSION(maxsweep,5) :: para
+REAL(kind=8) :: fractn, fractn2, ekin, deltx
+
+REAL(kind=8), PARAMETER :: third  = 1.0 / 3.0
+REAL(kind=8), PARAMETER :: fourthd= 4.0 / 3.0
+
+!---------------------------------------------------------------------------
+
+call paraset (nmin-1, nmax+1, para, dx, xa)
+call parabola(nmin-1, nmax+1, para, ro1d, dr, r6, rl, flat)
+call parabola(nmin-1, nmax+1, para, ux1d, du, u6, ul, flat)
+call parabola(nmin-1, nmax+1, para, q, dq, q6, ql, flat)
+if (isothermal == 0) call parabola(nmin-1, nmax+1, para, e, de, e6, el, flat)
+
+! Volume of the spherical subshells between the Lagrangian and Eulerian zone edges
+do n = nmin, nmax+1
+  delta(n) = xa(n) - xa1d(n)
+  delta(n) = delta(n)*(xa1d(n)*(xa1d(n) + delta(n)) + delta(n)**2*third)
+enddo
+
+fluxr = 0.0
+fluxu = 0.0
+fluxe = 0.0
+fluxq = 0.0
+
+!$omp parallel do if(ompcells) private(nn, deltx, fractn, fractn2) schedule(static)
+do n = nmin, nmax + 1
+  deltx = xa(n) - xa1d(n)
+  if(deltx >= 0.0) then
+    nn = n - 1
+    fractn  = 0.5*deltx/dx(nn)
+    fractn2 = 1. - fourthd*fractn
+    fluxr (n) = (rl(nn) + dr(nn) - fractn*(dr(nn) - fractn2*r6(nn)))*delta(n)
+    fluxu (n) = (ul(nn) + du(nn) - fractn*(du(nn) - fractn2*u6(nn)))*fluxr(n)
+    if (isothermal == 0) fluxe (n) = (el(nn) + de(nn) - fractn*(de(nn) - fractn2*e6(nn)))*fluxr(n)
+    fluxq (n) = (ql(nn) + dq(nn) - fractn*(dq(nn) - fractn2*q6(nn)))*fluxr(n)
+  else
+    fractn   = 0.5*deltx/dx(n)
+    fractn2  = 1. + fourthd*fractn
+    fluxr(n) = (rl(n) - fractn*(dr(n) + fractn2*r6(n)))*delta(n)
+    fluxu(n) = (ul(n) - fractn*(du(n) + fractn2*u6(n)))*fluxr(n)
+    if (isothermal == 0) fluxe(n) = (el(n) - fractn*(de(n) + fractn2*e6(n)))*fluxr(n)
+    fluxq(n) = (ql(n) - fractn*(dq(n) + fractn2*q6(n)))*fluxr(n)
+  endif
+enddo
+!$omp end parallel do
+
+! Count the zones that hit the density and pressure floors (see timestep.py)
+nfl = 0
+!$omp parallel do if(ompcells) reduction(+:nfl) schedule(static)
+do n = nmin-1, nmax+1
+  dm  (n) = ro1d(n) * dvol(n)
+  dm0 (n) = (dm(n) + fluxr(n) - fluxr(n+1))
+  ro1d(n) = dm0(n)/dvolx(n)
+  if (ro1d(n) < smallr) nfl = nfl + 1
+  ro1d(n) = max(smallr,ro1d(n))
+  dm0 (n) = 1./(ro1d(n)*dvolx(n))
+  ux1d(n) = (ux1d(n)*dm(n) + fluxu(n)-fluxu(n+1))*dm0(n)
+  if (isothermal == 0) e(n) = (e(n)*dm(n) + fluxe(n)-fluxe(n+1))*dm0(n)
+  q   (n) = (q(n)*dm(n) + fluxq(n)-fluxq(n+1))*dm0(n)
+enddo
+!$omp end parallel do
+
+! The passive scalars move with the mass
+if (nzscalar > 0) call remapscalars(nmin, nmax, state1d(:,nzhydro+1:nzhydro+nzscalar), &
+                                    xa, xa1d, dx, para, flat, fluxr, dm0)
+
+! If flow is highly supersonic remap on internal energy, else on total E
+! Isothermal gas gets its pressure from the remapped P/rho
+!$omp parallel do if(ompcells) private(ekin) reduction(+:nfl) schedule(static)
+do n = nmin, nmax
+  if (isothermal == 1) then
+    pr1d(n) = ro1d(n)*q(n)
+  else
+    ekin = 0.5*ux1d(n)**2
+    if(ekin/q(n) < 100.0) q(n) = e(n) - ekin
+    pr1d(n) = gamm*ro1d(n)*q(n)
+  endif
+  if (pr1d(n) < smallp) nfl = nfl + 1
+  pr1d(n) = max(smallp,pr1d(n))
+enddo
+!$omp end parallel do
+
+nfloor = nfloor + nfl
+
+return
+end
+
+!#######################################################################
+
+subroutine zonestate(i, rho, pres, vel)
+
+! Density, pressure and velocity of zone i of a single 1D grid,
+! from the 1D state arrays if fast1d = 1, otherwise from the 3D arrays
+!-----------------------------------------------------------------------
+
+! GLOBALS
+use zone
+
+IMPLICIT NONE
+
+INTEGER, INTENT(IN) :: i
+REAL(kind=8), INTENT(OUT) :: rho, pres, vel
+
+!-----------------------------------------------------------------------
+
+if (fast1d == 1) then
+  rho  = ro1d(i+6)
+  pres = pr1d(i+6)
+  vel  = ux1d(i+6)
+else
+  rho  = zro(i,1,1)
+  pres = zpr(i,1,1)
+  vel  = zux(i,1,1)
+endif
+
+return
+end
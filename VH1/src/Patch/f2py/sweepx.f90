@@ -11,7 +11,7 @@ use sweeps
 IMPLICIT NONE
 
 ! LOCALS
-INTEGER :: i, j, k, n
+INTEGER :: j, k
 
 !-----------------------------------------------------------------------
 
@@ -22,13 +22,58 @@ nright = nrightx
 nmin   = 7
 nmax   = imax + 6
 
+! Only sweep the active region if there is one (see active.f90)
+! The frozen zones past it take the place of the ghost zones on the right
+frozenright = (activeregion == 1 .and. iactive < imax)
+if (frozenright) nmax = iactive + 6
+
+! Reuse the Eulerian grid coefficients from setup (not valid if the grid is wiggled)
+cachedsweep = (gridcache == 1 .and. xwig == 0.0)
+
+! Thread over the cells of each sweep only if there is one long row
+ompcells = (jmax*kmax == 1 .and. nmax - 6 >= ompmincells)
+
 ! Now Loop over each row...
+! With OpenMP, each thread sweeps whole rows using its own sweep arrays
 
+!$omp parallel if(jmax*kmax > 1) private(j, k) copyin(dt)
+call checksweeps
+!$omp do collapse(2) schedule(static)
 do k = 1, kmax
  do j = 1, jmax
+   call sweepxrow(j, k)
+ enddo
+enddo
+!$omp end do
+!$omp end parallel
+       
+return
+end
+
+subroutine sweepxrow(j, k)
+
+! Perform the 1D hydro sweep in the X direction along one j,k row.
+! The sweep variables (sweep, ngeom, nmin, nmax, ...) must already be set, see sweepx
+! Zones 1 to nmax-6 are swept, which is fewer than imax if only the active region is swept
+!-----------------------------------------------------------------------
+
+! GLOBALS
+use zone
+use global
+use sweeps
+
+IMPLICIT NONE
+
+! LOCALS
+INTEGER :: i, j, k, n, iend
+
+!-----------------------------------------------------------------------
 
    ! Put state variables into 1D arrays, padding with 6 ghost zones
-   do i = 1,imax
+   ! If the right ghost zones are frozen zones, also read the extra zone paraset looks at
+   iend = nmax - 6
+   if (frozenright) iend = nmax + 1
+   do i = 1, iend
      n = i + 6
 
      r  (n) = zro(i,j,k)
@@ -38,6 +83,7 @@ do k = 1, kmax
      w  (n) = zuz(i,j,k)
      f  (n) = zfl(i,j,k)
      g  (n) = zgr(i,j,k)
+     sc (n,:) = zstate(i,j,k,nzhydro+1:nzhydro+nzscalar)
 
      xa0(n) = zxa(i)
      dx0(n) = zdx(i)
@@ -45,14 +91,14 @@ do k = 1, kmax
      dx (n) = zdx(i)
 
      p  (n) = max(smallp,p(n))
-     e  (n) = p(n)/(r(n)*gamm)+0.5*(u(n)**2+v(n)**2+w(n)**2)
+     if (isothermal == 0) e(n) = p(n)/(r(n)*gamm)+0.5*(u(n)**2+v(n)**2+w(n)**2)
    enddo
 
    ! Perform 1D hydrodynamics evolution using PPMLR algorithm
    call ppmlr
    
    ! Put updated values back into 3D arrays, dropping ghost zones
-   do i = 1, imax
+   do i = 1, nmax - 6
      n = i + 6
      zro(i,j,k) = r(n)
      zpr(i,j,k) = p(n)
@@ -61,11 +107,9 @@ do k = 1, kmax
      zuz(i,j,k) = w(n)
      zfl(i,j,k) = f(n)
      zgr(i,j,k) = g(n)
+     zstate(i,j,k,nzhydro+1:nzhydro+nzscalar) = sc(n,:)
    enddo
 
- enddo
-enddo
-       
 return
 end
 
@@ -21,6 +21,8 @@ nleft  = nlefty
 nright = nrighty
 nmin   = 7
 nmax   = jmax + 6
+cachedsweep = .false.       ! the cached grid coefficients are only for x
+frozenright = .false.       ! the active region is only for x
 radius = 1.0
 
 ! Now Loop over each column...
@@ -39,6 +41,7 @@ do k = 1, kmax
      v  (n) = zuz(i,j,k)
      w  (n) = zux(i,j,k)
      f  (n) = zfl(i,j,k)
+     sc (n,:) = zstate(i,j,k,nzhydro+1:nzhydro+nzscalar)
 
      xa (n) = zya(j)
      dx (n) = zdy(j)
@@ -46,7 +49,7 @@ do k = 1, kmax
      dx0(n) = zdy(j)
 
      p  (n) = max(smallp,p(n))
-     e  (n) = p(n)/(r(n)*gamm)+0.5*(u(n)**2+v(n)**2+w(n)**2)
+     if (isothermal == 0) e(n) = p(n)/(r(n)*gamm)+0.5*(u(n)**2+v(n)**2+w(n)**2)
    enddo
 
    ! Perform 1D hydrodynamic update using PPMLR algorithm
@@ -62,6 +65,7 @@ do k = 1, kmax
       zuz(i,j,k) = v(n)
       zux(i,j,k) = w(n)
       zfl(i,j,k) = f(n)
+      zstate(i,j,k,nzhydro+1:nzhydro+nzscalar) = sc(n,:)
    enddo
 
  enddo
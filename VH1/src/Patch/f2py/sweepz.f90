@@ -21,6 +21,8 @@ nleft  = nleftz
 nright = nrightz
 nmin   = 7
 nmax   = kmax + 6
+cachedsweep = .false.       ! the cached grid coefficients are only for x
+frozenright = .false.       ! the active region is only for x
 
 ! Now Loop over each row...
 
@@ -41,6 +43,7 @@ do j = 1, jmax
      v  (n) = zux(i,j,k)
      w  (n) = zuy(i,j,k)
      f  (n) = zfl(i,j,k)
+     sc (n,:) = zstate(i,j,k,nzhydro+1:nzhydro+nzscalar)
 
      xa (n) = zza(k)
      dx (n) = zdz(k)
@@ -48,7 +51,7 @@ do j = 1, jmax
      dx0(n) = zdz(k)
 
      p  (n) = max(smallp,p(n))
-     e  (n) = p(n)/(r(n)*gamm)+0.5*(u(n)**2+v(n)**2+w(n)**2)
+     if (isothermal == 0) e(n) = p(n)/(r(n)*gamm)+0.5*(u(n)**2+v(n)**2+w(n)**2)
    enddo
 
    ! Perform 1D hydrodynamic update using PPMLR algorithm
@@ -63,6 +66,7 @@ do j = 1, jmax
      zux(i,j,k) = v(n)
      zuy(i,j,k) = w(n)
      zfl(i,j,k) = f(n)
+     zstate(i,j,k,nzhydro+1:nzhydro+nzscalar) = sc(n,:)
    enddo
 
  enddo
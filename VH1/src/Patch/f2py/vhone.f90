@@ -13,6 +13,10 @@ implicit none
 ! Calculate this every timestep for use by the code at large
 !real(kind=8), dimension(maxsweep) :: vols
 
+! Flows out of the grid summed over the steps in advance (code units)
+! Volume, mass, momentum, kinetic energy and P*volume
+real(kind=8) :: outvol = 0d0, outmass = 0d0, outmom = 0d0, outke = 0d0, outpdv = 0d0
+
 ! Dimensions of grid in x, y and z dimensions
 !f2py INTEGER :: imax, jmax, kmax   ! Memory dimensions
 
@@ -20,30 +24,60 @@ implicit none
 !f2py INTEGER :: ngeomx, ngeomy, ngeomz       ! XYZ Geometry flag
 !f2py INTEGER :: nleftx, nlefty, nleftz       ! XYZ Lower Boundary Condition
 !f2py INTEGER :: nrightx,nrighty,nrightz      ! XYZ Upper Boundary Condition
-! This should be large enough... (shouldn't need to change it, probably...)
-!f2py   integer,parameter :: maxsweep=1048588
+! Length of the 1D sweep arrays, set in setup to max(imax,jmax,kmax)+13
+!f2py   integer :: maxsweep
 ! fluid variables
-!f2py   real(kind=8), dimension(maxsweep) :: r, p, e, q, u, v, w
+!f2py   real(kind=8), allocatable, dimension(:) :: r, p, e, q, u, v, w
 ! coordinate values 
 !f2py REAL(kind=8), ALLOCATABLE,DIMENSION(:) :: zxa, zdx, zxc
 !f2py REAL(kind=8), ALLOCATABLE,DIMENSION(:) :: zya, zdy, zyc
 !f2py REAL(kind=8), ALLOCATABLE,DIMENSION(:) :: zza, zdz, zzc
-!f2py REAL(kind=8), ALLOCATABLE,DIMENSION(:,:,:) :: zro
-!f2py REAL(kind=8), ALLOCATABLE,DIMENSION(:,:,:) :: zpr
-!f2py REAL(kind=8), ALLOCATABLE,DIMENSION(:,:,:) :: zux
-!f2py REAL(kind=8), ALLOCATABLE,DIMENSION(:,:,:) :: zuy
-!f2py REAL(kind=8), ALLOCATABLE,DIMENSION(:,:,:) :: zuz
-!f2py REAL(kind=8), ALLOCATABLE,DIMENSION(:,:,:) :: zfl
-!f2py REAL(kind=8), ALLOCATABLE,DIMENSION(:,:,:) :: zgr
+! zone state, in double or single precision (rs, see statekind.f90 and the statekind .f2py_f2cmap files)
+! One block holding zro, zpr, zux, zuy, zuz, zfl, zgr and then nzextra fields for Python (see zonemod.f90)
+!f2py integer :: nzextra, nzscalar
+!f2py REAL(kind=rs), ALLOCATABLE,DIMENSION(:,:,:,:) :: zstate
  
 !f2py   real(kind=8) :: xmin, xmax, ymin, ymax, zmin, zmax
+! x grid spacing: = 0 : uniform, = 1 : logarithmic with innermost zone width dxmin
+!f2py   integer :: xgrid
+!f2py   real(kind=8) :: dxmin
 !f2py   real(kind=8) :: time, dt, timem, timep, svel, vdtext 
 !f2py   real(kind=8) :: gam
+! Timestep fraction of the Courant limit, and the largest factor the timestep can grow by in a step
+!f2py   real(kind=8) :: courant, dtgrowth
+! Timestep constraints from the last step and steps limited by each since reset (see dtcon.f90)
+!f2py   real(kind=8) :: dthydro, dtext, dtgrown
+!f2py   integer :: dtlimiter
+!f2py   integer, dimension(4) :: dtlimitcount
+! Zones where the remap put the density or pressure up to its floor since reset
+!f2py   integer :: nfloor
+! Set when the hydro can't go on: = 0 : no error, = 1 : the timestep has collapsed (see dtcon.f90)
+!                                  = 2 : setup couldn't make the logarithmic grid (see loggrid)
+!f2py   integer :: errorcode
+! Batched models, one per j row (see batch.f90)
+!f2py   integer :: batchmode
+!f2py REAL(kind=8), ALLOCATABLE,DIMENSION(:) :: rowtime, rowdt, rowvdtext, rowmdot, rowlum
+! Smallest single row to split the cell loops over OpenMP threads
+!f2py   integer :: ompmincells
+! Riemann solver: = 0 : iterated two-shock, = 1 : single pass two-shock, = 2 : HLLC (see riemann.f90)
+!f2py   integer :: riemannsolver
+! Equation of state: = 0 : adiabatic, = 1 : isothermal with a sound speed carried by each zone
+!f2py   integer :: isothermal
+! Reuse the grid coefficients cached at setup in x sweeps (= 1) or recompute them every sweep (= 0)
+!f2py   integer :: gridcache
+! Active region: only zones 1 to iactive are swept (see active.f90)
+!f2py   integer :: activeregion, activebuffer, iactive
+!f2py   real(kind=8) :: activetol
+! 1D spherical fast path (= 1) with the state in 1D arrays, zone i at element i+6 (see sweep1d.f90)
+!f2py   integer :: fast1d
+! Its state is one block in the same order as zstate, with zone i at element i+6
+!f2py REAL(kind=8), ALLOCATABLE,DIMENSION(:,:) :: state1d
 
 contains
 
 subroutine setup
   implicit none
+  errorcode = 0
   call init
 
 end subroutine setup
@@ -55,12 +89,81 @@ subroutine reset
 end subroutine reset
 
 ! A single hydro step
+! The grid is left as it was if the timestep has collapsed (errorcode = 1)
 subroutine step
   implicit none
-  REAL(kind=8) :: olddt
   
+  errorcode = 0
   call dtcon   ! Check constraints on the timestep
+  if (errorcode /= 0) return
+  dtlimitcount(dtlimiter) = dtlimitcount(dtlimiter) + 1
+
+  call dosweeps
+
+end subroutine step
+
+! Run up to nsteps hydro steps without returning to Python
+! Stops early once time reaches tend; the last step is shortened to land on tend
+! Flows through the outer edge of the grid are added to outvol, outmass, etc
+! Stops with errorcode = 1 if the timestep collapses, leaving the grid as it was after the last step
+subroutine advance(nsteps, tend, nstepsdone)
+  implicit none
+  integer, intent(in) :: nsteps
+  real(kind=8), intent(in) :: tend
+  integer, intent(out) :: nstepsdone
+  logical :: landed
+
+  errorcode = 0
+  nstepsdone = 0
+  do while (nstepsdone < nsteps .and. time < tend)
+    call dtcon
+    if (errorcode /= 0) exit
+
+    landed = (time + dt >= tend)
+    if (landed) then
+      dt = tend - time
+      dtlimiter = 4
+    endif
+    dtlimitcount(dtlimiter) = dtlimitcount(dtlimiter) + 1
 
+    call dosweeps
+    if (landed) time = tend
+
+    call trackoutflow
+    nstepsdone = nstepsdone + 1
+  enddo
+
+end subroutine advance
+
+! Advance each row of batched models (batchmode = 1) to tend with its own timestep
+! Stops early once nsteps steps have been taken, or if a row's timestep collapses (errorcode = 1)
+subroutine advancerows(nsteps, tend, nstepsdone)
+  implicit none
+  integer, intent(in) :: nsteps
+  real(kind=8), intent(in) :: tend
+  integer, intent(out) :: nstepsdone
+  REAL(kind=8) :: olddt
+
+  ! sweeprows sets dt for each row, so keep the grid's dt as it was
+  olddt = dt
+
+  errorcode = 0
+  nstepsdone = 0
+  do while (nstepsdone < nsteps .and. minval(rowtime) < tend)
+    call dtconrows(tend)
+    if (errorcode /= 0) exit
+    call sweeprows(tend)
+    nstepsdone = nstepsdone + 1
+  enddo
+  time = minval(rowtime)
+  dt = olddt
+
+end subroutine advancerows
+
+! Sweep the grid over the timestep dt set by dtcon and update the time
+subroutine dosweeps
+  implicit none
+  REAL(kind=8) :: olddt
 
   olddt  = dt
   svel   = 0.
@@ -69,7 +172,12 @@ subroutine step
 ! Alternate sweeps to approximate 2nd order operator splitting
 ! SAM GEEN - intending only to use sweepx but might as well keep this
 
+  ! The 1D fast path has its own x sweep on the 1D state arrays (see sweep1d.f90)
+  if (fast1d == 1) then
+                call sweep1d
+  else
                 call sweepx
+  endif
   if(ndim > 1)  call sweepy
   if(ndim == 3) call sweepz
 
@@ -77,6 +185,9 @@ subroutine step
   timep = timep + dt
   timem = timem + dt
 
+  ! Take in any zones the flow has reached
+  call findactive
+
   ! if(ndim == 3) call sweepz
   ! if(ndim > 1)  call sweepy 
   !               call sweepx
@@ -86,6 +197,76 @@ subroutine step
   ! timem = timem + dt
   dt = olddt
 
-end subroutine step
+end subroutine dosweeps
+
+! Add the flows through the outer edge of the last cell over the last step
+! Same as OutflowTracker.TrackForStep in Python, but in code units
+subroutine trackoutflow
+  implicit none
+  REAL(kind=8) :: rho, pres, vel, vout, area, flowvol
+
+  call zonestate(imax, rho, pres, vel)
+
+  ! Don't include any likely spurious inflows
+  vout = max(0d0, vel)
+  area = 4d0 * pi * (zxa(imax) + 0.5d0*zdx(imax))**2
+  flowvol = vout * area * dt
+
+  outvol  = outvol  + flowvol
+  outmass = outmass + rho * flowvol
+  outmom  = outmom  + rho * vout * flowvol
+  outke   = outke   + 0.5d0 * rho * vout**2 * flowvol
+  outpdv  = outpdv  + pres * flowvol
+
+end subroutine trackoutflow
+
+! Switch the active region on (active = 1) or off (active = 0) for a single 1D grid
+! Set activebuffer and activetol before switching it on
+subroutine setactive(active)
+  implicit none
+  integer, intent(in) :: active
+
+  if (active == 1) then
+    call initactive
+  else
+    call stopactive
+  endif
+
+end subroutine setactive
+
+! Make the active region reach activebuffer zones past zone idisturbed
+! Used for physics outside the hydro that can disturb the gas further out, e.g. photoionisation
+subroutine extendactive(idisturbed)
+  implicit none
+  integer, intent(in) :: idisturbed
+
+  if (activeregion == 1) call growactive(idisturbed)
+
+end subroutine extendactive
+
+! Set the number of OpenMP threads used by the hydro
+! Does nothing if VH1 was built without OpenMP
+subroutine setthreads(nthreads)
+  !$ use omp_lib
+  implicit none
+  integer, intent(in) :: nthreads
+
+  !$ call omp_set_num_threads(max(nthreads,1))
+
+end subroutine setthreads
+
+! Get the number of OpenMP threads used by the hydro
+! openmp = 0 and nthreads = 1 if VH1 was built without OpenMP
+subroutine getthreads(nthreads, openmp)
+  !$ use omp_lib
+  implicit none
+  integer, intent(out) :: nthreads, openmp
+
+  nthreads = 1
+  openmp = 0
+  !$ nthreads = omp_get_max_threads()
+  !$ openmp = 1
+
+end subroutine getthreads
 
 end module data
@@ -2,25 +2,64 @@ module zone
 !=======================================================================
 ! (formerly zone.h) global (3D) data arrays
 !======================================================================= 
+
+ use statekind
  
  INTEGER :: imax=1000, jmax=1, kmax=1   ! Memory dimensions
 
+ ! The state of all the zones is one contiguous block, one field after another, so that it
+ ! can be copied or shared in one piece. zro, zpr, ... point at the fields in it
+ ! Fields after the first nzhydro are kept for the caller (e.g. Python) and not used by VH1
+ INTEGER, PARAMETER :: nzhydro = 7      ! zro, zpr, zux, zuy, zuz, zfl, zgr, in that order
+ INTEGER :: nzextra = 0                 ! number of extra fields, set before setup
+ INTEGER :: nzscalar = 0                ! the first nzscalar extra fields are passive scalars,
+                                        ! advected with the mass in the sweeps (see scalars.f90)
+
+ ! DIMENSION (imax,jmax,kmax,nzhydro+nzextra)
+ ! The state can be single precision, see statekind.f90
+ REAL(kind=rs), ALLOCATABLE,TARGET,DIMENSION(:,:,:,:) :: zstate
  ! DIMENSION (imax,jmax,kmax)
- REAL(kind=8), ALLOCATABLE,DIMENSION(:,:,:) :: zro
- REAL(kind=8), ALLOCATABLE,DIMENSION(:,:,:) :: zpr
- REAL(kind=8), ALLOCATABLE,DIMENSION(:,:,:) :: zux
- REAL(kind=8), ALLOCATABLE,DIMENSION(:,:,:) :: zuy
- REAL(kind=8), ALLOCATABLE,DIMENSION(:,:,:) :: zuz
- REAL(kind=8), ALLOCATABLE,DIMENSION(:,:,:) :: zfl
- REAL(kind=8), ALLOCATABLE,DIMENSION(:,:,:) :: zgr
+ REAL(kind=rs), POINTER,CONTIGUOUS,DIMENSION(:,:,:) :: zro => null()
+ REAL(kind=rs), POINTER,CONTIGUOUS,DIMENSION(:,:,:) :: zpr => null()
+ REAL(kind=rs), POINTER,CONTIGUOUS,DIMENSION(:,:,:) :: zux => null()
+ REAL(kind=rs), POINTER,CONTIGUOUS,DIMENSION(:,:,:) :: zuy => null()
+ REAL(kind=rs), POINTER,CONTIGUOUS,DIMENSION(:,:,:) :: zuz => null()
+ REAL(kind=rs), POINTER,CONTIGUOUS,DIMENSION(:,:,:) :: zfl => null()
+ REAL(kind=rs), POINTER,CONTIGUOUS,DIMENSION(:,:,:) :: zgr => null()
  
  ! DIMENSION imax, jmax, kmax respectively
  REAL(kind=8), ALLOCATABLE,DIMENSION(:) :: zxa, zdx, zxc
  REAL(kind=8), ALLOCATABLE,DIMENSION(:) :: zya, zdy, zyc
  REAL(kind=8), ALLOCATABLE,DIMENSION(:) :: zza, zdz, zzc
 
+ ! DIMENSION jmax - time, timestep, Courant limiter and wind of each row
+ ! Only used for batched models (batchmode = 1), see batch.f90
+ REAL(kind=8), ALLOCATABLE,DIMENSION(:) :: rowtime, rowdt, rowvdtext, rowmdot, rowlum
+
+ ! Active region of a single 1D grid, see active.f90
+ ! Only zones 1 to iactive are swept, zones outside it are frozen until a disturbance reaches them
+ INTEGER :: activeregion = 0             ! = 1 : restrict the x sweeps and dtcon to the active region
+ INTEGER :: activebuffer = 20            ! zones kept active beyond the outermost disturbed zone
+ INTEGER :: iactive = 0                  ! last active zone (= imax once the whole grid is active)
+ REAL(kind=8) :: activetol = 1d-6        ! relative change from the background that counts as disturbed
+ ! DIMENSION imax - density and pressure of the background when the active region was started
+ REAL(kind=8), ALLOCATABLE,DIMENSION(:) :: bgro, bgpr
+
+ ! 1D spherical fast path of a single 1D grid, see sweep1d.f90
+ ! The state is kept in 1D arrays with the ghost zones in place instead of zro, zpr, zux, zfl, zgr
+ ! As with zstate, they point at the fields of one block, state1d, in the same order (uy, uz unused)
+ INTEGER :: fast1d = 0                   ! = 1 : use the 1D arrays and sweep1d instead of sweepx
+ ! DIMENSION (imax+13,nzhydro+nzextra) - zone i is element i+6, as in the sweep arrays
+ REAL(kind=8), ALLOCATABLE,TARGET,DIMENSION(:,:) :: state1d
+ ! DIMENSION imax+13
+ REAL(kind=8), POINTER,CONTIGUOUS,DIMENSION(:) :: ro1d => null(), pr1d => null(), ux1d => null()
+ REAL(kind=8), POINTER,CONTIGUOUS,DIMENSION(:) :: fl1d => null(), gr1d => null()
+ REAL(kind=8), ALLOCATABLE,DIMENSION(:) :: xa1d, dx1d    ! Eulerian zone edges and widths
+
  ! Used only in setup
  REAL(kind=8) :: xmin, xmax, ymin, ymax, zmin, zmax
+ INTEGER :: xgrid = 0                    ! x grid spacing: = 0 : uniform, = 1 : logarithmic (see loggrid)
+ REAL(kind=8) :: dxmin = 0d0             ! width of the innermost zone of a logarithmic x grid
  
  INTEGER :: ngeomx, ngeomy, ngeomz       ! XYZ Geometry flag
  INTEGER :: nleftx, nlefty, nleftz       ! XYZ Lower Boundary Condition
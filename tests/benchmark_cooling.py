@@ -0,0 +1,76 @@
+"""
+Benchmark the cooling solver with the rates looked up in tables against
+the rates worked out in every substep (see cooling.rates), and the exact
+integration of hot gas against the substeps (see cooling.solver), and
+substepping the cells in batches against one cell at a time (see calc_temp_batch)
+Solves the cooling of random cells over a range of timesteps, printing the
+number of cells solved per second and how far the tables are from the analytic rates
+
+@author: samgeen
+"""
+
+import time
+
+# Import numpy and weltgeist
+import numpy as np
+import weltgeist
+import weltgeist.units as wunits # make this easier to type
+from weltgeist import cooling_module
+
+def random_cells(ncells, seed=1):
+    # Cells from diffuse to dense gas, cold to hot, at a range of metallicities
+    rng = np.random.default_rng(seed)
+    nH = 10.0**rng.uniform(-3.0, 6.0, ncells)
+    T = 10.0**rng.uniform(1.0, 8.0, ncells)
+    Z = rng.uniform(0.1, 2.0, ncells)
+    return nH, T, Z
+
+def solve(rates, nH, T, Z, dt, gamma=5.0/3.0, solver="subcycle"):
+    # Time the solver with the rates found one way, taking the best of a few runs
+    cooling_module.cooling_tables.usetable = int(rates == "table")
+    cooling_module.cooling_exact.useexact = int(solver == "exact")
+    runtimes = []
+    for i in range(3):
+        start = time.perf_counter()
+        dT = cooling_module.solve_cooling_frig(nH, T, Z, dt, gamma)
+        runtimes.append(time.perf_counter() - start)
+    return T + dT, len(T)/min(runtimes)
+
+def run_benchmark(ncells=100000):
+    nH, T, Z = random_cells(ncells)
+    # Build the tables first so that building them isn't timed
+    solve("table", nH[0:1], T[0:1], Z[0:1], 1.0)
+    print("   dt / yr   analytic cells/s   table cells/s   median diff   99% diff")
+    for dt in [1e2, 1e4, 1e6]:
+        Tanalytic, rateanalytic = solve("analytic", nH, T, Z, dt*wunits.year)
+        Ttable, ratetable = solve("table", nH, T, Z, dt*wunits.year)
+        diff = np.abs(Ttable/Tanalytic - 1.0)
+        diff = diff[np.isfinite(diff)]
+        print("%10.0e %18.3g %15.3g %12.2e%% %9.2e%%" % (dt, rateanalytic, ratetable,
+              100.0*np.median(diff), 100.0*np.percentile(diff, 99)))
+    # Hot gas, e.g. in a wind bubble or the shell around it
+    hot = T > 1e5
+    print("Gas hotter than 1e5 K:")
+    print("   dt / yr   subcycle cells/s   exact cells/s   median diff   99% diff")
+    for dt in [1e2, 1e4, 1e6]:
+        Tsubcycle, ratesubcycle = solve("table", nH[hot], T[hot], Z[hot], dt*wunits.year)
+        Texact, rateexact = solve("table", nH[hot], T[hot], Z[hot], dt*wunits.year, solver="exact")
+        diff = np.abs(Texact/Tsubcycle - 1.0)
+        diff = diff[np.isfinite(diff)]
+        print("%10.0e %18.3g %15.3g %12.2e%% %9.2e%%" % (dt, ratesubcycle, rateexact,
+              100.0*np.median(diff), 100.0*np.percentile(diff, 99)))
+    # Substepping in batches gives the same temperatures, so only the speed is shown
+    print("All the gas:")
+    print("   dt / yr   one at a time cells/s   batches cells/s")
+    for dt in [1e2, 1e4, 1e6]:
+        cooling_module.cooling_batch.usebatch = 0
+        Tcell, ratecell = solve("table", nH, T, Z, dt*wunits.year)
+        cooling_module.cooling_batch.usebatch = 1
+        Tbatch, ratebatch = solve("table", nH, T, Z, dt*wunits.year)
+        print("%10.0e %23.3g %17.3g" % (dt, ratecell, ratebatch))
+    cooling_module.cooling_tables.usetable = int(weltgeist.cooling.rates == "table")
+    cooling_module.cooling_exact.useexact = int(weltgeist.cooling.solver == "exact")
+
+# This piece of code runs if you start this module versus importing it
+if __name__=="__main__":
+    run_benchmark()
@@ -0,0 +1,56 @@
+"""
+Benchmark the hydro step with and without the grid coefficients cached at setup
+(paraset and the zone volumes on the Eulerian grid)
+Prints the time per step for a few grid sizes and checks the results are identical
+
+@author: samgeen
+"""
+
+import time
+
+# Import numpy and weltgeist
+import numpy as np
+import weltgeist
+import weltgeist.units as wunits # make this easier to type
+
+def run_blast(ncells, nsteps, gridcache):
+    # Simple adiabatic blast wave run inside VH1 with Advance
+    weltgeist.hydro.vh1().gridcache = gridcache
+    integrator = weltgeist.integrator.Integrator()
+    integrator.Setup(ncells = ncells,
+            rmax = 10.0*wunits.pc,
+            n0 = 100.0, # atoms / cm^-3
+            T0 = 10.0, # K
+            gamma = 5.0/3.0)
+    weltgeist.cooling.cooling_on = False
+    weltgeist.gravity.gravity_on = False
+    weltgeist.radiation.radiation_on = False
+    integrator.hydro.TE[0] = 1e51
+    start = time.perf_counter()
+    integrator.Advance(nsteps=nsteps)
+    tstep = (time.perf_counter() - start) / nsteps
+    P = integrator.hydro.P[0:ncells]
+    integrator.Reset()
+    weltgeist.hydro.vh1().gridcache = 1
+    return tstep, P
+
+def run_benchmark(ncellslist=[256,4096,65536], nsteps=200):
+    print("  ncells   recomputed (us/step)   cached (us/step)   saving")
+    for ncells in ncellslist:
+        # Take the best of a few runs to reduce noise
+        trecompute = []
+        tcached = []
+        for i in range(3):
+            t, Precompute = run_blast(ncells, nsteps, 0)
+            trecompute.append(t)
+            t, Pcached = run_blast(ncells, nsteps, 1)
+            tcached.append(t)
+        assert np.all(Pcached == Precompute)
+        trecompute = min(trecompute)
+        tcached = min(tcached)
+        print("%8d %22.1f %18.1f %7.1f%%" % (ncells, trecompute*1e6, tcached*1e6,
+                                           100.0*(1.0 - tcached/trecompute)))
+
+# This piece of code runs if you start this module versus importing it
+if __name__=="__main__":
+    run_benchmark()
@@ -0,0 +1,65 @@
+"""
+Benchmark the Riemann solvers in the hydro (see Integrator.SetRiemannSolver)
+Runs a Sedov-Taylor blast wave and a Weaver wind bubble with each solver,
+printing the error in the shock radius against the analytic solution and the
+number of cell updates per second
+
+@author: samgeen
+"""
+
+import time
+
+# Import numpy and weltgeist
+import numpy as np
+import weltgeist
+import weltgeist.units as wunits # make this easier to type
+
+def run_problem(problem, solver, ncells):
+    # Adiabatic blast wave or wind bubble in a uniform, static cloud
+    n0 = 100.0 # atoms / cm^-3
+    rho0 = n0*wunits.mH/wunits.X
+    integrator = weltgeist.integrator.Integrator()
+    integrator.Setup(ncells = ncells,
+            rmax = 10.0*wunits.pc,
+            n0 = n0,
+            T0 = 10.0, # K
+            gamma = 5.0/3.0)
+    integrator.SetRiemannSolver(solver)
+    weltgeist.cooling.cooling_on = False
+    weltgeist.gravity.gravity_on = False
+    weltgeist.radiation.radiation_on = False
+    if problem == "sedov":
+        energy = 1e51 # erg
+        tend = 1e4*wunits.year
+        integrator.hydro.TE[0] = energy
+    else:
+        lum = 1e36 # erg/s
+        ml = 1e22 # g/s
+        tend = 1e5*wunits.year
+        weltgeist.sources.Sources().MakeWind(lum, ml)
+    start = time.perf_counter()
+    nsteps = integrator.Advance(tend=tend)
+    runtime = time.perf_counter() - start
+    rshock = weltgeist.regrid.ShockRadius(1e-3)
+    integrator.Reset()
+    integrator.SetRiemannSolver("exact")
+    if problem == "sedov":
+        ranalytic = weltgeist.analyticsolutions.SedovTaylorSolution(tend, energy, rho0)
+    else:
+        ranalytic = weltgeist.analyticsolutions.AdiabaticWind(lum, ml, n0, tend)
+    return rshock/ranalytic - 1.0, nsteps*ncells/runtime
+
+def run_benchmark(ncells=512):
+    print("  problem    solver   shock radius error   cell updates/s")
+    for problem in ["sedov", "weaver"]:
+        for solver in ["exact", "twoshock", "hllc"]:
+            # Take the best of a few runs to reduce noise
+            rates = []
+            for i in range(3):
+                error, rate = run_problem(problem, solver, ncells)
+                rates.append(rate)
+            print("%9s %9s %19.2f%% %16.3g" % (problem, solver, 100.0*error, max(rates)))
+
+# This piece of code runs if you start this module versus importing it
+if __name__=="__main__":
+    run_benchmark()
@@ -0,0 +1,89 @@
+"""
+Test only evolving the active region of the grid around a blast wave
+Checks that the result is the same as evolving the whole grid, and times both
+
+@author: samgeen
+"""
+
+# Import numpy and weltgeist
+import time
+import numpy as np
+import weltgeist
+import weltgeist.units as wunits # make this easier to type
+
+def run_blast(active, ncells, tend):
+    # Simple adiabatic blast wave in a big uniform box
+    integrator = weltgeist.integrator.Integrator()
+    integrator.Setup(ncells = ncells,
+            rmax = 100.0*wunits.pc,
+            n0 = 100.0, # atoms / cm^-3
+            T0 = 10.0, # K
+            gamma = 5.0/3.0)
+    weltgeist.cooling.cooling_on = False
+    weltgeist.gravity.gravity_on = False
+    weltgeist.radiation.radiation_on = False
+    integrator.hydro.TE[0] = 1e51
+    if active:
+        integrator.SetActiveRegion()
+    starttime = time.time()
+    nsteps = integrator.Advance(tend=tend)
+    runtime = time.time() - starttime
+    P = integrator.hydro.P[0:ncells]
+    nactive = integrator.hydro.nactive
+    integrator.Reset()
+    return P, nactive, nsteps, runtime
+
+def run_radiation(active, ncells, QH):
+    # Photoionise a big uniform box in one step, where the front goes far past the active region
+    integrator = weltgeist.integrator.Integrator()
+    integrator.Setup(ncells = ncells,
+            rmax = 20.0*wunits.pc,
+            n0 = 1.0, # atoms / cm^-3
+            T0 = 10.0, # K
+            gamma = 5.0/3.0)
+    weltgeist.cooling.cooling_on = False
+    weltgeist.gravity.gravity_on = False
+    weltgeist.radiation.radiation_on = True
+    if active:
+        integrator.SetActiveRegion(True, buffer=20)
+    weltgeist.sources.Sources().MakeSimpleRadiation(QH)
+    integrator.Step()
+    xhii = integrator.hydro.xhii[0:ncells]
+    nactive = integrator.hydro.nactive
+    integrator.Reset()
+    weltgeist.radiation.radiation_on = False
+    return xhii, nactive
+
+def run_test(ncells=8192):
+    # The active region grows to the ionisation front in one go, however far it is
+    # Photons leaving the grid make the whole grid active
+    xhii, nactive = run_radiation(True, 100000, 1e50)
+    assert nactive == 100000
+    assert np.all(xhii == 1.0)
+    # A front inside the grid is ionised the same as without the active region
+    xhiiall, nall = run_radiation(False, 100000, 1e46)
+    xhiiact, nact = run_radiation(True, 100000, 1e46)
+    front = np.where(xhiiall < 1.0)[0][0]
+    print("Ionisation front in cell", front, ", active cells", nact, "of", nall)
+    assert front < nact < nall
+    assert np.array_equal(xhiiact[0:nact], xhiiall[0:nact])
+
+
+    tend = 1e3*wunits.year
+    Pall, nall, nstepsall, timeall = run_blast(False, ncells, tend)
+    Pact, nact, nstepsact, timeact = run_blast(True, ncells, tend)
+    print("Active cells at the end:", nact, "of", ncells)
+    print("Time per step for the whole grid, active region:",
+          timeall/nstepsall, timeact/nstepsact, "s")
+    diff = np.max(np.abs(Pact - Pall)/Pall)
+    print("Maximum relative difference in pressure:", diff)
+    assert nact < ncells
+    assert nstepsact == nstepsall
+    assert diff < 1e-5
+    # The shock should be well inside the active region
+    shocked = np.where(Pall > 2.0*Pall[-1])[0]
+    assert shocked[-1] < nact
+
+# This piece of code runs if you start this module versus importing it
+if __name__=="__main__":
+    run_test()
@@ -0,0 +1,57 @@
+"""
+Test running many steps inside VH1 with Integrator.Advance
+Checks that the result is the same as calling Step() in a loop
+
+@author: samgeen
+"""
+
+# Import numpy and weltgeist
+import numpy as np
+import weltgeist
+import weltgeist.units as wunits # make this easier to type
+
+def setup_blast(ncells):
+    # Simple adiabatic blast wave with nothing else running in Python
+    integrator = weltgeist.integrator.Integrator()
+    integrator.Setup(ncells = ncells,
+            rmax = 10.0*wunits.pc,
+            n0 = 100.0, # atoms / cm^-3
+            T0 = 10.0, # K
+            gamma = 5.0/3.0)
+    weltgeist.cooling.cooling_on = False
+    weltgeist.gravity.gravity_on = False
+    weltgeist.radiation.radiation_on = False
+    integrator.hydro.TE[0] = 1e51
+    return integrator
+
+def run_test(ncells=128,nsteps=1000):
+    # Run with a Python loop over Step()
+    integrator = setup_blast(ncells)
+    for i in range(nsteps):
+        integrator.Step()
+    stepTime = integrator.time
+    stepP = integrator.hydro.P[0:ncells]
+    integrator.Reset()
+
+    # Run the same number of steps inside VH1
+    integrator = setup_blast(ncells)
+    nstepsdone = integrator.Advance(nsteps=nsteps)
+    print("Steps run by Advance:", nstepsdone)
+    print("Time after Step() loop and Advance:", stepTime, integrator.time)
+    print("Maximum relative difference in pressure:",
+          np.max(np.abs(integrator.hydro.P[0:ncells] - stepP)/stepP))
+    assert nstepsdone == nsteps
+    assert integrator.time == stepTime
+    integrator.Reset()
+
+    # Advance should land exactly on the end time
+    integrator = setup_blast(ncells)
+    tend = 1e4*wunits.year
+    integrator.Advance(tend=tend)
+    print("Target end time and time reached:", tend, integrator.time)
+    assert np.isclose(integrator.time, tend, rtol=1e-12)
+    integrator.Reset()
+
+# This piece of code runs if you start this module versus importing it
+if __name__=="__main__":
+    run_test()
@@ -0,0 +1,57 @@
+"""
+Test substepping the cooling of many cells together in batches (cooling_batch.usebatch = 1)
+Checks the temperatures are the same as substepping one cell at a time
+for each cooling solver and way of finding the rates, and any size of batch
+
+@author: samgeen
+"""
+
+# Import numpy and weltgeist
+import time
+import numpy as np
+import weltgeist
+import weltgeist.units as wunits # make this easier to type
+from weltgeist import cooling_module
+
+def run_cells(usebatch, nH, T, Z, dt, ncellbatch=128):
+    cooling_module.cooling_batch.usebatch = usebatch
+    cooling_module.cooling_batch.ncellbatch = ncellbatch
+    starttime = time.time()
+    dT = cooling_module.solve_cooling_frig(nH, T, Z, dt, 5.0/3.0)
+    return dT, time.time() - starttime
+
+def run_test():
+    rng = np.random.default_rng(3)
+    ncells = 20000
+    nH = 10.0**rng.uniform(-3.0, 6.0, ncells)
+    T = 10.0**rng.uniform(1.0, 8.0, ncells)
+    Z = rng.uniform(0.1, 2.0, ncells)
+    for usetable in [0, 1]:
+        for useexact in [0, 1]:
+            cooling_module.cooling_tables.usetable = usetable
+            cooling_module.cooling_exact.useexact = useexact
+            for dt in [1e2*wunits.year, 1e5*wunits.year]:
+                dTcell, celltime = run_cells(0, nH, T, Z, dt)
+                dTbatch, batchtime = run_cells(1, nH, T, Z, dt)
+                print("Tables", usetable, "exact", useexact, "dt", dt/wunits.year, "yr:",
+                      "time one at a time", celltime, "s, in batches", batchtime, "s")
+                # Every cell takes exactly the same substeps either way
+                assert np.array_equal(dTbatch, dTcell, equal_nan=True)
+    cooling_module.cooling_tables.usetable = 1
+    cooling_module.cooling_exact.useexact = 0
+
+    # Batches of one cell, batches that don't fit into the grid and one batch for every cell
+    dt = 1e4*wunits.year
+    dTcell, celltime = run_cells(0, nH[0:1000], T[0:1000], Z[0:1000], dt)
+    for ncellbatch in [1, 300, 5000]:
+        dTbatch, batchtime = run_cells(1, nH[0:1000], T[0:1000], Z[0:1000], dt, ncellbatch)
+        assert np.array_equal(dTbatch, dTcell)
+    cooling_module.cooling_batch.ncellbatch = 128
+
+    # Cells at zero temperature are put up to 10 K, as they are one at a time
+    dTbatch, batchtime = run_cells(1, nH[0:3], np.array([0.0, 100.0, 0.0]), Z[0:3], dt)
+    assert dTbatch[0] == 10.0 and dTbatch[2] == 10.0
+
+# This piece of code runs if you start this module versus importing it
+if __name__=="__main__":
+    run_test()
@@ -0,0 +1,80 @@
+"""
+Test the exact integration of the cooling of hot gas (cooling.solver = "exact")
+Checks it against the analytic solution for a constant cooling function and
+against the substeps (cooling.solver = "subcycle") run with many short steps
+
+@author: samgeen
+"""
+
+# Import numpy and weltgeist
+import time
+import numpy as np
+import weltgeist
+import weltgeist.units as wunits # make this easier to type
+from weltgeist import cooling_module
+
+kB = 1.38062e-16 # value used by the cooling module
+
+def run_cells(solver, nH, T, Z, dt, nsteps=1, gamma=5.0/3.0):
+    cooling_module.cooling_exact.useexact = int(solver == "exact")
+    starttime = time.time()
+    for step in range(nsteps):
+        T = T + cooling_module.solve_cooling_frig(nH, T, Z, dt/nsteps, gamma)
+    return T, time.time() - starttime
+
+def run_test():
+    # The cooling function is flat for 10^4.9 K < T < 10^5.4 K,
+    #  so the temperature drops at a constant rate (gamma - 1) nH Lambda / kB
+    nH = np.array([1.0, 10.0])
+    dt = 1e9 # s
+    T, runtime = run_cells("exact", nH, np.array([2e5, 2e5]), np.ones(2), dt)
+    Tanalytic = 2e5 - (2.0/3.0)*nH*10.0**(-20.9125)/kB*dt
+    print("Flat cooling function:", T, "analytic", Tanalytic)
+    assert np.all(Tanalytic > 10.0**4.9)
+    assert np.allclose(T, Tanalytic, rtol=1e-9)
+
+    # Hot gas matches the substeps run with many short steps
+    rng = np.random.default_rng(2)
+    ncells = 2000
+    nH = 10.0**rng.uniform(-3.0, 4.0, ncells)
+    T = 10.0**rng.uniform(4.1, 8.5, ncells)
+    Z = rng.uniform(0.1, 2.0, ncells)
+    for dt in [1e2*wunits.year, 1e4*wunits.year]:
+        Treference, reftime = run_cells("subcycle", nH, T, Z, dt, nsteps=1000)
+        Tsubcycle, subcycletime = run_cells("subcycle", nH, T, Z, dt)
+        Texact, exacttime = run_cells("exact", nH, T, Z, dt)
+        # Compare the gas that stays hot (cooler gas is solved the same way in both)
+        hot = Treference > 1.2e4
+        errsubcycle = np.abs(Tsubcycle/Treference - 1.0)[hot]
+        errexact = np.abs(Texact/Treference - 1.0)[hot]
+        print("dt", dt/wunits.year, "yr: 99% error subcycle", np.percentile(errsubcycle, 99),
+              "exact", np.percentile(errexact, 99))
+        assert np.all(np.isfinite(Texact)) and np.all(Texact > 0.0)
+        assert np.percentile(errexact, 99) < 1e-2
+        assert np.percentile(errexact, 99) <= np.percentile(errsubcycle, 99)
+    cooling_module.cooling_exact.useexact = 0
+
+    # The solver can be picked for the gas on the grid, and only "subcycle" and "exact" are allowed
+    integrator = weltgeist.integrator.Integrator()
+    integrator.Setup(ncells = 64,
+            rmax = 10.0*wunits.pc,
+            n0 = 1.0, # atoms / cm^-3
+            T0 = 1e6, # K
+            gamma = 5.0/3.0)
+    weltgeist.cooling.cooling_on = True
+    weltgeist.cooling.solver = "exact"
+    integrator.Advance(nsteps=10)
+    assert np.all(integrator.hydro.T[0:64] < 1e6)
+    weltgeist.cooling.solver = "implicit"
+    try:
+        integrator.Step()
+        raise AssertionError("Expected a ValueError for cooling.solver = \"implicit\"")
+    except ValueError:
+        pass
+    integrator.Reset()
+    weltgeist.cooling.cooling_on = False
+    weltgeist.cooling.solver = "subcycle"
+
+# This piece of code runs if you start this module versus importing it
+if __name__=="__main__":
+    run_test()
@@ -0,0 +1,92 @@
+"""
+Test the policies for keeping the hydro up with fast cooling (Integrator.SetCoolingPolicy)
+Cools hot, dense, uniform gas on a coarse grid, where the hydro step is longer than
+the cooling time, limiting the step to the cooling time or subcycling the cooling
+
+@author: samgeen
+"""
+
+# Import numpy and weltgeist
+import numpy as np
+import weltgeist
+import weltgeist.units as wunits # make this easier to type
+from weltgeist import cooling_module
+
+kB = 1.38062e-16 # value used by the cooling module
+
+def run_cooling(policy, nsteps=10, n0=1000.0, T0=3e7):
+    integrator = weltgeist.integrator.Integrator()
+    integrator.Setup(ncells = 16,
+            rmax = 10.0*wunits.pc,
+            n0 = n0, # atoms / cm^-3
+            T0 = T0, # K
+            gamma = 5.0/3.0)
+    weltgeist.cooling.cooling_on = True
+    weltgeist.gravity.gravity_on = False
+    weltgeist.radiation.radiation_on = False
+    integrator.SetCoolingPolicy(policy)
+    hydro = integrator.hydro
+    # The cooling is solved over the last step at the start of each step
+    cooled = 0.0
+    steps = []
+    for step in range(nsteps):
+        dt = integrator.dt
+        integrator.Step()
+        cooled += dt
+        steps.append({"dt": dt, "tcoolmin": weltgeist.cooling.tcoolmin, "nsubcycles": weltgeist.cooling.nsubcycles})
+    T = hydro.T[5]
+    log = integrator.timestep.log
+    integrator.Reset()
+    weltgeist.cooling.cooling_on = False
+    # Cool the same gas on its own in many short steps
+    Treference = np.array([T0])
+    nreference = 10000
+    for step in range(nreference):
+        Treference += cooling_module.solve_cooling_frig(np.array([n0]), Treference, np.ones(1), cooled/nreference, 5.0/3.0)
+    return {"error": abs(T/Treference[0] - 1.0), "steps": steps, "log": log}
+
+def run_test():
+    # The cooling time of hot gas with a flat cooling function is 3/2 kB T / (nH Lambda)
+    integrator = weltgeist.integrator.Integrator()
+    integrator.Setup(ncells = 16,
+            rmax = 10.0*wunits.pc,
+            n0 = 10.0, # atoms / cm^-3
+            T0 = 2e5, # K
+            gamma = 5.0/3.0)
+    weltgeist.cooling.rates = "analytic"
+    tcool = weltgeist.cooling.CoolingTime()
+    weltgeist.cooling.rates = "table"
+    assert np.allclose(tcool, 1.5*kB*2e5/(10.0*10.0**(-20.9125)), rtol=1e-5)
+    # Gas that is heating up never cools
+    integrator.hydro.T[:] = 10.0
+    assert np.all(np.isinf(weltgeist.cooling.CoolingTime()))
+    integrator.Reset()
+
+    none = run_cooling("none")
+    limit = run_cooling("limit")
+    subcycle = run_cooling("subcycle")
+    print("Error in the temperature with no policy", none["error"], ", limit", limit["error"], ", subcycle", subcycle["error"])
+
+    # Limiting the step: every step is no longer than half the shortest cooling time
+    assert any(record["limiter"] == "cooling" for record in limit["log"])
+    for record in limit["log"]:
+        assert record["dt"] <= record["constraints"]["cooling"]*(1.0 + 1e-9)
+
+    # Subcycling: the cooling is split into subcycles no longer than half the shortest cooling time
+    assert max(step["nsubcycles"] for step in subcycle["steps"]) > 1
+    for step in subcycle["steps"]:
+        assert step["dt"]/step["nsubcycles"] <= 0.5*step["tcoolmin"]*(1.0 + 1e-9) or step["nsubcycles"] == 100
+    # ... which cools the gas more accurately than cooling it once each step
+    assert subcycle["error"] < none["error"]
+    assert subcycle["error"] < 1e-2
+
+    # Only the known policies are allowed
+    try:
+        integrator.SetCoolingPolicy("implicit")
+        raise AssertionError("Expected a ValueError for the \"implicit\" cooling policy")
+    except ValueError:
+        pass
+
+# This piece of code runs if you start this module versus importing it
+if __name__=="__main__":
+    run_test()
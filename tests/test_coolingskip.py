@@ -0,0 +1,72 @@
+"""
+Test skipping the cooling in cells it would barely change (cooling.skipCells)
+Runs a hot bubble in a background at its equilibrium temperature, and slowly cooling
+diffuse gas, with and without skipping cells, and checks they end up at the same temperatures
+
+@author: samgeen
+"""
+
+# Import numpy and weltgeist
+import numpy as np
+import weltgeist
+import weltgeist.units as wunits # make this easier to type
+from weltgeist import cooling_module
+
+def equilibrium_temperature(n0):
+    # Cool a cell on its own until it stops changing
+    T = np.array([10.0])
+    for step in range(200):
+        T += cooling_module.solve_cooling_frig(np.array([n0]), T, np.ones(1), 1e13, 5.0/3.0)
+    return T[0]
+
+def run_cooling(skip, n0, T0, Tbubble=None, nsteps=200):
+    integrator = weltgeist.integrator.Integrator()
+    integrator.Setup(ncells = 256,
+            rmax = 10.0*wunits.pc,
+            n0 = n0, # atoms / cm^-3
+            T0 = T0, # K
+            gamma = 5.0/3.0)
+    hydro = integrator.hydro
+    if Tbubble is not None:
+        hydro.T[0:10] = Tbubble
+    weltgeist.cooling.cooling_on = True
+    weltgeist.gravity.gravity_on = False
+    weltgeist.radiation.radiation_on = False
+    weltgeist.cooling.skipCells = skip
+    skipped = []
+    for step in range(nsteps):
+        integrator.Step()
+        skipped.append(integrator.coolingSkipped)
+    T = hydro.T[0:hydro.ncells]
+    integrator.Reset()
+    weltgeist.cooling.cooling_on = False
+    weltgeist.cooling.skipCells = False
+    return T, np.array(skipped)
+
+def run_test():
+    # A hot bubble in a background at its equilibrium temperature
+    # Only the cells the bubble reaches need cooling, the background is skipped
+    Teq = equilibrium_temperature(1.0)
+    Tnoskip, skippednone = run_cooling(False, 1.0, Teq, Tbubble=1e6)
+    Tskip, skipped = run_cooling(True, 1.0, Teq, Tbubble=1e6)
+    error = np.max(np.abs(Tskip/Tnoskip - 1.0))
+    print("Equilibrium background at", Teq, "K: largest error", error, 
+          ", cells skipped in the last step", skipped[-1], "of 255")
+    assert np.all(skippednone == 0)
+    assert skipped[-1] > 200
+    assert error < 1e-2
+
+    # Diffuse gas that cools slowly is skipped, but catches up when it is cooled,
+    #  so it is never more than about skipTolerance behind
+    Tnoskip, skippednone = run_cooling(False, 0.01, 1e6)
+    Tskip, skipped = run_cooling(True, 0.01, 1e6)
+    error = np.max(np.abs(Tskip/Tnoskip - 1.0))
+    cooled = 1.0 - np.mean(Tnoskip)/1e6
+    print("Slowly cooling gas: cooled by", cooled, ", largest error", error, 
+          ", steps with cells skipped", np.count_nonzero(skipped))
+    assert np.count_nonzero(skipped) > 0
+    assert error < 2.0*weltgeist.cooling.skipTolerance
+    assert cooled > 5.0*error
+
+if __name__=="__main__":
+    run_test()
@@ -0,0 +1,92 @@
+"""
+Test the cooling and heating rates looked up in tables (cooling.rates = "table")
+Checks the cooling of random cells and of gas on the grid against the rates
+worked out in every substep (cooling.rates = "analytic")
+
+@author: samgeen
+"""
+
+# Import numpy and weltgeist
+import time
+import numpy as np
+import weltgeist
+import weltgeist.units as wunits # make this easier to type
+from weltgeist import cooling_module
+
+def run_cells(rates, nH, T, Z, dt):
+    cooling_module.cooling_tables.usetable = int(rates == "table")
+    starttime = time.time()
+    dT = cooling_module.solve_cooling_frig(nH, T, Z, dt, 5.0/3.0)
+    return T + dT, time.time() - starttime
+
+def run_grid(rates, ncells=256, nsteps=50):
+    integrator = weltgeist.integrator.Integrator()
+    integrator.Setup(ncells = ncells,
+            rmax = 10.0*wunits.pc,
+            n0 = 100.0, # atoms / cm^-3
+            T0 = 10.0, # K
+            gamma = 5.0/3.0)
+    weltgeist.cooling.cooling_on = True
+    weltgeist.cooling.rates = rates
+    weltgeist.gravity.gravity_on = False
+    weltgeist.radiation.radiation_on = False
+    hydro = integrator.hydro
+    # Gas from cold and dense to hot and diffuse, cooling and heating
+    hydro.nH[0:ncells] = np.logspace(4, -2, ncells)
+    hydro.T[0:ncells] = np.logspace(1, 7, ncells)
+    hydro.Zsolar[0:ncells//2] = 0.3
+    integrator.Advance(nsteps=nsteps)
+    T = hydro.T[0:ncells]
+    integrator.Reset()
+    weltgeist.cooling.cooling_on = False
+    weltgeist.cooling.rates = "table"
+    return T
+
+def run_test():
+    rng = np.random.default_rng(1)
+    ncells = 100000
+    nH = 10.0**rng.uniform(-3.0, 6.0, ncells)
+    T = 10.0**rng.uniform(1.0, 8.0, ncells)
+    Z = rng.uniform(0.1, 2.0, ncells)
+    # Build the tables first
+    run_cells("table", nH[0:1], T[0:1], Z[0:1], 1.0)
+    for dt in [1e2*wunits.year, 1e4*wunits.year]:
+        Tanalytic, analytictime = run_cells("analytic", nH, T, Z, dt)
+        Ttable, tabletime = run_cells("table", nH, T, Z, dt)
+        diff = np.abs(Ttable/Tanalytic - 1.0)
+        print("dt", dt/wunits.year, "yr: median, 99% difference", np.median(diff[np.isfinite(diff)]),
+              np.percentile(diff[np.isfinite(diff)], 99))
+        print("Time analytic, table", analytictime, tabletime, "s")
+        # The tables never give bad temperatures
+        assert np.all(np.isfinite(Ttable)) and np.all(Ttable > 0.0)
+        # Nearly all the cells end up within a percent or so of the analytic rates
+        # (a few cells on the edge of thermal runaway go a different way)
+        assert np.median(diff[np.isfinite(diff)]) < 1e-3
+        assert np.percentile(diff[np.isfinite(diff)], 99) < 2e-2
+        assert tabletime < analytictime
+    cooling_module.cooling_tables.usetable = 1
+
+    # The gas on the grid cools the same way with either
+    Tanalytic = run_grid("analytic")
+    Ttable = run_grid("table")
+    diff = np.abs(Ttable/Tanalytic - 1.0)
+    print("Grid: largest difference", diff.max())
+    assert np.all(diff < 1e-2)
+
+    # Only "table" and "analytic" are allowed
+    integrator = weltgeist.integrator.Integrator()
+    integrator.Setup(ncells = 64)
+    weltgeist.cooling.cooling_on = True
+    weltgeist.cooling.rates = "fast"
+    try:
+        integrator.Step()
+        raise AssertionError("Expected a ValueError for cooling.rates = \"fast\"")
+    except ValueError:
+        pass
+    integrator.Reset()
+    weltgeist.cooling.cooling_on = False
+    weltgeist.cooling.rates = "table"
+
+# This piece of code runs if you start this module versus importing it
+if __name__=="__main__":
+    run_test()
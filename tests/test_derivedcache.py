@@ -0,0 +1,87 @@
+"""
+Test the cache of derived fields in hydro (e.g. T, mass)
+Checks that the cached fields follow the state of the gas as it is set and stepped,
+ and counts how often the cache is used in an HII region with radiation and cooling
+
+@author: samgeen
+"""
+
+# Import numpy and weltgeist
+import time
+import numpy as np
+import weltgeist
+import weltgeist.units as wunits # make this easier to type
+
+def check_derived(hydro):
+    # Compare the cached fields to their definitions
+    n = hydro.ncells
+    PThermal = hydro.P[0:n] - hydro.PMagnetic[0:n]
+    T = PThermal/hydro.nH[0:n]/wunits.kB/(1.0+hydro.xhii[0:n])
+    mass = hydro.vol*hydro.rho[0:n]
+    assert np.allclose(hydro.T[0:n], T, rtol=1e-14)
+    assert np.allclose(hydro.mass[0:n], mass, rtol=1e-14)
+    assert np.allclose(hydro.KE[0:n], 0.5*mass*hydro.vel[0:n]**2, rtol=1e-14)
+    assert np.allclose(hydro.TE[0:n], 1.5*PThermal*hydro.vol, rtol=1e-14)
+
+def run_test(ncells=512, nsteps=200):
+    integrator = weltgeist.integrator.Integrator()
+    integrator.Setup(ncells = ncells,
+            rmax = 10.0*wunits.pc,
+            n0 = 1000.0, # atoms / cm^-3
+            T0 = 10.0, # K
+            gamma = 5.0/3.0)
+    hydro = integrator.hydro
+
+    # Reading a field twice only computes it once
+    hits, misses = hydro.cachehits, hydro.cachemisses
+    T = hydro.T[:]
+    T = hydro.T[0:10]
+    assert hydro.cachemisses - misses == 2 # T and PThermal
+    assert hydro.cachehits - hits == 1
+    # Changing what is returned doesn't change the cache
+    T[:] = 0.0
+    assert np.all(hydro.T[0:10] > 0.0)
+
+    # Setting any of the fields the derived fields are made from clears them
+    hydro.rho[0:10] *= 2.0
+    check_derived(hydro)
+    hydro.xhii[0:10] = 1.0
+    check_derived(hydro)
+    hydro.T[5] = 1e4
+    assert np.isclose(hydro.T[5], 1e4, rtol=1e-14)
+    check_derived(hydro)
+    hydro.PMagnetic[0:ncells] = 1e-13
+    check_derived(hydro)
+    hydro.PMagnetic[0:ncells] = 0.0
+    hydro.raw.P[0:10] *= 2.0
+    hydro.InvalidateCache()
+    check_derived(hydro)
+    integrator.Reset()
+
+    # Run an HII region with radiation and cooling, which read T and nH many times each step
+    integrator.Setup(ncells = ncells,
+            rmax = 10.0*wunits.pc,
+            n0 = 1000.0, # atoms / cm^-3
+            T0 = 10.0, # K
+            gamma = 5.0/3.0)
+    hydro = integrator.hydro
+    weltgeist.sources.Sources().AddSource(weltgeist.sources.SimpleRadiationSource(1e49))
+    weltgeist.cooling.cooling_on = True
+    weltgeist.radiation.radiation_on = True
+    weltgeist.gravity.gravity_on = False
+    integrator.CourantLimiter(1e6)
+    starttime = time.time()
+    for step in range(nsteps):
+        integrator.Step()
+        check_derived(hydro)
+    runtime = time.time() - starttime
+    print("Time per step", runtime/nsteps, "s, cache hits", hydro.cachehits, "misses", hydro.cachemisses)
+    assert hydro.cachehits > 0
+    assert np.max(hydro.xhii[:]) == 1.0
+    weltgeist.cooling.cooling_on = False
+    weltgeist.radiation.radiation_on = False
+    integrator.Reset()
+
+# This piece of code runs if you start this module versus importing it
+if __name__=="__main__":
+    run_test()
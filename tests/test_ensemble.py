@@ -0,0 +1,59 @@
+"""
+Test running a batch of independent models with ensemble.BatchIntegrator
+Checks that each model matches the same model run with Integrator
+
+@author: samgeen
+"""
+
+# Import numpy and weltgeist
+import numpy as np
+import weltgeist
+import weltgeist.units as wunits # make this easier to type
+
+def run_test(ncells=128,nmodels=4):
+    tend = 1e4*wunits.year
+    energies = 1e51*np.arange(1,nmodels+1)
+
+    # Run each blast wave on its own
+    singleP = []
+    for energy in energies:
+        integrator = weltgeist.integrator.Integrator()
+        integrator.Setup(ncells = ncells,
+                rmax = 10.0*wunits.pc,
+                n0 = 100.0, # atoms / cm^-3
+                T0 = 10.0, # K
+                gamma = 5.0/3.0)
+        weltgeist.cooling.cooling_on = False
+        weltgeist.gravity.gravity_on = False
+        weltgeist.radiation.radiation_on = False
+        integrator.hydro.TE[0] = energy
+        integrator.Advance(tend=tend)
+        singleP.append(integrator.hydro.P[0:ncells])
+        integrator.Reset()
+
+    # Run all of them together
+    batch = weltgeist.ensemble.BatchIntegrator(nmodels,
+            ncells = ncells,
+            rmax = 10.0*wunits.pc,
+            n0 = 100.0, # atoms / cm^-3
+            T0 = 10.0, # K
+            gamma = 5.0/3.0)
+    # Thermal energy 3/2 P V in the first cell
+    x = batch.x
+    dx = x[1] - x[0]
+    vol0 = 4.0/3.0*np.pi*dx**3
+    for i, energy in enumerate(energies):
+        batch.P[i,0] = energy/(1.5*vol0)
+    nstepsdone = batch.Advance(tend)
+    print("Steps run by the slowest model:", nstepsdone)
+    print("Time reached by each model:", batch.time)
+    assert np.allclose(batch.time, tend, rtol=1e-12)
+    for i in range(nmodels):
+        diff = np.max(np.abs(batch.P[i,:] - singleP[i])/singleP[i])
+        print("Maximum relative difference in pressure for model",i,":",diff)
+        assert diff < 1e-10
+    batch.Reset()
+
+# This piece of code runs if you start this module versus importing it
+if __name__=="__main__":
+    run_test()
@@ -0,0 +1,70 @@
+"""
+Test growing the grid as a blast wave expands
+Checks that remapping conserves mass and energy, and that the shock
+follows the Sedov-Taylor solution as the grid grows
+
+@author: samgeen
+"""
+
+# Import numpy and weltgeist
+import numpy as np
+import weltgeist
+import weltgeist.units as wunits # make this easier to type
+
+def totals(hydro):
+    n = hydro.ncells
+    mass = np.sum(hydro.mass[0:n])
+    energy = np.sum(hydro.TE[0:n] + hydro.KE[0:n])
+    return mass, energy
+
+def run_test(ncells=256):
+    n0 = 100.0 # atoms / cm^-3
+    T0 = 10.0 # K
+    energy = 1e51 # erg
+    rmax = 1.0*wunits.pc
+    integrator = weltgeist.integrator.Integrator()
+    integrator.Setup(ncells = ncells,
+            rmax = rmax,
+            n0 = n0,
+            T0 = T0,
+            gamma = 5.0/3.0)
+    weltgeist.cooling.cooling_on = False
+    weltgeist.gravity.gravity_on = False
+    weltgeist.radiation.radiation_on = False
+    hydro = integrator.hydro
+    hydro.TE[0] = energy
+    integrator.Advance(nsteps=50)
+
+    # Remap by hand and check that the contents of the old grid are kept
+    mass, etot = totals(hydro)
+    time = integrator.time
+    rhobg = hydro.rho[ncells-1]
+    ebg = hydro.TE[ncells-1]/hydro.vol[ncells-1]
+    weltgeist.regrid.RemapGrid(ncells, 2.0*rmax)
+    addedvol = 4.0/3.0*np.pi*((2.0*rmax)**3 - rmax**3)
+    newmass, newetot = totals(hydro)
+    print("Relative change in mass, energy after remapping:",
+          (newmass - mass - rhobg*addedvol)/mass, (newetot - etot - ebg*addedvol)/etot)
+    assert np.isclose(newmass, mass + rhobg*addedvol, rtol=1e-12)
+    assert np.isclose(newetot, etot + ebg*addedvol, rtol=1e-12)
+    assert integrator.time == time
+    assert hydro.ncells == ncells
+    assert np.isclose(hydro.x[ncells-1] + hydro.dx[-1], 2.0*rmax, rtol=1e-12)
+
+    # Now let the grid grow by itself
+    integrator.SetExpandingGrid(fraction=0.8, factor=2.0)
+    tend = 1e4*wunits.year
+    integrator.Advance(tend=tend)
+    rmaxend = hydro.x[ncells-1] + hydro.dx[-1]
+    rshock = weltgeist.regrid.ShockRadius(1e-3)
+    rsedov = weltgeist.analyticsolutions.SedovTaylorSolution(tend, energy, n0*wunits.mH/wunits.X)
+    print("Grid size at the end:", rmaxend/wunits.pc, "pc")
+    print("Shock radius, Sedov-Taylor radius:", rshock/wunits.pc, rsedov/wunits.pc, "pc")
+    assert rmaxend > 4.0*rmax
+    assert rshock < 0.8*rmaxend
+    assert np.abs(rshock/rsedov - 1.0) < 0.1
+    integrator.Reset()
+
+# This piece of code runs if you start this module versus importing it
+if __name__=="__main__":
+    run_test()
@@ -0,0 +1,86 @@
+"""
+Test the 1D spherical fast path in VH1 (Integrator.Setup with fast1d=True)
+Checks that it gives the same result as the normal hydro, and times both
+
+@author: samgeen
+"""
+
+# Import numpy and weltgeist
+import time
+import numpy as np
+import weltgeist
+import weltgeist.units as wunits # make this easier to type
+
+def run_blast(fast1d, ncells, nsteps, active=False):
+    # Simple adiabatic blast wave
+    integrator = weltgeist.integrator.Integrator()
+    integrator.Setup(ncells = ncells,
+            rmax = 10.0*wunits.pc,
+            n0 = 100.0, # atoms / cm^-3
+            T0 = 10.0, # K
+            gamma = 5.0/3.0,
+            fast1d = fast1d)
+    weltgeist.cooling.cooling_on = False
+    weltgeist.gravity.gravity_on = False
+    weltgeist.radiation.radiation_on = False
+    integrator.hydro.TE[0] = 1e51
+    if active:
+        integrator.SetActiveRegion()
+    starttime = time.time()
+    integrator.Advance(nsteps=nsteps)
+    runtime = time.time() - starttime
+    P = integrator.hydro.P[0:ncells]
+    integrator.Reset()
+    return P, runtime/nsteps
+
+def run_cloud(fast1d, ncells):
+    # Wind and photoionisation in a cooling, self-gravitating cloud on a log grid
+    integrator = weltgeist.integrator.Integrator()
+    integrator.Setup(ncells = ncells,
+            rmax = 10.0*wunits.pc,
+            n0 = 1000.0, # atoms / cm^-3
+            T0 = 10.0, # K
+            gamma = 5.0/3.0,
+            grid = "log",
+            rmin = 1e-2*wunits.pc,
+            fast1d = fast1d)
+    hydro = integrator.hydro
+    hydro.Zsolar[:] = 1.0
+    weltgeist.cooling.cooling_on = True
+    weltgeist.gravity.gravity_on = True
+    weltgeist.radiation.radiation_on = True
+    weltgeist.sources.Sources().MakeWind(1e36, 1e20)
+    weltgeist.sources.Sources().MakeSimpleRadiation(1e49)
+    integrator.Advance(tend=1e4*wunits.year)
+    # The grid can be changed as usual
+    integrator.Regrid(ncells=2*ncells)
+    integrator.Advance(tend=2e4*wunits.year)
+    state = np.array([hydro.rho[:], hydro.P[:], hydro.vel[:], hydro.xhii[:]])
+    weltgeist.radiation.radiation_on = False
+    integrator.Reset()
+    return state
+
+def run_test(ncells=8192):
+    P, tstep = run_blast(False, ncells, 200)
+    Pfast, tstepfast = run_blast(True, ncells, 200)
+    print("Time per step for the normal hydro, fast path:", tstep, tstepfast, "s")
+    diff = np.max(np.abs(Pfast - P)/P)
+    print("Maximum relative difference in pressure:", diff)
+    # (the same to round-off, which depends on how the compiler orders the arithmetic)
+    assert diff < 1e-10
+
+    P, tstep = run_blast(False, ncells, 200, active=True)
+    Pfast, tstepfast = run_blast(True, ncells, 200, active=True)
+    print("With an active region:", tstep, tstepfast, "s")
+    assert np.max(np.abs(Pfast - P)/P) < 1e-10
+
+    state = run_cloud(False, 256)
+    statefast = run_cloud(True, 256)
+    diff = np.max(np.abs(statefast - state)/np.max(np.abs(state), axis=1)[:,None])
+    print("Maximum relative difference with wind, radiation, cooling and gravity:", diff)
+    assert np.all(np.isfinite(statefast))
+    assert diff < 1e-10
+
+# This piece of code runs if you start this module versus importing it
+if __name__=="__main__":
+    run_test()
@@ -0,0 +1,77 @@
+"""
+Test adding to fields in place with hydro.Add
+Checks that it gives the same state as adding to the fields with +=, and times both
+
+@author: samgeen
+"""
+
+# Import numpy and weltgeist
+import time
+import numpy as np
+import weltgeist
+import weltgeist.units as wunits # make this easier to type
+
+def make_state(hydro):
+    # Gas with some structure, flowing both ways, partly ionised
+    n = hydro.ncells
+    x = np.arange(n) / n
+    hydro.nH[0:n] = 100.0 * (1.0 + 0.5*np.sin(10*x))
+    hydro.T[0:n] = 100.0 * (1.0 + x)
+    hydro.vel[0:n] = 1e5 * np.cos(7*x)
+    hydro.xhii[0:n] = x
+    return np.array([hydro.rho[0:n], hydro.P[0:n], hydro.vel[0:n]])
+
+def run_test(ncells=2048, nrepeats=200):
+    integrator = weltgeist.integrator.Integrator()
+    integrator.Setup(ncells = ncells,
+            rmax = 10.0*wunits.pc,
+            n0 = 100.0, # atoms / cm^-3
+            T0 = 10.0, # K
+            gamma = 5.0/3.0)
+    hydro = integrator.hydro
+    n = ncells
+    state = make_state(hydro)
+    deltas = {"rho": hydro.rho[0:n]*0.1, "nH": 5.0, "P": hydro.P[0:n]*0.2, "PThermal": hydro.P[0:n]*0.2,
+              "vel": -3e4, "T": np.linspace(-50.0, 1e4, n), "TE": hydro.TE[0:n]*0.3,
+              "mass": hydro.mass[0:n]*0.2, "KE": hydro.TE[0:n]}
+    for slicer in (slice(None), slice(10, 500), 0, n-1, np.array([3, 7, 100])):
+        for name, delta in deltas.items():
+            if not np.isscalar(delta):
+                delta = delta[slicer]
+            # Add to the field as a field
+            hydro.rho[0:n], hydro.P[0:n], hydro.vel[0:n] = state
+            field = getattr(hydro, name)
+            field[slicer] += delta
+            expected = np.array([hydro.rho[0:n], hydro.P[0:n], hydro.vel[0:n]])
+            # Add to it with Add
+            hydro.rho[0:n], hydro.P[0:n], hydro.vel[0:n] = state
+            hydro.Add(name, delta, slicer)
+            result = np.array([hydro.rho[0:n], hydro.P[0:n], hydro.vel[0:n]])
+            assert np.allclose(result, expected, rtol=1e-12, atol=0.0), (name, slicer)
+            # The derived fields follow the change
+            assert np.allclose(hydro.T[0:n], hydro.PThermal[0:n]/hydro.nH[0:n]/wunits.kB/(1.0+hydro.xhii[0:n]), rtol=1e-14)
+    try:
+        hydro.Add("Zsolar", 1.0)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("Adding to Zsolar should fail")
+
+    # Time adding to the temperature as in cooling
+    hydro.rho[0:n], hydro.P[0:n], hydro.vel[0:n] = state
+    dT = np.full(n, 1e-3)
+    starttime = time.time()
+    for i in range(nrepeats):
+        hydro.T[0:n] += dT
+    fieldtime = (time.time() - starttime) / nrepeats
+    starttime = time.time()
+    for i in range(nrepeats):
+        hydro.Add("T", dT, slice(0,n))
+    addtime = (time.time() - starttime) / nrepeats
+    print("Time to add to T as a field", fieldtime, "s, with Add", addtime, "s")
+    assert addtime < fieldtime
+    integrator.Reset()
+
+# This piece of code runs if you start this module versus importing it
+if __name__=="__main__":
+    run_test()
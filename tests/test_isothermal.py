@@ -0,0 +1,75 @@
+"""
+Test the isothermal equation of state (Integrator.Setup with eos="isothermal")
+Runs an HII region expanding into a uniform cloud, as in the Starbench test,
+ and compares it to the old approach of gamma = 1.0001 with the ionised gas forced to Tion
+
+@author: samgeen
+"""
+
+# Import numpy and weltgeist
+import time
+import numpy as np
+import weltgeist
+import weltgeist.units as wunits # make this easier to type
+
+def run_hiiregion(eos, ncells=512, fast1d=False):
+    # HII region around a source of ionising photons in a hydrogen-only cloud
+    nback = 5.21e-21 / wunits.mH
+    Tback = 100.0 # K
+    Tion = 1e4 # K
+    integrator = weltgeist.integrator.Integrator()
+    if eos == "isothermal":
+        integrator.Setup(ncells = ncells,
+                rmax = 1.5*wunits.pc,
+                n0 = nback,
+                T0 = Tback,
+                fast1d = fast1d,
+                eos = "isothermal")
+    else:
+        integrator.Setup(ncells = ncells,
+                rmax = 1.5*wunits.pc,
+                n0 = nback,
+                T0 = Tback,
+                fast1d = fast1d,
+                gamma = 1.0001)
+    hydro = integrator.hydro
+    weltgeist.cooling.cooling_on = False
+    weltgeist.gravity.gravity_on = False
+    weltgeist.radiation.radiation_on = True
+    weltgeist.radiation.sigmaDust = 0.0
+    weltgeist.radiation.forceTion = True
+    weltgeist.sources.doRadiationPressure = False
+    weltgeist.sources.Sources().MakeSimpleRadiation(1e49, Tion=Tion)
+    starttime = time.time()
+    nsteps = integrator.Advance(tend=0.1*wunits.Myr)
+    runtime = time.time() - starttime
+    ionised = np.where(hydro.xhii[0:ncells] > 0.5)[0]
+    radius = hydro.x[ionised[-1]] + hydro.dx[ionised[-1]]
+    x = hydro.x[0:ncells]
+    T = hydro.T[0:ncells]
+    xhii = hydro.xhii[0:ncells]
+    nH = hydro.nH[0:ncells]
+    print(eos, "ionisation front at", radius/wunits.pc, "pc after", nsteps, "steps in", runtime, "s")
+    weltgeist.radiation.forceTion = False
+    weltgeist.radiation.sigmaDust = None
+    weltgeist.radiation.radiation_on = False
+    integrator.Reset()
+    return radius, nsteps, x, T, xhii, nH
+
+def run_test():
+    radius, nsteps, x, T, xhii, nH = run_hiiregion("isothermal")
+    oldradius, oldnsteps, oldx, oldT, oldxhii, oldnH = run_hiiregion("adiabatic")
+    # Same expansion as the old approach
+    assert abs(radius/oldradius - 1.0) < 0.02
+    # The ionised gas stays at Tion and the cloud outside the shell at the background temperature
+    # (the cells around the front mix the two temperatures, as in the adiabatic run)
+    assert np.all(np.abs(T[xhii == 1.0]/1e4 - 1.0) < 1e-6)
+    assert np.all(np.abs(T[x > 1.1*radius]/100.0 - 1.0) < 1e-6)
+    assert np.all(np.isfinite(nH))
+    # The 1D fast path does the same
+    fastradius, fastnsteps, fastx, fastT, fastxhii, fastnH = run_hiiregion("isothermal", fast1d=True)
+    assert np.max(np.abs(fastnH/nH - 1.0)) < 1e-10
+
+# This piece of code runs if you start this module versus importing it
+if __name__=="__main__":
+    run_test()
@@ -0,0 +1,99 @@
+"""
+Test setting up a logarithmically spaced grid
+Checks the grid geometry and runs a wind on it
+
+@author: samgeen
+"""
+
+# Import numpy and weltgeist
+import numpy as np
+import weltgeist
+import weltgeist.units as wunits # make this easier to type
+
+def run_test(ncells=256):
+    rmax = 10.0*wunits.pc
+    rmin = 1e-3*wunits.pc
+    integrator = weltgeist.integrator.Integrator()
+    integrator.Setup(ncells = ncells,
+            rmax = rmax,
+            n0 = 100.0, # atoms / cm^-3
+            T0 = 10.0, # K
+            gamma = 5.0/3.0,
+            grid = "log",
+            rmin = rmin)
+    hydro = integrator.hydro
+    x = hydro.x[:]
+    dx = hydro.dx
+    # Check the grid geometry
+    print("Innermost cell width / rmin:", dx[0]/rmin)
+    print("Outer edge of the grid / rmax:", (x[-1]+dx[-1])/rmax)
+    assert x[0] == 0.0
+    assert np.isclose(dx[0], rmin, rtol=1e-10)
+    assert np.isclose(x[-1]+dx[-1], rmax, rtol=1e-12)
+    assert np.all(dx[1:] > dx[:-1])
+    assert np.allclose(x[1:], x[:-1]+dx[:-1], rtol=1e-12)
+    assert np.isclose(np.sum(hydro.vol[:]), 4.0/3.0*np.pi*rmax**3, rtol=1e-10)
+
+    # Run a wind on the grid
+    weltgeist.cooling.cooling_on = False
+    weltgeist.gravity.gravity_on = False
+    weltgeist.radiation.radiation_on = False
+    weltgeist.sources.Sources().MakeWind(1e36, 1e20)
+    integrator.Advance(tend=1e4*wunits.year)
+    print("Time reached:", integrator.time/wunits.year, "years")
+    assert np.all(np.isfinite(hydro.P[:]))
+    assert np.all(hydro.P[:] > 0.0)
+    # The wind bubble should be hotter than the background somewhere away from the centre
+    assert np.max(hydro.T[10:]) > 1e4
+    integrator.Reset()
+
+    # A uniform grid still works after a logarithmic one
+    integrator.Setup(ncells = ncells, rmax = rmax)
+    assert np.allclose(integrator.hydro.dx, rmax/ncells, rtol=1e-12)
+    integrator.Reset()
+
+    # An innermost cell too wide to fit the grid (or not positive) raises an error
+    #  instead of stopping the process, in Setup, Regrid and BatchIntegrator
+    for badrmin in (rmax/ncells, 2.0*rmax, 0.0, -rmin):
+        try:
+            integrator.Setup(ncells = ncells, rmax = rmax, grid = "log", rmin = badrmin)
+            raise AssertionError("A logarithmic grid was set up with rmin = "+str(badrmin))
+        except ValueError:
+            pass
+        try:
+            weltgeist.ensemble.BatchIntegrator(2, ncells = ncells, rmax = rmax, grid = "log", rmin = badrmin)
+            raise AssertionError("A batch was set up with rmin = "+str(badrmin))
+        except ValueError:
+            pass
+    integrator.Setup(ncells = ncells, rmax = rmax)
+    for badrmin in (rmax/ncells, 0.0):
+        try:
+            integrator.Regrid(grid = "log", rmin = badrmin)
+            raise AssertionError("Regridded with rmin = "+str(badrmin))
+        except ValueError:
+            pass
+        try:
+            weltgeist.regrid.RemapGrid(ncells, rmax, grid = "log", rmin = badrmin)
+            raise AssertionError("Remapped with rmin = "+str(badrmin))
+        except ValueError:
+            pass
+    # The grid is left as it was and carries on
+    assert np.allclose(integrator.hydro.dx, rmax/ncells, rtol=1e-12)
+    integrator.Advance(nsteps=10)
+    integrator.Reset()
+
+    # VH1 itself flags a grid it can't make rather than stopping
+    vh1 = weltgeist.hydro.vh1()
+    vh1.imax, vh1.jmax, vh1.kmax = ncells, 1, 1
+    vh1.xmin, vh1.xmax = 0.0, 1.0
+    vh1.xgrid = 1
+    vh1.dxmin = 2.0/ncells
+    vh1.setup()
+    assert vh1.errorcode == 2
+    vh1.reset()
+    vh1.xgrid = 0
+    vh1.errorcode = 0
+
+# This piece of code runs if you start this module versus importing it
+if __name__=="__main__":
+    run_test()
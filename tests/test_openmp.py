@@ -0,0 +1,66 @@
+"""
+Test running the hydro on several OpenMP threads
+Checks that the result is the same as running on one thread
+(If Weltgeist was built without OpenMP, both runs use one thread)
+
+@author: samgeen
+"""
+
+# Import numpy and weltgeist
+import numpy as np
+import weltgeist
+import weltgeist.units as wunits # make this easier to type
+
+def run_blast(nthreads, ncells, nsteps):
+    # Simple adiabatic blast wave, split over the cells if nthreads > 1
+    integrator = weltgeist.integrator.Integrator()
+    integrator.SetThreads(nthreads, mincells=0)
+    integrator.Setup(ncells = ncells,
+            rmax = 10.0*wunits.pc,
+            n0 = 100.0, # atoms / cm^-3
+            T0 = 10.0, # K
+            gamma = 5.0/3.0)
+    weltgeist.cooling.cooling_on = False
+    weltgeist.gravity.gravity_on = False
+    weltgeist.radiation.radiation_on = False
+    integrator.hydro.TE[0] = 1e51
+    integrator.Advance(nsteps=nsteps)
+    P = integrator.hydro.P[0:ncells]
+    integrator.Reset()
+    integrator.SetThreads(1, mincells=10000)
+    return P
+
+def run_batch(nthreads, nmodels, ncells):
+    # Batch of winds with different luminosities, split over the models if nthreads > 1
+    batch = weltgeist.ensemble.BatchIntegrator(nmodels,
+            ncells = ncells,
+            rmax = 10.0*wunits.pc,
+            n0 = 100.0, # atoms / cm^-3
+            T0 = 10.0, # K
+            gamma = 5.0/3.0)
+    batch.SetThreads(nthreads)
+    for i in range(nmodels):
+        batch.SetWind(i, 1e36*(i+1), 1e20)
+    batch.Advance(1e3*wunits.year)
+    P = batch.P[:,:]
+    batch.Reset()
+    batch.SetThreads(1)
+    return P
+
+def run_test(nthreads=4):
+    print("Threads available:", weltgeist.integrator.Integrator().threads)
+    P1 = run_blast(1, 2048, 100)
+    PN = run_blast(nthreads, 2048, 100)
+    print("Maximum relative difference in pressure for one grid:",
+          np.max(np.abs(PN - P1)/P1))
+    assert np.all(PN == P1)
+
+    P1 = run_batch(1, 8, 128)
+    PN = run_batch(nthreads, 8, 128)
+    print("Maximum relative difference in pressure for batched models:",
+          np.max(np.abs(PN - P1)/P1))
+    assert np.all(PN == P1)
+
+# This piece of code runs if you start this module versus importing it
+if __name__=="__main__":
+    run_test()
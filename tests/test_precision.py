@@ -0,0 +1,115 @@
+"""
+Test the single precision build of VH1 (Integrator.Setup with precision="single")
+Checks that it agrees with double precision, that fields and saved files are
+ the same as in double precision, and times both
+
+@author: samgeen
+"""
+
+# Import numpy and weltgeist
+import os
+import tempfile
+import time
+import numpy as np
+import weltgeist
+import weltgeist.units as wunits # make this easier to type
+
+def run_blast(precision, ncells, nsteps):
+    # Simple adiabatic blast wave
+    integrator = weltgeist.integrator.Integrator()
+    integrator.Setup(ncells = ncells,
+            rmax = 10.0*wunits.pc,
+            n0 = 100.0, # atoms / cm^-3
+            T0 = 10.0, # K
+            gamma = 5.0/3.0,
+            precision = precision)
+    weltgeist.cooling.cooling_on = False
+    weltgeist.gravity.gravity_on = False
+    weltgeist.radiation.radiation_on = False
+    hydro = integrator.hydro
+    hydro.TE[0] = 1e51
+    starttime = time.time()
+    integrator.Advance(nsteps=nsteps)
+    runtime = time.time() - starttime
+    # Fields come back in double precision either way
+    for field in (hydro.rho, hydro.nH, hydro.P, hydro.vel, hydro.T, hydro.cs, hydro.grav):
+        assert field[:].dtype == np.float64
+    state = np.array([hydro.rho[:], hydro.P[:], hydro.vel[:]])
+    return integrator, state, runtime/nsteps
+
+def run_batch(precision, nmodels, ncells):
+    # Winds of different luminosities, as in a parameter sweep
+    batch = weltgeist.ensemble.BatchIntegrator(nmodels, ncells = ncells,
+            rmax = 10.0*wunits.pc, n0 = 100.0, T0 = 10.0, precision = precision)
+    for model in range(nmodels):
+        batch.SetWind(model, 1e35*(model+1), 1e21)
+    starttime = time.time()
+    batch.Advance(1e4*wunits.year)
+    runtime = time.time() - starttime
+    state = np.array([batch.rho[:,:], batch.P[:,:], batch.vel[:,:]])
+    batch.Reset()
+    return state, runtime
+
+def relativediff(a, b):
+    # Largest difference in each variable, relative to its largest value
+    return np.max(np.abs(a - b)/np.max(np.abs(b), axis=1)[:,None])
+
+def run_test(ncells=4096):
+    integrator, state, tstep = run_blast("double", ncells, 300)
+    integrator.Reset()
+    integrator, statesingle, tstepsingle = run_blast("single", ncells, 300)
+    print("Time per step in double, single precision:", tstep, tstepsingle, "s")
+    assert weltgeist.hydro.vh1().zstate.dtype == np.float32
+    diff = relativediff(statesingle, state)
+    print("Maximum relative difference in a blast wave:", diff)
+    assert diff < 1e-4
+
+    # Files saved in single precision can be loaded in double precision
+    folder = tempfile.mkdtemp()
+    filename = os.path.join(folder, "single")
+    integrator.Save(filename)
+    integrator.Reset()
+    integrator.Setup(ncells = ncells, rmax = 10.0*wunits.pc, precision = "double")
+    integrator.Load(filename)
+    hydro = integrator.hydro
+    assert weltgeist.hydro.vh1().zstate.dtype == np.float64
+    assert np.all(np.array([hydro.rho[:], hydro.P[:], hydro.vel[:]]) == statesingle)
+    integrator.Reset()
+
+    state, runtime = run_batch("double", 64, 512)
+    statesingle, runtimesingle = run_batch("single", 64, 512)
+    print("Time for 64 winds in double, single precision:", runtime, runtimesingle, "s")
+    diff = np.max(np.abs(statesingle - state)/np.max(np.abs(state), axis=(1,2))[:,None,None])
+    print("Maximum relative difference in the winds:", diff)
+    # The wind shells are thin, so single precision moves them by a little more
+    assert diff < 1e-2
+    assert np.all(np.isfinite(statesingle))
+
+    # Settings chosen before Setup carry over to whichever build it chooses
+    integrator = weltgeist.integrator.Integrator()
+    integrator.SetRiemannSolver("hllc")
+    integrator.SetThreads(integrator.threads, mincells=1234)
+    for precision in ("single", "double", "single"):
+        integrator.Setup(ncells = 64, rmax = 10.0*wunits.pc, precision = precision)
+        assert weltgeist.hydro.vh1().riemannsolver == 2
+        assert weltgeist.hydro.vh1().ompmincells == 1234
+        integrator.Reset()
+    batch = weltgeist.ensemble.BatchIntegrator(4, ncells = 64, rmax = 10.0*wunits.pc, precision = "single")
+    assert weltgeist.hydro.vh1().riemannsolver == 2
+    batch.Reset()
+    integrator.SetRiemannSolver("exact")
+    integrator.SetThreads(integrator.threads, mincells=10000)
+
+    # Only one grid can be used at once, even if it is in the other build
+    integrator.Setup(ncells = 64, rmax = 10.0*wunits.pc, precision = "double")
+    try:
+        weltgeist.ensemble.BatchIntegrator(4, ncells = 64, rmax = 10.0*wunits.pc, precision = "single")
+        assert False, "BatchIntegrator set up a second grid"
+    except RuntimeError:
+        pass
+    assert weltgeist.hydro.vh1().zstate.dtype == np.float64
+    integrator.Reset()
+
+# This piece of code runs if you start this module versus importing it
+if __name__=="__main__":
+    run_test()
@@ -0,0 +1,74 @@
+"""
+Test the raw code unit views of the hydro variables (hydro.raw)
+Checks that they are the VH1 arrays, that they follow the grid as it changes
+ and times getting fields through them
+
+@author: samgeen
+"""
+
+# Import numpy and weltgeist
+import time
+import numpy as np
+import weltgeist
+import weltgeist.units as wunits # make this easier to type
+
+def check_views(integrator):
+    hydro = integrator.hydro
+    raw = hydro.raw
+    ncells = hydro.ncells
+    # The views are the same arrays each time, and the same memory as the fields
+    assert raw.rho is raw.rho
+    for view in (raw.rho, raw.P, raw.vel, raw.grav, raw.x):
+        assert len(view) == ncells
+    assert np.all(raw.rho*wunits.density == hydro.rho[:])
+    assert np.all(raw.x*wunits.distance == hydro.x[:])
+    # Writing to them changes the simulation
+    raw.P[0] *= 2.0
+    assert hydro.P[0] == raw.P[0]*wunits.pressure
+    hydro.vel[1] = 1e5
+    assert raw.vel[1] == 1e5/wunits.velocity
+
+def run_test(ncells=1024, ngets=2000):
+    for fast1d in (False, True):
+        integrator = weltgeist.integrator.Integrator()
+        integrator.Setup(ncells = ncells,
+                rmax = 10.0*wunits.pc,
+                n0 = 100.0, # atoms / cm^-3
+                T0 = 10.0, # K
+                gamma = 5.0/3.0,
+                fast1d = fast1d)
+        weltgeist.cooling.cooling_on = False
+        weltgeist.gravity.gravity_on = False
+        weltgeist.radiation.radiation_on = False
+        hydro = integrator.hydro
+        check_views(integrator)
+        hydro.TE[0] = 1e51
+        integrator.Advance(nsteps=50)
+        check_views(integrator)
+
+        # The views move to the new grid
+        mass = np.sum(hydro.mass[:])
+        integrator.Regrid(ncells = ncells*2, rmax = 20.0*wunits.pc)
+        check_views(integrator)
+        assert np.abs(np.sum(hydro.mass[:]) / mass - 8.0) < 1e-2 # adds the background from 10 to 20 pc
+        integrator.Advance(nsteps=50)
+        check_views(integrator)
+
+        # Time getting fields in code units against the cgs fields
+        starttime = time.time()
+        for i in range(ngets):
+            rho = hydro.raw.rho
+            P = hydro.raw.P
+        rawtime = (time.time() - starttime) / ngets
+        starttime = time.time()
+        for i in range(ngets):
+            rho = hydro.rho[:]
+            P = hydro.P[:]
+        fieldtime = (time.time() - starttime) / ngets
+        print("fast1d =", fast1d, ": time to get rho and P raw", rawtime, "s, as fields", fieldtime, "s")
+        assert rawtime < fieldtime
+        integrator.Reset()
+
+# This piece of code runs if you start this module versus importing it
+if __name__=="__main__":
+    run_test()
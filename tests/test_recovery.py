@@ -0,0 +1,142 @@
+"""
+Test recovering from a collapsed timestep (see Integrator.SetRecovery)
+VH1 used to stop the whole process, now it raises TimestepCollapseError if it can't go on
+
+@author: samgeen
+"""
+
+# Import numpy and weltgeist
+import numpy as np
+import weltgeist
+import weltgeist.units as wunits # make this easier to type
+
+class GlitchSource(weltgeist.sources.AbstractSource):
+    """
+    Kicks a cell to a huge velocity, making the timestep collapse
+    If once is True it only does this the first time, so the step works when it is retried
+    """
+    def __init__(self, once):
+        self.glitches = 0
+        self.once = once
+
+    def Inject(self, injector):
+        integrator = weltgeist.integrator.Integrator()
+        # Wait until the grid has moved on, since the timestep only collapses compared to the time
+        if integrator.time > 0.0 and (GlitchSource.kicks == 0 or not self.once):
+            GlitchSource.kicks += 1
+            integrator.hydro.vel[20] = 1e40
+        self.glitches += 1
+
+# Counted outside the source so going back to an old state doesn't forget about the kicks
+GlitchSource.kicks = 0
+
+def setup():
+    integrator = weltgeist.integrator.Integrator()
+    integrator.Setup(ncells = 256,
+            rmax = 10.0*wunits.pc,
+            n0 = 100.0, # atoms / cm^-3
+            T0 = 10.0, # K
+            gamma = 5.0/3.0)
+    weltgeist.cooling.cooling_on = False
+    weltgeist.gravity.gravity_on = False
+    weltgeist.radiation.radiation_on = False
+    integrator.hydro.TE[0:5] = 1e50
+    return integrator
+
+def run_test():
+    tend = 1e3*wunits.year
+    integrator = setup()
+    # Recovery is off until SetRecovery is called, so no states are kept to go back to
+    integrator.Advance(nsteps=5)
+    try:
+        integrator.Rollback(1)
+        raise AssertionError("Rolled back without any states kept")
+    except ValueError:
+        pass
+    integrator.SetRecovery()
+
+    # A one-off glitch is recovered from by going back and retrying the step
+    recoveries = integrator.recoveries
+    GlitchSource.kicks = 0
+    glitch = GlitchSource(once=True)
+    weltgeist.sources.Sources().AddSource(glitch)
+    integrator.Advance(nsteps=50)
+    print("Recoveries:", integrator.recoveries - recoveries, "at time", integrator.time)
+    assert integrator.recoveries - recoveries == 1
+    assert GlitchSource.kicks == 1
+    assert np.all(np.isfinite(integrator.hydro.P[:]))
+    assert np.max(np.abs(integrator.hydro.vel[:])) < 1e10
+    # The Courant number and Riemann solver are back to what they were
+    assert weltgeist.hydro.vh1().courant == 0.5
+    assert weltgeist.hydro.vh1().riemannsolver == 0
+
+    # A glitch every step can't be recovered from, but the process carries on
+    # with the grid back where it was before the step
+    glitch.once = False
+    time = integrator.time
+    state = integrator.hydro.GetState()
+    try:
+        integrator.Step()
+        raise AssertionError("The timestep collapse wasn't raised")
+    except weltgeist.integrator.TimestepCollapseError:
+        pass
+    assert integrator.time == time
+    assert np.all(integrator.hydro.GetState() == state)
+    assert weltgeist.hydro.vh1().courant == 0.5
+    # Take the glitch out and carry on
+    weltgeist.sources.Sources().RemoveSource(glitch)
+    integrator.Advance(tend=tend)
+    assert abs(integrator.time/tend - 1.0) < 1e-10
+
+    # A broken state inside a run of steps in VH1 is raised straight away with recovery off
+    integrator.SetRecovery(retries=0)
+    integrator.hydro.vel[20] = 1e40
+    try:
+        integrator.Advance(nsteps=10)
+        raise AssertionError("The timestep collapse wasn't raised")
+    except weltgeist.integrator.TimestepCollapseError:
+        pass
+    # The states kept can be gone back to by hand
+    integrator.SetRecovery(nstates=2)
+    integrator.hydro.vel[20] = 0.0
+    integrator.Advance(nsteps=10)
+    integrator.Advance(nsteps=10)
+    time = integrator.time
+    integrator.Rollback(1)
+    assert integrator.time < time
+    integrator.Reset()
+
+    # The ionisation front still limits the step after going back
+    integrator = setup()
+    weltgeist.radiation.radiation_on = True
+    weltgeist.radiation.frontCourant = 0.5
+    weltgeist.sources.Sources().MakeSimpleRadiation(1e49)
+    integrator.Advance(nsteps=20)
+    integrator.Advance(nsteps=20)
+    integrator.Rollback(1)
+    assert weltgeist.radiation._lastFront[1] <= integrator.time
+    integrator.Step()
+    assert "ionisation front" in integrator.timestep.log[-1]["constraints"]
+    weltgeist.radiation.frontCourant = None
+    weltgeist.radiation.radiation_on = False
+    integrator.Reset()
+
+    # A collapse in a batch of models is raised without stopping the process
+    batch = weltgeist.ensemble.BatchIntegrator(2,
+            ncells = 64,
+            rmax = 10.0*wunits.pc,
+            n0 = 100.0, # atoms / cm^-3
+            T0 = 10.0, # K
+            gamma = 5.0/3.0)
+    batch.Advance(1e2*wunits.year)
+    batch.vel[1,20] = 1e40
+    try:
+        batch.Advance(1e3*wunits.year)
+        raise AssertionError("The timestep collapse wasn't raised")
+    except weltgeist.integrator.TimestepCollapseError:
+        pass
+    batch.Reset()
+
+# This piece of code runs if you start this module versus importing it
+if __name__=="__main__":
+    run_test()
@@ -0,0 +1,98 @@
+"""
+Test changing the grid in the middle of a run with Integrator.Regrid
+Checks that mass, energy, ions and metals are conserved and the run carries on
+
+@author: samgeen
+"""
+
+# Import numpy and weltgeist
+import numpy as np
+import weltgeist
+import weltgeist.units as wunits # make this easier to type
+
+def totals(hydro):
+    n = hydro.ncells
+    vol = hydro.vol
+    mass = np.sum(hydro.mass[0:n])
+    momentum = np.sum(hydro.mass[0:n]*hydro.vel[0:n])
+    energy = np.sum(hydro.TE[0:n] + hydro.KE[0:n])
+    ions = np.sum(hydro.nH[0:n]*hydro.xhii[0:n]*vol)
+    metals = np.sum(hydro.Zsolar[0:n]*hydro.mass[0:n])
+    return np.array([mass, momentum, energy, ions, metals])
+
+def check_regrid(integrator, **kwargs):
+    hydro = integrator.hydro
+    before = totals(hydro)
+    time = integrator.time
+    integrator.Regrid(**kwargs)
+    after = totals(hydro)
+    print("Regrid", kwargs, "relative change in mass, momentum, energy, ions, metals:",
+          (after - before)/before)
+    assert np.allclose(after, before, rtol=1e-10)
+    assert integrator.time == time
+
+def run_test(ncells=256):
+    rmax = 10.0*wunits.pc
+    integrator = weltgeist.integrator.Integrator()
+    integrator.Setup(ncells = ncells,
+            rmax = rmax,
+            n0 = 100.0, # atoms / cm^-3
+            T0 = 10.0, # K
+            gamma = 5.0/3.0)
+    hydro = integrator.hydro
+    hydro.Zsolar[:] = 0.5
+    weltgeist.cooling.cooling_on = False
+    weltgeist.gravity.gravity_on = False
+    weltgeist.radiation.radiation_on = True
+    weltgeist.sources.Sources().MakeWind(1e36, 1e20)
+    weltgeist.sources.Sources().MakeSimpleRadiation(1e48)
+    integrator.Advance(tend=1e4*wunits.year)
+
+    # Refine, coarsen and change to a logarithmic grid
+    check_regrid(integrator, ncells=2*ncells)
+    assert hydro.ncells == 2*ncells
+    check_regrid(integrator, ncells=ncells//2)
+    assert hydro.ncells == ncells//2
+    check_regrid(integrator, ncells=ncells, grid="log", rmin=1e-3*wunits.pc)
+    assert np.isclose(hydro.dx[0], 1e-3*wunits.pc, rtol=1e-10)
+
+    # The sources should still be running on the new grid
+    ionisedbefore = np.sum(hydro.xhii[:] > 0.5)
+    integrator.Advance(tend=2e4*wunits.year)
+    print("Time reached:", integrator.time/wunits.year, "years")
+    assert np.all(np.isfinite(hydro.P[:]))
+    assert np.max(hydro.T[:]) > 1e6 # wind bubble
+    assert np.sum(hydro.xhii[:] > 0.5) >= ionisedbefore
+    assert np.isclose(hydro.x[hydro.ncells-1] + hydro.dx[-1], rmax, rtol=1e-12)
+    weltgeist.radiation.radiation_on = False
+    integrator.Reset()
+
+    # Isothermal gas has no energy to conserve, so its temperature is remapped with the mass
+    integrator.Setup(ncells = ncells,
+            rmax = rmax,
+            n0 = 100.0, # atoms / cm^-3
+            T0 = 10.0, # K
+            eos = "isothermal")
+    hydro = integrator.hydro
+    hydro.T[0:ncells//4] = 1e4
+    hydro.vel[0:ncells//4] = 1e5
+    before = totals(hydro)
+    heat = np.sum(hydro.mass[0:ncells]*hydro.T[0:ncells])
+    with np.errstate(all="raise"):
+        integrator.Regrid(ncells=2*ncells)
+    after = totals(hydro)
+    n = hydro.ncells
+    print("Isothermal regrid: relative change in mass, momentum, mass-weighted temperature:",
+          after[0]/before[0] - 1.0, after[1]/before[1] - 1.0,
+          np.sum(hydro.mass[0:n]*hydro.T[0:n])/heat - 1.0)
+    assert np.all(np.isfinite(hydro.P[0:n]))
+    assert np.allclose(after[[0, 1, 3, 4]], before[[0, 1, 3, 4]], rtol=1e-10)
+    assert np.isclose(np.sum(hydro.mass[0:n]*hydro.T[0:n]), heat, rtol=1e-10)
+    assert np.allclose(hydro.T[n-10:n], 10.0, rtol=1e-10)
+    integrator.Advance(nsteps=10)
+    assert np.all(np.isfinite(hydro.P[0:n]))
+    integrator.Reset()
+
+# This piece of code runs if you start this module versus importing it
+if __name__=="__main__":
+    run_test()
@@ -0,0 +1,74 @@
+"""
+Test advecting xhii and Zsolar with the gas as passive scalars (Integrator.Setup with advect=True)
+Marks the gas inside a blast wave and checks that the marked mass is conserved and moves out with it
+
+@author: samgeen
+"""
+
+# Import numpy and weltgeist
+import time
+import numpy as np
+import weltgeist
+import weltgeist.units as wunits # make this easier to type
+
+def run_blast(advect=True, fast1d=False, precision="double", ncells=512, nsteps=500):
+    integrator = weltgeist.integrator.Integrator()
+    integrator.Setup(ncells = ncells,
+            rmax = 10.0*wunits.pc,
+            n0 = 100.0, # atoms / cm^-3
+            T0 = 10.0, # K
+            gamma = 5.0/3.0,
+            fast1d = fast1d,
+            precision = precision,
+            advect = advect)
+    weltgeist.cooling.cooling_on = False
+    weltgeist.gravity.gravity_on = False
+    weltgeist.radiation.radiation_on = False
+    hydro = integrator.hydro
+    # Mark the gas the blast starts in with xhii, and change the metallicity of some of the cloud
+    hydro.TE[0:10] = 1e50
+    hydro.xhii[0:10] = 1.0
+    hydro.Zsolar[100:200] = 0.5
+    marked = np.sum(hydro.xhii[:]*hydro.mass[:])
+    metals = np.sum(hydro.Zsolar[:]*hydro.mass[:])
+    starttime = time.time()
+    integrator.Advance(nsteps=nsteps)
+    runtime = time.time() - starttime
+    result = {"marked": np.sum(hydro.xhii[:]*hydro.mass[:])/marked,
+              "metals": np.sum(hydro.Zsolar[:]*hydro.mass[:])/metals,
+              "xhii": hydro.xhii[:], "Zsolar": hydro.Zsolar[:], "nH": hydro.nH[:],
+              "runtime": runtime}
+    integrator.Reset()
+    return result
+
+def run_test():
+    result = run_blast()
+    print("Marked mass, metals after the blast (fraction of start):", result["marked"], result["metals"])
+    print("Time for the blast", result["runtime"], "s")
+    # The marked gas and metals are conserved (nothing leaves the grid)
+    # The marked gas is a tiny fraction of the mass on the grid, so allow for rounding in the total
+    assert abs(result["marked"] - 1.0) < 1e-8
+    assert abs(result["metals"] - 1.0) < 1e-10
+    # The marked gas has moved out with the blast
+    assert np.max(np.where(result["xhii"] > 0.5)[0]) > 20
+    assert np.all(result["xhii"] >= -1e-10) and np.all(result["xhii"] <= 1.0 + 1e-10)
+    # The metallicity of gas the scalars are uniform in doesn't change
+    assert np.all(np.abs(result["Zsolar"][300:] - 1.0) < 1e-12)
+
+    # Without advection the scalars stay in their cells
+    still = run_blast(advect=False)
+    assert np.all(still["xhii"][0:10] == 1.0) and np.all(still["xhii"][10:] == 0.0)
+    assert np.all(still["nH"] == result["nH"])
+    print("Time for the blast without advection", still["runtime"], "s")
+
+    # The 1D fast path and single precision do the same
+    fast = run_blast(fast1d=True)
+    assert np.max(np.abs(fast["xhii"] - result["xhii"])) < 1e-10
+    assert np.max(np.abs(fast["Zsolar"] - result["Zsolar"])) < 1e-10
+    single = run_blast(precision="single")
+    assert np.max(np.abs(single["xhii"] - result["xhii"])) < 1e-3
+    weltgeist.hydro._SelectPrecision("double")
+
+# This piece of code runs if you start this module versus importing it
+if __name__=="__main__":
+    run_test()
@@ -44,8 +44,7 @@ def run_test(early=True):
     ncells = 10000
     nanalytic = np.zeros((ncells))
     n0 = nback # cm^-3
-    T0 = Tbackground # Kelvin (will be reset later)
-    gamma = 1.0001 # Weird Starbench gamma
+    T0 = Tbackground # Kelvin (the neutral gas stays at this temperature)
 
     # What radius to set?
     if early:
@@ -57,7 +56,7 @@ def run_test(early=True):
             rmax = rmax, # 20 pc box
             n0 = n0, # atoms / cm^-3
             T0 = T0, # Kelvin
-            gamma = gamma) # weird Starbench isothermal gamma
+            eos = "isothermal") # Starbench gas is isothermal
     hydro = integrator.hydro
 
     # Set up the source for both tests
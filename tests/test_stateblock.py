@@ -0,0 +1,98 @@
+"""
+Test the block holding the whole state of the gas (hydro.state)
+Checks that the fields are views of it, that it can be copied and set back in one piece,
+ including through shared memory, and times copying it against copying each field
+
+@author: samgeen
+"""
+
+# Import numpy and weltgeist
+import time
+from multiprocessing import shared_memory
+import numpy as np
+import weltgeist
+import weltgeist.units as wunits # make this easier to type
+
+def check_block(hydro):
+    state = hydro.state
+    index = hydro.stateindex
+    assert state.shape == (len(hydro.statefields), hydro.ncells)
+    # The fields are rows of the block
+    assert np.shares_memory(state, hydro.raw.rho)
+    assert np.all(state[index["ro"]]*wunits.density == hydro.rho[:])
+    assert np.all(state[index["pr"]]*wunits.pressure == hydro.P[:])
+    assert np.all(state[index["xhii"]] == hydro.xhii[:])
+    assert np.all(state[index["zsolar"]] == hydro.Zsolar[:])
+    assert np.allclose(state[index["pb"]]*wunits.pressure, hydro.PMagnetic[:], rtol=1e-14)
+
+def run_test(ncells=2048, ncopies=500):
+    for fast1d in (False, True):
+        integrator = weltgeist.integrator.Integrator()
+        integrator.Setup(ncells = ncells,
+                rmax = 10.0*wunits.pc,
+                n0 = 100.0, # atoms / cm^-3
+                T0 = 10.0, # K
+                gamma = 5.0/3.0,
+                fast1d = fast1d)
+        weltgeist.cooling.cooling_on = False
+        weltgeist.gravity.gravity_on = False
+        weltgeist.radiation.radiation_on = False
+        hydro = integrator.hydro
+        assert np.all(hydro.Zsolar[:] == 1.0)
+        assert hydro.state.flags.c_contiguous or fast1d # (fast1d keeps ghost zones in its block)
+        hydro.TE[0] = 1e51
+        hydro.xhii[0:100] = 1.0
+        hydro.Bfield[:] = 1e-6
+        check_block(hydro)
+        integrator.Advance(nsteps=100)
+        check_block(hydro)
+
+        # Copy the state out and back in
+        saved = hydro.GetState()
+        T = hydro.T[:]
+        integrator.Advance(nsteps=100)
+        assert not np.all(hydro.T[:] == T)
+        hydro.SetState(saved)
+        assert np.all(hydro.state == saved)
+        assert np.all(hydro.T[:] == T)
+        try:
+            hydro.SetState(saved[:,1:])
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Setting a state of the wrong shape should fail")
+
+        # Share the state with other processes through shared memory
+        shared = shared_memory.SharedMemory(create=True, size=saved.nbytes)
+        try:
+            exported = np.ndarray(saved.shape, dtype=saved.dtype, buffer=shared.buf)
+            exported[...] = hydro.state
+            hydro.state[...] = 0.0
+            hydro.SetState(exported)
+            assert np.all(hydro.state == saved)
+            del exported
+        finally:
+            shared.close()
+            shared.unlink()
+
+        # The block moves to the new grid
+        integrator.Regrid(ncells = ncells//2)
+        check_block(hydro)
+
+        # Time copying the whole state against copying each field
+        starttime = time.time()
+        for i in range(ncopies):
+            saved = hydro.GetState()
+        blocktime = (time.time() - starttime) / ncopies
+        starttime = time.time()
+        for i in range(ncopies):
+            saved = [hydro.rho[:], hydro.P[:], hydro.vel[:], hydro.grav[:],
+                     hydro.xhii[:], hydro.Zsolar[:], hydro.PMagnetic[:]]
+        fieldtime = (time.time() - starttime) / ncopies
+        print("fast1d =", fast1d, ": time to copy the state", blocktime, "s, each field", fieldtime, "s")
+        assert blocktime < fieldtime
+        integrator.Reset()
+
+# This piece of code runs if you start this module versus importing it
+if __name__=="__main__":
+    run_test()
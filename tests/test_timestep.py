@@ -0,0 +1,126 @@
+"""
+Test the timestep controller (Integrator().timestep)
+Checks the Courant number can be changed, the constraints on each step are logged
+ and an adaptive Courant number goes down when the hydro struggles and back up after
+
+@author: samgeen
+"""
+
+# Import numpy and weltgeist
+import tempfile
+import numpy as np
+import weltgeist
+import weltgeist.units as wunits # make this easier to type
+
+def setup(ncells=256):
+    integrator = weltgeist.integrator.Integrator()
+    integrator.Setup(ncells = ncells,
+            rmax = 10.0*wunits.pc,
+            n0 = 100.0, # atoms / cm^-3
+            T0 = 10.0, # K
+            gamma = 5.0/3.0)
+    weltgeist.cooling.cooling_on = False
+    weltgeist.gravity.gravity_on = False
+    weltgeist.radiation.radiation_on = False
+    return integrator
+
+def run_blast(courant):
+    integrator = setup()
+    integrator.timestep.courant = courant
+    integrator.hydro.TE[0:5] = 1e50
+    nsteps = integrator.Advance(tend=1e3*wunits.year)
+    P = integrator.hydro.P[:]
+    counts = integrator.timestep.counts
+    log = integrator.timestep.log
+    integrator.Reset()
+    return nsteps, P, counts, log
+
+def run_test():
+    tend = 1e3*wunits.year
+    timestep = weltgeist.integrator.Integrator().timestep
+
+    # A smaller Courant number takes more steps to get to about the same answer
+    nsteps, P, counts, log = run_blast(0.5)
+    nstepsSmall, PSmall, countsSmall, logSmall = run_blast(0.25)
+    print("Steps with Courant number 0.5 and 0.25:", nsteps, nstepsSmall)
+    print("Steps limited by each constraint:", counts)
+    assert 1.7 < nstepsSmall / nsteps < 2.3
+    assert np.max(np.abs(PSmall - P)/P) < 0.1
+    assert sum(counts.values()) == nsteps
+    assert counts["hydro"] > 0 and counts["target"] == 1
+    assert sum(record["steps"] for record in log) == nsteps
+    assert log[-1]["limiter"] == "target" and abs(log[-1]["time"]/tend - 1.0) < 1e-10
+    assert log[-1]["courant"] == 0.25 or logSmall[-1]["courant"] == 0.25
+    for badcourant in (0.0, 1.5):
+        try:
+            timestep.courant = badcourant
+            raise AssertionError("A bad Courant number was allowed")
+        except ValueError:
+            pass
+    timestep.courant = 0.5
+
+    # Constraints from Python are logged by name
+    integrator = setup()
+    weltgeist.sources.Sources().MakeWind(1e36, 1e-6*wunits.Msun/wunits.year)
+    saver = weltgeist.integrator.Saver(tempfile.mkdtemp(), dtout=0.5*tend, forceExactTimes=True)
+    integrator.AddSaver(saver)
+    integrator.Advance(tend=tend)
+    counts = timestep.counts
+    print("Steps limited by each constraint with a wind and a saver:", counts)
+    assert counts["wind"] > 0
+    assert all("wind" in record["constraints"] for record in timestep.log)
+    assert sum("save" in record["constraints"] for record in timestep.log) >= 1
+    record = timestep.log[-1]
+    assert record["dt"] <= min(record["constraints"].values()) * (1.0 + 1e-10)
+    integrator.RemoveSaver(saver)
+    integrator.Reset()
+
+    # So is the ionisation front if it is limited
+    integrator = setup()
+    weltgeist.radiation.radiation_on = True
+    weltgeist.radiation.frontCourant = 0.5
+    weltgeist.sources.Sources().MakeSimpleRadiation(1e49)
+    integrator.Advance(nsteps=100)
+    print("Steps limited by each constraint with radiation:", timestep.counts)
+    assert "ionisation front" in timestep.log[-1]["constraints"]
+    assert timestep.counts.get("ionisation front", 0) > 0
+    weltgeist.radiation.frontCourant = None
+    integrator.Reset()
+
+    # An adaptive Courant number goes down when the hydro struggles and back up after
+    integrator = setup()
+    integrator.hydro.TE[0:5] = 1e50
+    timestep.SetAdaptive()
+    integrator.Step()
+    assert timestep.current == 0.5
+    timestep.Event(20)
+    integrator.Step()
+    lowered = timestep.current
+    print("Courant number after 20 events:", lowered)
+    assert lowered < 0.5*0.8
+    integrator.Advance(nsteps=100)
+    assert timestep.current == 0.5
+    timestep.SetAdaptive(False)
+    integrator.Reset()
+
+    # The Courant number, growth factor and limits set before Setup carry over to
+    #  the single precision build of VH1, and Reset sends them again
+    timestep.courant = 0.2
+    timestep.growth = 1.05
+    timestep.Limit("test", 1.0*wunits.year)
+    integrator.Setup(ncells = 64, rmax = 10.0*wunits.pc, precision = "single")
+    assert weltgeist.hydro.vh1().courant == 0.2 and timestep.current == 0.2
+    assert weltgeist.hydro.vh1().dtgrowth == 1.05 and timestep.growth == 1.05
+    assert np.isclose(weltgeist.hydro.vh1().vdtext, 0.2*wunits.time/(1.0*wunits.year), rtol=1e-12)
+    integrator.Step()
+    assert timestep.log[-1]["dt"] <= 1.0*wunits.year*(1.0 + 1e-10)
+    weltgeist.hydro.vh1().dtgrowth = 1.5
+    integrator.Reset()
+    assert weltgeist.hydro.vh1().dtgrowth == 1.05
+    timestep.courant = 0.5
+    timestep.growth = 1.1
+    integrator.Reset()
+
+# This piece of code runs if you start this module versus importing it
+if __name__=="__main__":
+    run_test()
@@ -5,4 +5,4 @@
 
 This is a Python/Numpy module based on the code Virginia Hydrodynamics 1 designed to simulate 1D spherically symmetric flows around massive stars.
 '''
-from . import analyticsolutions, cooling, gravity, integrator, radiation, sources, units
\ No newline at end of file
+from . import analyticsolutions, cooling, ensemble, gravity, integrator, radiation, regrid, sources, timestep, units
\ No newline at end of file
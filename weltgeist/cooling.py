@@ -14,7 +14,87 @@
 # Depends on your opinion of how this subgrid physics works
 maskContactDiscontinuity = False
 
-def TemperatureChange(dt):
+# How to find the cooling and heating rates in the cooling solver
+# "table": look them up in tables in (nH, T) built the first time cooling is solved
+# "analytic": work them out again in every substep (slower, kept to check the tables against)
+rates = "table"
+
+# How to integrate the cooling over a step
+# "subcycle": in substeps, each limited to a small change in temperature
+# "exact": exactly for gas above 10^4 K, where the cooling is a power law in T in pieces
+#          (Townsend 2009), with substeps for gas that is or gets cooler than this
+solver = "subcycle"
+
+# Shortest cooling time of the gas at the start of the last cooling step in seconds (see CoolingTime)
+tcoolmin = np.inf
+# Number of times the cooling was solved in the last step (see Integrator.SetCoolingPolicy)
+nsubcycles = 1
+
+# Skip solving the cooling in cells it would barely change, e.g. gas in thermal equilibrium?
+# A cell is skipped while the change in its temperature since it was last cooled, at the rate it
+#  was cooling (or heating) at, is less than skipTolerance times its temperature
+# This change is added on the next time the cell is cooled, so slowly cooling gas still cools
+# The cooling time of each cell is kept with its nH, T and Zsolar and only worked out again
+#  once one of these changes by more than skipTolerance, so cells the hydro leaves alone cost nothing
+skipCells = False
+skipTolerance = 1e-3
+# Number of active cells skipped in the last step (see Integrator().coolingSkipped)
+nskipped = 0
+# State of each cell when its cooling time was last worked out, and its change in temperature since it was last cooled
+_skipCache = None
+
+def _SelectSolver():
+    """
+    Pass the choice of rates and solver on to the cooling module
+    """
+    if rates not in ("table", "analytic"):
+        print("Error: cooling.rates must be \"table\" or \"analytic\", got", rates)
+        raise ValueError
+    if solver not in ("subcycle", "exact"):
+        print("Error: cooling.solver must be \"subcycle\" or \"exact\", got", solver)
+        raise ValueError
+    cooling_module.cooling_tables.usetable = int(rates == "table")
+    cooling_module.cooling_exact.useexact = int(solver == "exact")
+
+def CoolingTime():
+    """
+    Calculate the cooling time of each cell, the time it would take to lose its 
+     thermal energy at the rate it is cooling now
+    Cells that are heating up have an infinite cooling time
+
+    Returns
+    -------
+
+    tcool : array
+        cooling time of each active cell in seconds
+    """
+    hydro = integrator.Integrator().hydro
+    ncell = hydro.nactive
+    _SelectSolver()
+    tcool, theat = _ThermalTimes(hydro.nH[0:ncell],hydro.T[0:ncell],hydro.Zsolar[0:ncell])
+    return tcool
+
+def _ThermalTimes(nH, T2, zsolar):
+    """
+    Cooling and heating times of the cells given, infinite for cells heating or cooling respectively
+    """
+    hydro = integrator.Integrator().hydro
+    _SelectSolver()
+    tcool, theat = cooling_module.cooling_time(nH,T2,zsolar,hydro.gamma,len(nH))
+    tcool[tcool >= np.finfo(np.float64).max] = np.inf
+    theat[theat >= np.finfo(np.float64).max] = np.inf
+    return tcool, theat
+
+def ClearSkipCache():
+    """
+    Forget the cooling times kept for skipping cells (see skipCells)
+    Called by the integrator when the cells are set up again, e.g. in Reset and Regrid
+    """
+    global _skipCache, nskipped
+    _skipCache = None
+    nskipped = 0
+
+def TemperatureChange(dt, cells=None):
     """
     Calculate the temperature change needed for each cell
 
@@ -23,19 +103,27 @@ def TemperatureChange(dt):
 
     dt : float
         timestep in seconds
+    cells : array
+        indices of the active cells to cool, leaving the others unchanged (Optional, default: every cell)
     """
     # Initialise
     hydro = integrator.Integrator().hydro
-    ncell = hydro.ncells
+    ncell = hydro.nactive
     nH = hydro.nH[0:ncell]
     T2 = hydro.T[0:ncell]
     xhii = hydro.xhii
     zsolar = hydro.Zsolar[0:ncell]
     gamma = hydro.gamma
+    _SelectSolver()
     # Solve the change in temperature
     # Uses the model by Audit & Hennebelle (2005)
     # Used in the FRIGG project by Patrick Hennebelle
-    dT2 = cooling_module.solve_cooling_frig(nH,T2,zsolar,dt,gamma,ncell)
+    if cells is None:
+        dT2 = cooling_module.solve_cooling_frig(nH,T2,zsolar,dt,gamma,ncell)
+    else:
+        dT2 = np.zeros(ncell)
+        if len(cells) > 0:
+            dT2[cells] = cooling_module.solve_cooling_frig(nH[cells],T2[cells],zsolar[cells],dt,gamma,len(cells))
     # Remove cooling blip in very centre that might be eating energy
     dT2[0:1] = 0.0
     return dT2
@@ -53,7 +141,7 @@ def MaskContactDiscontinuityV1(dT2):
         temperature change to mask out
     """
     hydro = integrator.Integrator().hydro
-    ncell = hydro.ncells
+    ncell = hydro.nactive
     shock = np.where(hydro.T[0:ncell] >= 1e6)[0]
     if len(shock) > 0:
         edge = shock[-1]
@@ -76,7 +164,7 @@ def MaskContactDiscontinuityV2(dT2):
         ionised gas temperature
     """
     hydro = integrator.Integrator().hydro
-    ncell = hydro.ncells
+    ncell = hydro.nactive
     T = hydro.T[0:ncell]
     shock = np.where(hydro.T[0:ncell] >= 1e6)[0]
     if len(shock) > 0:
@@ -98,35 +186,125 @@ def MaskContactDiscontinuityV2(dT2):
     return dT2
 
 
-def solve_cooling(dt):
+def solve_cooling(dt, fraction=None, maxsubcycles=1):
     """
     Solve the cooling step
+    Sets tcoolmin to the shortest cooling time on the grid at the start of the step,
+     and nskipped to the number of cells skipped if skipCells is on
 
     Parameters
     ----------
 
     dt : float
         timestep in seconds
+    fraction : float
+        If set, solve the cooling in as many equal subcycles as it takes to make each
+         no longer than fraction times tcoolmin (Optional)
+    maxsubcycles : integer
+        Largest number of subcycles to solve the cooling in (Default: 1)
     """
-    # Solve the change in temperature and modify the grid
+    global tcoolmin, nsubcycles, nskipped
     hydro = integrator.Integrator().hydro
-    ncell = hydro.ncells
-    dT2 = TemperatureChange(dt)
-    # Mask wind shock to prevent numerical diffusion cooling effects
-    if maskContactDiscontinuity:
-        dT2 = MaskContactDiscontinuityV2(dT2)
-    hydro.T[0:ncell] += dT2
-    # Note that the radiation module, if it runs, will heat the 
-    #  photoionised gas back up
-    # Make sure the resulting temperatures aren't negative
-    CheckTemperature()
+    ncell = hydro.nactive
+    cells = None
+    if skipCells:
+        cells, dTskipped = _CellsToCool(dt)
+        tcoolmin = np.min(_skipCache["tcool"][1:], initial=np.inf)
+    else:
+        nskipped = 0
+        # The first cell isn't cooled (see TemperatureChange)
+        tcoolmin = np.min(CoolingTime()[1:], initial=np.inf)
+    nsubcycles = 1
+    if fraction is not None and dt > fraction*tcoolmin:
+        nsubcycles = int(min(np.ceil(dt/(fraction*tcoolmin)), maxsubcycles))
+    for subcycle in range(nsubcycles):
+        # Solve the change in temperature and modify the grid
+        dT2 = TemperatureChange(dt/nsubcycles, cells)
+        # Add on the change in temperature of the cells cooled in the steps they were skipped in
+        if subcycle == 0 and cells is not None:
+            dT2[cells] += dTskipped
+        # Mask wind shock to prevent numerical diffusion cooling effects
+        if maskContactDiscontinuity:
+            dT2 = MaskContactDiscontinuityV2(dT2)
+        hydro.Add("T", dT2, slice(0,ncell))
+        # Note that the radiation module, if it runs, will heat the 
+        #  photoionised gas back up
+        # Make sure the resulting temperatures aren't negative
+        CheckTemperature()
+
+def _CellsToCool(dt):
+    """
+    Find the active cells to cool this step if skipCells is on, and update the cache of cooling times
+
+    Parameters
+    ----------
+
+    dt : float
+        timestep in seconds
+
+    Returns
+    -------
+
+    cells : array
+        indices of the cells to cool
+    dTskipped : array
+        change in temperature of each of these cells in the steps it was skipped in
+    """
+    global _skipCache, nskipped
+    if not skipTolerance > 0.0:
+        print("Error: cooling.skipTolerance must be larger than 0, got", skipTolerance)
+        raise ValueError
+    hydro = integrator.Integrator().hydro
+    ncell = hydro.nactive
+    nH = hydro.nH[0:ncell]
+    T2 = hydro.T[0:ncell]
+    zsolar = hydro.Zsolar[0:ncell]
+    # Start new cells (e.g. when the active region grows) with no cooling time kept
+    cache = _skipCache
+    if cache is None or len(cache["nH"]) != ncell:
+        old = cache
+        cache = {"nH": np.zeros(ncell), "T": np.zeros(ncell), "Zsolar": np.zeros(ncell),
+                 "tcool": np.full(ncell, np.inf), "theat": np.full(ncell, np.inf),
+                 "known": np.zeros(ncell, dtype=bool), "dTskipped": np.zeros(ncell)}
+        if old is not None:
+            nold = min(ncell, len(old["nH"]))
+            for key in cache:
+                cache[key][0:nold] = old[key][0:nold]
+        _skipCache = cache
+    # Work the cooling time out again in cells that have changed since it was last worked out
+    changed = np.logical_not(cache["known"])
+    for field, values in (("nH", nH), ("T", T2), ("Zsolar", zsolar)):
+        changed |= np.abs(values - cache[field]) > skipTolerance*np.abs(cache[field])
+    redo = np.where(changed)[0]
+    if len(redo) > 0:
+        cache["tcool"][redo], cache["theat"][redo] = _ThermalTimes(nH[redo], T2[redo], zsolar[redo])
+        cache["nH"][redo] = nH[redo]
+        cache["T"][redo] = T2[redo]
+        cache["Zsolar"][redo] = zsolar[redo]
+        cache["known"][redo] = True
+    # Cool the cells that would have changed by more than skipTolerance since they were last cooled
+    # The first cell is never cooled (see TemperatureChange), so doesn't count as skipped
+    dTdt = cache["T"]/cache["theat"] - cache["T"]/cache["tcool"]
+    dTskipped = cache["dTskipped"] + dTdt*dt
+    cool = np.abs(dTskipped) >= skipTolerance*T2
+    cool[0] = False
+    cells = np.where(cool)[0]
+    nskipped = ncell - 1 - len(cells)
+    # Cooling changes the temperature of the cells cooled, so their cooling time is out of date
+    dTcells = cache["dTskipped"][cells]
+    cache["dTskipped"][cells] = 0.0
+    cache["known"][cells] = False
+    skipped = np.where(np.logical_not(cool))[0]
+    cache["dTskipped"][skipped] += dTdt[skipped]*dt
+    cache["dTskipped"][0] = 0.0
+    return cells, dTcells
 
 def CheckTemperature():
     """
     Check for and fix super low tempertaures
     """
     hydro = integrator.Integrator().hydro
-    ncell = hydro.ncells
+    ncell = hydro.nactive
     T2 = hydro.T[0:ncell]
     # Extra check for low temperatures
     T2[T2 < 1.0] = 1.0
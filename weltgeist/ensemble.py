@@ -0,0 +1,305 @@
+"""
+Batched ensembles of independent 1D models run in a single VH1 grid
+Each model is one row of the grid (j index) and has its own timestep
+"""
+
+import numpy as np
+
+from . import hydro, integrator, units
+
+class BatchIntegrator(object):
+    """
+    Runs nmodels independent spherical models with ncells cells each
+    The hydro for every model is advanced inside VH1 without returning to Python
+
+    Fields are 2D arrays in cgs units indexed as field[model, cell]
+    Each model can be given its own constant wind with SetWind
+    NOTE: cooling, gravity and radiation are not solved in batch mode
+    NOTE: this uses the same VH1 grid as Integrator, so only one of these can be set up at once
+    """
+    def __init__(self,
+            nmodels,
+            ncells = 512,
+            rmax = 20.0*units.pc,
+            n0 = 1000.0, # H atoms / cm^-3
+            T0 = 10.0, # K
+            gamma = 5.0/3.0,
+            grid = "uniform",
+            rmin = None,
+            precision = "double"):
+        """
+        Constructor, sets up the grid
+
+        Parameters
+        ----------
+
+        nmodels: integer
+            Number of independent models to run
+        ncells: integer
+            Number of cells to use in each model
+            default: 512
+        rmax: float
+            Sets the maximum size of the grid
+            default: 20 pc
+        n0: float
+            Sets the initial Hydrogen number density of the gas
+            default: 1000 cm^-3
+        T0: float
+            Sets the initial temperature of the gas
+            default: 10 K
+        gamma: float
+            Sets the adiabatic index of the gas
+            default: 5/3 (monatomic)
+        grid: string
+            Spacing of the cells in radius, "uniform" or "log" (see Integrator.Setup)
+            default: "uniform"
+        rmin: float
+            Width of the innermost cell for grid="log"
+            default: None
+        precision: string
+            Precision VH1 keeps the state of the gas in, "double" or "single" (see Integrator.Setup)
+            default: "double"
+        """
+        # Only one grid can be used at once, whichever build of VH1 it is in
+        if hydro._GridInUse():
+            print("Error: VH1 grid already set up! Run Reset() on the integrator first")
+            raise RuntimeError
+        if grid not in ("uniform", "log"):
+            print("Error: grid must be \"uniform\" or \"log\", got", grid)
+            raise ValueError
+        if grid == "log" and rmin is None:
+            print("Error: rmin must be set for a logarithmic grid")
+            raise ValueError
+        if grid == "log":
+            integrator._CheckLogGrid(ncells, rmax, rmin)
+        # Each build of VH1 has its own settings, so send the hydro settings (e.g. the Riemann solver) to this one
+        hydro._SelectPrecision(precision)
+        integrator.Integrator()._ApplySettings()
+        vh1 = hydro.vh1()
+
+        # Derived quantities
+        rho0 = n0*units.mp # g cm^-3
+        P0 = n0*units.kB*T0 # ergs cm^-3
+
+        # Define the computational grid, one model in each j row
+        vh1.imax = ncells
+        vh1.jmax = nmodels
+        vh1.kmax = 1
+        vh1.batchmode = 1
+        vh1.fast1d = 0
+        vh1.isothermal = 0
+
+        # Spherical grid, reflecting inner boundary and outflow outer boundary
+        # (see Integrator.Setup for the flags)
+        vh1.ngeomx = 2
+        vh1.ngeomy = 4
+        vh1.ngeomz = 5
+
+        vh1.nleftx = 0
+        vh1.nrightx= 1
+        vh1.nlefty = 0
+        vh1.nrighty= 1
+        vh1.nleftz = 0
+        vh1.nrightz= 1
+
+        vh1.xmin   = 0.0
+        vh1.xmax   = rmax/units.distance
+        vh1.ymin   = 0.0
+        vh1.ymax   = 1.0
+        vh1.zmin   = 0.0
+        vh1.zmax   = 1.0
+
+        if grid == "log":
+            vh1.xgrid = 1
+            vh1.dxmin = rmin/units.distance
+        else:
+            vh1.xgrid = 0
+
+        vh1.gam    = gamma
+        vh1.nzextra = 0
+        vh1.nzscalar = 0
+
+        # Initialise the computational grid, forgetting any views of an earlier grid (see hydro._BindState)
+        hydro._UnbindState()
+        vh1.setup()
+        integrator._CheckGridMade()
+
+        # Now set up the hydro variables for the problem
+        # (VH1 keeps the state in one block, see hydro._statefields)
+        state = vh1.zstate
+        state[0:ncells,0:nmodels,0,hydro._statefields.index("ro")] = rho0/units.density
+        state[0:ncells,0:nmodels,0,hydro._statefields.index("pr")] = P0/units.pressure
+        state[0:ncells,0:nmodels,0,hydro._statefields.index("ux")] = 0.0
+
+        self.nmodels = nmodels
+        self.ncells = ncells
+        self.gamma = gamma
+
+        # Fields indexed [model, cell] (VH1 stores them as [cell, model])
+        def _MakeField(name, unit, docstring):
+            index = hydro._statefields.index(name)
+            def _get(slicer):
+                # (in double precision whichever precision VH1 keeps the state in)
+                return np.asarray(hydro.vh1().zstate[:,:,0,index].T[slicer], dtype=np.float64)*unit
+            def _set(slicer,val):
+                hydro.vh1().zstate[:,:,0,index].T[slicer] = val/unit
+            return hydro._Field(docstring,_get,_set)
+        self._rho = _MakeField("ro", units.density, "Gas density in g/cm^3")
+        self._P = _MakeField("pr", units.pressure, "Gas pressure in erg/cm^3")
+        self._vel = _MakeField("ux", units.velocity, "Gas velocity in cm/s")
+
+        # Derived fields
+        def _nHget(slicer):
+            return self.rho[slicer]/units.mH*units.X
+        def _nHset(slicer,val):
+            self.rho[slicer] = val*units.mH/units.X
+        self._nH = hydro._Field("Hydrogen number density in atoms/cm^3",_nHget,_nHset)
+        # NOTE: assumes neutral gas (no photoionisation in batch mode)
+        def _Tget(slicer):
+            return self.P[slicer]/self.nH[slicer]/units.kB
+        def _Tset(slicer,val):
+            self.P[slicer] = val*self.nH[slicer]*units.kB
+        self._T = hydro._Field("Gas temperature in K",_Tget,_Tset)
+
+    def Reset(self):
+        """
+        Reset the grid so that a new BatchIntegrator or Integrator can be set up
+        """
+        hydro.vh1().reset()
+        hydro.vh1().batchmode = 0
+
+    def SetThreads(self, nthreads):
+        """
+        Sets the number of OpenMP threads used to run the models
+        Each thread runs whole models, so there is no point using more threads than models
+        This only has an effect if Weltgeist was built with -DWELTGEIST_OPENMP=ON
+
+        Parameters
+        ----------
+
+        nthreads: integer
+            number of threads to use
+        """
+        nthreadsnow, openmp = hydro.vh1().getthreads()
+        if not openmp and nthreads > 1:
+            print("Warning: VH1 was built without OpenMP, running on one thread")
+        hydro.vh1().setthreads(nthreads)
+
+    def SetWind(self, model, lum, massloss):
+        """
+        Give a model a constant wind injected into its first cell
+        Same as Sources().MakeWind in Integrator
+
+        Parameters
+        ----------
+
+        model: integer or slice
+            Model(s) to inject the wind into
+        lum : float
+            Luminosity (energy per unit time) to inject in erg / s
+        massloss : float
+            Mass to inject per unit time in g/s
+        """
+        hydro.vh1().rowlum[model] = lum / (units.energy / units.time)
+        hydro.vh1().rowmdot[model] = massloss / (units.mass / units.time)
+        # Limit the timestep to the wind velocity, as in Integrator.CourantLimiter
+        vwind = np.sqrt(2.0*lum/massloss)
+        hydro.vh1().rowvdtext[model] = vwind / units.velocity / hydro.vh1().zdx[0]
+
+    def Advance(self, tend, nsteps=None):
+        """
+        Run every model to the time tend inside VH1
+        Each model takes its own timesteps, and the last one lands exactly on tend
+
+        Parameters
+        ----------
+
+        tend: float
+            Time to advance all the models to in seconds
+        nsteps: integer
+            Maximum number of steps to take (Optional)
+            Models that have not reached tend are left at their own times
+
+        Returns
+        -------
+
+        nstepsdone: integer
+            Number of steps taken by the slowest model
+
+        Raises TimestepCollapseError if the timestep of any model collapses,
+         leaving each model as it was after its last step
+         (the models that collapsed keep their collapsed timestep)
+        """
+        if nsteps is None:
+            nsteps = np.iinfo(np.int32).max
+        nstepsdone = int(hydro.vh1().advancerows(nsteps, tend/units.time))
+        if hydro.vh1().errorcode != 0:
+            rowtime = hydro.vh1().rowtime
+            collapsed = np.where(~(rowtime/hydro.vh1().rowdt <= 1e20))[0]
+            print("Error: the timestep has collapsed in models", collapsed, "at times", rowtime[collapsed]*units.time, "s")
+            raise integrator.TimestepCollapseError("timestep collapsed in models "+str(collapsed))
+        return nstepsdone
+
+    @property
+    def x(self):
+        """
+        Position of the inner edge of each cell in cm (same for every model)
+        """
+        return hydro.vh1().zxa[0:self.ncells]*units.distance
+
+    @property
+    def dx(self):
+        """
+        Width of each cell in cm (same for every model)
+        """
+        return hydro.vh1().zdx[0:self.ncells]*units.distance
+
+    @property
+    def time(self):
+        """
+        Time reached by each model in seconds
+        """
+        return hydro.vh1().rowtime[0:self.nmodels]*units.time
+
+    @property
+    def dt(self):
+        """
+        Last timestep of each model in seconds
+        """
+        return hydro.vh1().rowdt[0:self.nmodels]*units.time
+
+    # Field properties, indexed [model, cell]
+    @property
+    def rho(self):
+        return self._rho
+    @rho.setter
+    def rho(self,val):
+        self._rho[:,:] = val
+
+    @property
+    def P(self):
+        return self._P
+    @P.setter
+    def P(self,val):
+        self._P[:,:] = val
+
+    @property
+    def vel(self):
+        return self._vel
+    @vel.setter
+    def vel(self,val):
+        self._vel[:,:] = val
+
+    @property
+    def nH(self):
+        return self._nH
+    @nH.setter
+    def nH(self,val):
+        self._nH[:,:] = val
+
+    @property
+    def T(self):
+        return self._T
+    @T.setter
+    def T(self,val):
+        self._T[:,:] = val
@@ -163,9 +163,243 @@ def __len__(self):
 
 
 
+# Builds of VH1 loaded so far by precision, and the one in use (see _SelectPrecision)
+# Double precision is used unless single precision is chosen
+_builds = {"double": vhone.data}
+_vh1 = _builds["double"]
+
+def vh1():
+    """
+    Get the build of VH1 in use, which keeps the state of the gas in double or single precision
+    Everything reaches VH1 through this, so don't keep the module it returns
+    Each build holds its own grid and settings (e.g. the Courant number and Riemann solver)
+
+    Returns
+    -------
+
+    data: f2py module data
+        Variables and routines of the VH1 build in use
+    """
+    return _vh1
+
+def _SelectPrecision(precision):
+    """
+    Choose the build of VH1 that keeps the state of the gas in double or single precision
+    The settings made in Python have to be sent to the chosen build afterwards
+     (see Integrator._ApplySettings), and only choose one while no grid is set up (see _GridInUse)
+
+    Parameters
+    ----------
+
+    precision: string
+        "double" or "single"
+    """
+    global _vh1
+    if precision not in ("double", "single"):
+        print("Error: precision must be \"double\" or \"single\", got", precision)
+        raise ValueError
+    _UnbindState()
+    if precision not in _builds:
+        try:
+            from . import vhone_single
+        except ImportError:
+            print("Error: single precision needs the vhone_single module, which was not built")
+            raise
+        _builds["single"] = vhone_single.data
+    _vh1 = _builds[precision]
+
+def _GridInUse():
+    """
+    Check whether a grid is set up in any build of VH1
+    There is one Integrator, so only one grid can be used at once whichever build it is in
+    """
+    return any(build.maxsweep > 0 for build in _builds.values())
+
+# Fields in the block VH1 keeps the state of the gas in, in order (see zonemod.f90)
+# The first are VH1's own, in code units, then the ones kept for Python:
+#  ionisation fraction, metallicity in solar units and magnetic pressure in code units
+_vh1fields = ("ro", "pr", "ux", "uy", "uz", "fl", "gr")
+_extrafields = ("xhii", "zsolar", "pb")
+_statefields = _vh1fields + _extrafields
+# Extra fields that VH1 can move with the gas as passive scalars, which come first (see scalars.f90)
+# These are amounts per unit mass; the magnetic pressure isn't, so it stays where it is
+_scalarfields = ("xhii", "zsolar")
+
+def _ResolveBlock():
+    """
+    Look up the state of every cell in VH1 as a (field, cell) array, fields as in _statefields
+    Writing to the array changes it in VH1
+    VH1 keeps a single grid as a 3D block with the fields after each other, or as a 1D block 
+     with ghost zones if it uses the 1D spherical fast path (see Integrator.Setup)
+    The 3D block is single precision in the single precision build (see _SelectPrecision)
+    """
+    if vh1().fast1d == 1:
+        return vh1().state1d.T[:,6:6+vh1().imax]
+    return vh1().zstate[:,0,0,:].T
+
+def _ResolveState(name):
+    """
+    Look up a hydro variable of every cell in VH1 as a 1D array in code units
+    Writing to the array changes it in VH1
+
+    Parameters
+    ----------
+
+    name: string
+        field in _statefields, e.g. "ro", "pr", "ux" or "gr" (density, pressure, velocity, gravity)
+    """
+    return _ResolveBlock()[_statefields.index(name)]
+
+# Views of the VH1 arrays for the current grid, made once in _BindState
+# Each f2py attribute lookup makes a new array object, which adds up in hot loops
+_views = {}
+
+def _BindState():
+    """
+    Make the views of the VH1 arrays that _State returns
+    This must be run after VH1 allocates its arrays (setup), since the views point into them
+    """
+    _views.clear()
+    _views["state"] = _ResolveBlock()
+    for index, name in enumerate(_statefields):
+        _views[name] = _views["state"][index]
+    _views["xa"] = vh1().zxa[0:vh1().imax]
+
+def _UnbindState():
+    """
+    Forget the views of the VH1 arrays
+    This must be run before VH1 frees its arrays (reset), since the views would point at freed memory
+    """
+    _views.clear()
+
+def _State(name):
+    """
+    Get a hydro variable of every cell from VH1 as a 1D array in code units
+    Writing to the array changes it in VH1
+    Uses the views made in _BindState if there are any, and looks the array up otherwise
+
+    Parameters
+    ----------
+
+    name: string
+        field in _statefields, "xa" (cell inner edges) or "state" (every field)
+    """
+    try:
+        return _views[name]
+    except KeyError:
+        if name == "xa":
+            return vh1().zxa[0:vh1().imax]
+        if name == "state":
+            return _ResolveBlock()
+        return _ResolveState(name)
+
+def _StateValues(name, slicer):
+    """
+    Get some cells of a hydro variable from VH1 in code units as doubles
+    This gives the same results whichever precision VH1 keeps the state in
+
+    Parameters
+    ----------
+
+    name: string
+        field in _statefields, e.g. "ro", "pr", "ux" or "gr" (density, pressure, velocity, gravity)
+    slicer: integer or slice
+        cells to get
+    """
+    values = _State(name)[slicer]
+    if values.dtype != np.float64:
+        values = values.astype(np.float64)
+    return values
+
+class _RawState(object):
+    """
+    The hydro variables in VH1 as 1D arrays in code units, without any copying
+    These are the arrays VH1 works on, so writing to them changes the simulation
+    They are for hot loops (e.g. cooling, radiation or user step functions) that
+     would otherwise spend their time converting units and making new arrays
+    NOTE: the arrays change when the grid changes (Setup, Reset, Regrid), so get them again after that
+          In the single precision build the arrays are single precision
+          Writing to them doesn't clear the derived fields (e.g. T), so run hydro.InvalidateCache after
+    """
+    @property
+    def rho(self):
+        """
+        Mass density of the gas in code units (units.density)
+        """
+        return _State("ro")
+    @property
+    def P(self):
+        """
+        Gas thermal + magnetic pressure in code units (units.pressure)
+        """
+        return _State("pr")
+    @property
+    def vel(self):
+        """
+        Gas velocity in code units (units.velocity)
+        """
+        return _State("ux")
+    @property
+    def grav(self):
+        """
+        Gravitational acceleration in code units (units.gravity)
+        """
+        return _State("gr")
+    @property
+    def x(self):
+        """
+        Position of the inner edge of each cell in code units (units.distance)
+        """
+        return _State("xa")
+
+_raw = _RawState()
+
 _internalvariables = {}
 _fieldvariables = {}
 
+# Derived fields (e.g. temperature) for every cell, kept until the state of the gas changes
+# Fields like T are made from several others, and are read many times each step (e.g. in radiation)
+_derivedcache = {}
+_cachecounters = {"hits": 0, "misses": 0}
+
+def _InvalidateDerived():
+    """
+    Forget the derived fields, since the state of the gas they are made from has changed
+    """
+    _derivedcache.clear()
+
+def _Derived(name, compute, slicer):
+    """
+    Get a derived field, computing it for every cell if it isn't in the cache
+
+    Parameters
+    ----------
+
+    name: string
+        Name of the field in the cache
+    compute: function
+        Function that computes the field for a given slicer
+    slicer: integer or slice
+        cells to get
+
+    Returns
+    -------
+
+    values: array
+        A copy of the field in the cells, so that changing it doesn't change the cache
+    """
+    # Single cells are quicker to compute directly than to compute the whole field for
+    if isinstance(slicer, (int, np.integer)):
+        return compute(slicer)
+    values = _derivedcache.get(name)
+    if values is None:
+        _cachecounters["misses"] += 1
+        values = compute(slice(None))
+        _derivedcache[name] = values
+    else:
+        _cachecounters["hits"] += 1
+    return np.array(values[slicer])
+
 def MakeNewHydro():
     '''
     Reset hydro variables and make a new object
@@ -177,6 +411,9 @@ def MakeNewHydro():
         _internalvariables[key] = 0.0
     for key in _fieldvariables.keys():
         _fieldvariables[key] = 0.0
+    _InvalidateDerived()
+    for key in _cachecounters.keys():
+        _cachecounters[key] = 0
     return _Hydro()
 
 class _Hydro(object):
@@ -215,38 +452,21 @@ class _Hydro(object):
     # HYDRO FIELDS
     # ---------------
     # TODO: MAKE EVERY FIELD A PYTHON @PROPERTY
-    # WARNING: This assumes a constant spherical grid
+    # WARNING: This assumes a spherical grid that only changes through _SetupGrid
     def __init__(self):
         global _internalvariables
         global _fieldvariables
-        self.ncells = vhone.data.imax
-
-        # Set up variables that need to be made once the data is initialised
-        # Cells should be evenly spaced in radius, where self.x[0] is 0.0, if not throw value error
-        # Grid spacing
-        x = self.x[:]
-        self._dx = x[1]
-        if self._dx != (x[2] - x[1]):
-            print("Grid not evenly spaced!")
-            raise ValueError
-
-        # Cell volume
-        # vol = dx*(x*(x+dx)+dx*dx/3.0) # from volume.f90
-        # NOTE: x is the *inside* radius, so vol = 4/3*pi*[(r+dr)**3 - r**3]
-        self._vol = 4*np.pi*(x**2*self.dx + x*self.dx**2 + self.dx**3/3.0)
-
-        # Set up variables stored here (needs to be done once ncells is set, hence this indirect approach)
-        for key in _internalvariables.keys():
-            _internalvariables[key] = np.zeros(self.ncells)
-        _internalvariables["Zsolar"] += 1
+        self._SetupGrid()
 
         # Set up derived variables / variables using other Fields
         """ 
         THERMAL PRESSURE
         Remove magnetic pressure from the gas and return thermal pressure
         """
-        def _PThget(slicer):
+        def _PThcompute(slicer):
             return self.P[slicer] - self.PMagnetic[slicer]
+        def _PThget(slicer):
+            return _Derived("PThermal",_PThcompute,slicer)
         def _PThset(slicer,val):
             val2 = val + self.PMagnetic[slicer]
             self.P[slicer] = val2
@@ -260,8 +480,10 @@ def _PThset(slicer,val):
                 kinetic energy
                 This is done because it is correct for e.g. wind injection
         """
-        def _Mget(slicer):
+        def _Mcompute(slicer):
             return self.vol[slicer]*self.rho[slicer]
+        def _Mget(slicer):
+            return _Derived("mass",_Mcompute,slicer)
         def _Mset(slicer,val):
             # Make sure mass injection is elastic!
             oldke = self.KE[slicer]
@@ -275,8 +497,10 @@ def _Mset(slicer,val):
         Calculated using the ideal gas equation
         Changing it will alter the pressure & keep density the same
         """
-        def _Tget(slicer):
+        def _Tcompute(slicer):
             return self.PThermal[slicer]/self.nH[slicer]/units.kB/(1.0+self.xhii[slicer])
+        def _Tget(slicer):
+            return _Derived("T",_Tcompute,slicer)
         def _Tset(slicer,val):
             # Set the pressure from the ideal gas equation
             newP = val*self.nH[slicer]*units.kB*(1.0+self.xhii[slicer])
@@ -289,8 +513,10 @@ def _Tset(slicer,val):
         Related to temperature
         Changing it is similar to changing the temperature
         """
-        def _Csget(slicer):
+        def _Cscompute(slicer):
             return np.sqrt(self.gamma*self.PThermal[slicer]/self.rho[slicer])
+        def _Csget(slicer):
+            return _Derived("cs",_Cscompute,slicer)
         def _Csset(slicer,val):
             # Set the pressure from the ideal gas equation
             newP = val**2.0 * self.rho[slicer] / self.gamma
@@ -303,10 +529,13 @@ def _Csset(slicer,val):
         1/2 m v^2
         Changing it changes the velocity, not the density
         """
-        def _KEget(slicer):
+        def _KEcompute(slicer):
             return 0.5*self.mass[slicer]*self.vel[slicer]**2.0
+        def _KEget(slicer):
+            return _Derived("KE",_KEcompute,slicer)
         def _KEset(slicer,val):
-            vhone.data.zux[slicer,0,0] = np.sqrt(2.0*val/self.mass[slicer])/units.velocity
+            _State("ux")[slicer] = np.sqrt(2.0*val/self.mass[slicer])/units.velocity
+            _InvalidateDerived()
         _KEstring = "Gas kinetic energy in erg"
         self._KE._assigngetset(_KEstring,_KEget,_KEset)
 
@@ -315,9 +544,11 @@ def _KEset(slicer,val):
         Uses ideal gas assuming atomic composition (3/2 P V)
         Changing it changes the pressure
         """
-        def _TEget(slicer):
+        def _TEcompute(slicer):
             # 3/2 P V
             return 1.5 * self.PThermal[slicer] * self.vol[slicer]
+        def _TEget(slicer):
+            return _Derived("TE",_TEcompute,slicer)
         def _TEset(slicer,val):
             self.PThermal[slicer] = val/(1.5*self.vol[slicer])
         _TEstring = "Gas thermal energy in erg"
@@ -347,14 +578,14 @@ def _GPEset(slicer,val):
         """
         # Magnetic pressure field objects
         def _PMagneticget(slicer):
-            return _internalvariables["PMagnetic"][slicer]
+            return _StateValues("pb",slicer)*units.pressure
         def _PMagneticset(slicer,val):
             # Modify both the global pressure and the magnetic pressure tracker
-            PBdiff = val - _internalvariables["PMagnetic"][slicer]
-            _internalvariables["PMagnetic"][slicer] += PBdiff
+            PBdiff = val - self.PMagnetic[slicer]
+            _State("pb")[slicer] += PBdiff/units.pressure
             self.P[slicer] += PBdiff
         _PMagneticstring = "Gas magnetic pressure in erg/cm^3"
-        # NOTE: The magnetic pressure is stored as a numpy array below
+        # NOTE: The magnetic pressure is stored in the VH1 state block, but not used by VH1
         self._PMagneticField._assigngetset(_PMagneticstring,_PMagneticget,_PMagneticset)
 
         """ 
@@ -372,6 +603,36 @@ def _Bset(slicer,val):
         self._Bfield._assigngetset(_Bstring,_Bget,_Bset)
 
 
+    def _SetupGrid(self):
+        """
+        Set up the grid variables and the variables stored in Python for the current VH1 grid
+        This is run again if the grid is remapped (see regrid.py), which resets the Python variables
+        """
+        global _internalvariables
+        self.ncells = int(vh1().imax) # (int, since f2py gives a view of imax, which changes)
+        _BindState()
+        _InvalidateDerived()
+
+        # Set up variables that need to be made once the data is initialised
+        # Grid spacing of each cell (the grid can be uniform or logarithmic, see Integrator.Setup)
+        x = self.x[:]
+        self._dx = vh1().zdx[0:self.ncells]*units.distance
+
+        # Cell volume
+        # vol = dx*(x*(x+dx)+dx*dx/3.0) # from volume.f90
+        # NOTE: x is the *inside* radius, so vol = 4/3*pi*[(r+dr)**3 - r**3]
+        self._vol = 4*np.pi*(x**2*self.dx + x*self.dx**2 + self.dx**3/3.0)
+
+        # Space for working out changes to the VH1 arrays in Add, and the index of each cell to size it with
+        self._work = np.zeros(self.ncells)
+        self._cellindex = np.arange(self.ncells)
+
+        # Set up variables stored here (needs to be done once ncells is set, hence this indirect approach)
+        for key in _internalvariables.keys():
+            _internalvariables[key] = np.zeros(self.ncells)
+        # VH1 starts the extra fields in its state block at zero
+        _State("zsolar")[:] = 1.0
+
     # Views to hydro variables in VH-1
     """
     Utility functions for setting up fields as class properties
@@ -397,6 +658,20 @@ def _set(slicer,val):
             _internalvariables[fieldname][slicer] = val
         return _Field(docstring,_get,_set)
 
+    def BlockField(name,docstring,derivedfrom=False):
+        """
+        Basic field kept in the VH1 state block for Python, which VH1 doesn't use
+        If derivedfrom is True, derived fields are made from it, so setting it clears them from the cache
+        """
+        def _get(slicer):
+            # Copy, as the other fields do, so that the values outlive the grid
+            return np.array(_State(name)[slicer], dtype=np.float64)
+        def _set(slicer,val):
+            _State(name)[slicer] = val
+            if derivedfrom:
+                _InvalidateDerived()
+        return _Field(docstring,_get,_set)
+
     """ 
     BASIC VARIABLES---------------------------------
     These variables represent the basic fluid values
@@ -407,24 +682,24 @@ def _set(slicer,val):
     Grid positions are (so far) not changeable
     """
     def _xget(slicer):
-        return vhone.data.zxa[slicer]*units.distance
+        return _State("xa")[slicer]*units.distance
     def _xset(slicer,val):
         print("Error: You can't set the grid coordinates by hand - instead run integrator.Reset and integrator.Setup again")
         raise ValueError
-    _xstring = "Position of each cell in cm - should be uniformly spaced with 0th position at 0.0 cm"
+    _xstring = "Position of the inner edge of each cell in cm, with 0th position at 0.0 cm"
     _x = _Field(_xstring,_xget,_xset)
     x = property(*propertyargs(_x))
 
     """ 
     GRID SPACING
-    This returns a scalar for the grid cells
+    This returns the width of each cell
     Doesn't need a whole field variable to itself, can't be set
     """
     _dx = None # Define in __init__
     @property
     def dx(self):
         """
-        Grid spacing in cm - grid is uniform so this is the same for all cells
+        Width of each cell in cm (the same for all cells if the grid is uniform)
         """
         return self._dx
     
@@ -440,14 +715,90 @@ def vol(self):
         """
         return self._vol
 
+    """ 
+    RAW VARIABLES
+    The VH1 arrays themselves, in code units
+    """
+    @property
+    def raw(self):
+        """
+        The density, pressure, velocity, gravity and cell positions in VH1 as arrays in code units
+        These are not copied, so are faster to use than the other fields in loops, 
+         and writing to them changes the simulation (see _RawState)
+        e.g. hydro.raw.rho[0:10] *= 2.0
+        """
+        return _raw
+
+    """ 
+    STATE BLOCK
+    Every field of the state of the gas in one array
+    """
+    @property
+    def state(self):
+        """
+        The state of the gas in VH1 as one (field, cell) array in code units, without copying
+        The fields are in the order of hydro.statefields, e.g. hydro.state[hydro.stateindex["pr"]]
+         is the pressure, and include xhii, Zsolar and the magnetic pressure kept for Python
+        Writing to it changes the simulation (run hydro.InvalidateCache after, as for hydro.raw)
+        NOTE: The array changes when the grid changes (Setup, Reset, Regrid), as with hydro.raw
+        """
+        return _State("state")
+
+    statefields = _statefields
+    stateindex = {name: index for index, name in enumerate(_statefields)}
+
+    def GetState(self):
+        """
+        Copy the state of the gas (see state), e.g. to go back to later with SetState
+
+        Returns
+        -------
+
+        state: array
+            Copy of hydro.state
+        """
+        return np.array(_State("state"))
+
+    def SetState(self, state):
+        """
+        Set the state of the gas (see state) from a copy, e.g. one made with GetState
+
+        Parameters
+        ----------
+
+        state: array
+            State of the gas, with the same shape as hydro.state
+        """
+        block = _State("state")
+        if np.shape(state) != block.shape:
+            print("Error: state has shape", np.shape(state), "but the grid needs", block.shape)
+            raise ValueError
+        block[...] = state
+        _InvalidateDerived()
+
+    """ 
+    ACTIVE REGION
+    Number of cells from the centre that are evolved
+    Cells outside this are frozen (see Integrator.SetActiveRegion)
+    """
+    @property
+    def nactive(self):
+        """
+        Number of cells from the centre that are evolved (ncells unless the active region is on)
+        """
+        if vh1().activeregion == 1:
+            return int(vh1().iactive)
+        return self.ncells
+
     """ 
     DENSITY (rho)
     This is the total mass density in each grid cell
     """
     def _rhoget(slicer):
-        return vhone.data.zro[slicer,0,0]*units.density
+        return _StateValues("ro",slicer)*units.density
     def _rhoset(slicer,val):
-        vhone.data.zro[slicer,0,0] = val/units.density
+        _State("ro")[slicer] = val/units.density
+        _InvalidateDerived()
     _rhostring = "Mass density of the gas in g/cm^3"
     _rho = _Field(_rhostring,_rhoget,_rhoset)
     rho = property(*propertyargs(_rho))
@@ -457,9 +808,10 @@ def _rhoset(slicer,val):
     """
     def _nHget(slicer):
         #return self.rho[slicer]/units.mH*units.X
-        return vhone.data.zro[slicer,0,0]/units.mH*units.X*units.density
+        return _StateValues("ro",slicer)/units.mH*units.X*units.density
     def _nHset(slicer,val):
-        vhone.data.zro[slicer,0,0] = val*units.mH/units.X/units.density
+        _State("ro")[slicer] = val*units.mH/units.X/units.density
+        _InvalidateDerived()
     _nHstring = "Hydrogen number density of the gas in cm^{-3}"
     _nH = _Field(_nHstring,_nHget,_nHset)
     nH = property(*propertyargs(_nH))
@@ -471,9 +823,10 @@ def _nHset(slicer,val):
         VH1 does not include kinetic energy in this
     """
     def _Pget(slicer):
-        return vhone.data.zpr[slicer,0,0]*units.pressure
+        return _StateValues("pr",slicer)*units.pressure
     def _Pset(slicer,val):
-        vhone.data.zpr[slicer,0,0] = val/units.pressure
+        _State("pr")[slicer] = val/units.pressure
+        _InvalidateDerived()
     _Pstring = "Gas thermal + magnetic pressure in erg/cm^3 (note: does not include kinetic energy)"
     _P = _Field(_Pstring,_Pget,_Pset)
     P = property(*propertyargs(_P))
@@ -489,9 +842,10 @@ def _Pset(slicer,val):
     This is the velocity of the gas flow in each cell
     """
     def _velget(slicer):
-        return vhone.data.zux[slicer,0,0]*units.velocity
+        return _StateValues("ux",slicer)*units.velocity
     def _velset(slicer,val):
-        vhone.data.zux[slicer,0,0] = val/units.velocity
+        _State("ux")[slicer] = val/units.velocity
+        _InvalidateDerived()
     _velstring = "Gas velocity in cm/s (+ve away from centre)"
     _vel = _Field(_velstring,_velget,_velset)
     vel = property(*propertyargs(_vel))
@@ -549,8 +903,6 @@ def _velset(slicer,val):
     MAGNETIC PRESSURE
     Magnetic pressure stored below
     """
-    # Memory space for magnetic pressure
-    _internalvariables["PMagnetic"] = None
     _PMagneticField = _Field()
     PMagnetic = property(*propertyargs(_PMagneticField))
     """ 
@@ -563,20 +915,21 @@ def _velset(slicer,val):
     PYTHON-ONLY VARIABLES---------------------------------------
     These variables do not affect the underlying simulation code
     They are used in the Python-only modules (e.g. radiation)
+    xhii and Zsolar are part of the state of the gas, so are kept in the VH1 state block (see state)
     """
     """ 
     HYDROGEN IONISATION FRACTION xHII
     What fraction of hydrogen is ionised?
     """
     #_xhii = np.zeros(self.ncells)
-    _xhiiField = PythonField("xii","Hydrogen ionisation fraction (from 0 to 1)")
+    _xhiiField = BlockField("xhii","Hydrogen ionisation fraction (from 0 to 1)",derivedfrom=True)
     xhii = property(*propertyargs(_xhiiField))
     """ 
     METALLICITY Z
     What is the mass fraction of metals?
     Given as a fraction of solar (Z=0.014)
     """
-    _ZsolarField = PythonField("Zsolar","Gas metallicity (in solar units, where Zsolar=0.014)")
+    _ZsolarField = BlockField("zsolar","Gas metallicity (in solar units, where Zsolar=0.014)")
     Zsolar = property(*propertyargs(_ZsolarField))
     """ 
     IONISING PHOTON RATE
@@ -597,13 +950,118 @@ def _velset(slicer,val):
             We need a good test problem to make sure the units are ok
     """
     def _Gget(slicer):
-        return vhone.data.zgr[slicer,0,0]*units.gravity
+        return _StateValues("gr",slicer)*units.gravity
     def _Gset(slicer,val):
-        vhone.data.zgr[slicer,0,0] = val/units.gravity
+        _State("gr")[slicer] = val/units.gravity
     _gravstring = "Gravitational acceleration in cm/s^2"
     _grav = _Field(_gravstring,_Gget,_Gset)
     grav = property(*propertyargs(_grav))
 
+    """ 
+    IN-PLACE UPDATES
+    Add to a field by changing the VH1 arrays directly
+    """
+    _addablefields = ("rho", "nH", "P", "PThermal", "vel", "T", "TE", "mass", "KE")
+
+    def Add(self, name, delta, slicer=slice(None)):
+        """
+        Add to a field in place, e.g. hydro.Add("T", dT, slice(0,n)) does the same as hydro.T[0:n] += dT
+        This changes the density, pressure or velocity in VH1 in one pass, without getting and 
+         setting each field the field is made from, so is quicker for updates made every step
+        As when setting the fields, adding mass keeps the kinetic energy, and adding mass or
+         kinetic energy leaves the velocity pointing away from the centre
+
+        Parameters
+        ----------
+
+        name: string
+            Field to add to: "rho", "nH", "P", "PThermal", "vel", "T", "TE", "mass" or "KE"
+        delta: float or array
+            Amount to add to each cell, in the same units as the field
+        slicer: integer, slice or array
+            cells to add to (Optional, default: every cell)
+        """
+        if name not in self._addablefields:
+            print("Error: can't add to", name, ", only to", self._addablefields)
+            raise ValueError
+        if isinstance(slicer, (int, np.integer)):
+            slicer = slice(slicer, slicer+1)
+        # Work out the change in code units in the space kept for it
+        work = self._work[0:len(self._cellindex[slicer])]
+        ro = _State("ro")
+        pr = _State("pr")
+        ux = _State("ux")
+        if name == "rho":
+            np.multiply(delta, 1.0/units.density, out=work)
+            ro[slicer] += work
+        elif name == "nH":
+            np.multiply(delta, units.mH/units.X/units.density, out=work)
+            ro[slicer] += work
+        elif name in ("P", "PThermal"):
+            # (the magnetic pressure doesn't change, so the thermal pressure changes with P)
+            np.multiply(delta, 1.0/units.pressure, out=work)
+            pr[slicer] += work
+        elif name == "vel":
+            np.multiply(delta, 1.0/units.velocity, out=work)
+            ux[slicer] += work
+        elif name == "T":
+            # P = nH kB T (1 + xhii)
+            np.add(self.xhii[slicer], 1.0, out=work)
+            work *= ro[slicer]
+            work *= delta
+            work *= units.density*units.X/units.mH*units.kB/units.pressure
+            pr[slicer] += work
+        elif name == "TE":
+            # TE = 3/2 P V
+            np.divide(delta, self.vol[slicer], out=work)
+            work *= 1.0/(1.5*units.pressure)
+            pr[slicer] += work
+        elif name == "mass":
+            # Keeping the kinetic energy, v^2 goes as 1/rho
+            np.divide(delta, self.vol[slicer], out=work)
+            work *= 1.0/units.density
+            work += ro[slicer]
+            np.divide(ro[slicer], work, out=work)
+            ro[slicer] /= work
+            np.sqrt(work, out=work)
+            work *= np.abs(ux[slicer])
+            ux[slicer] = work
+        elif name == "KE":
+            # v^2 = 2 KE / (rho vol)
+            np.divide(delta, self.vol[slicer], out=work)
+            work /= ro[slicer]
+            work *= 2.0/(units.density*units.velocity**2)
+            work += ux[slicer]**2
+            np.sqrt(work, out=work)
+            ux[slicer] = work
+        _InvalidateDerived()
+
+    """ 
+    DERIVED FIELD CACHE
+    Derived fields (PThermal, mass, T, cs, KE, TE) are kept for every cell until the state changes
+    Setting any field clears them, as does each hydro step (see Integrator.Step)
+    """
+    def InvalidateCache(self):
+        """
+        Clear the cache of derived fields
+        Only needed after changing the state without using the fields, e.g. writing to hydro.raw
+        """
+        _InvalidateDerived()
+
+    @property
+    def cachehits(self):
+        """
+        Number of times a derived field was found in the cache since the hydro was made
+        """
+        return _cachecounters["hits"]
+
+    @property
+    def cachemisses(self):
+        """
+        Number of times a derived field had to be computed since the hydro was made
+        """
+        return _cachecounters["misses"]
+
     @property
     def gamma(self):   
         """ 
@@ -617,5 +1075,5 @@ def gamma(self):
         gamma: float
             adiabatic index
         """
-        return vhone.data.gam
+        return vh1().gam
 
@@ -67,8 +67,8 @@ def init():
         #vhone.data.zpr[0,0,0] = 1e7 # simple 1D planar Sedov test
 
         nx = vhone.data.imax
-        vhone.data.zro[0:nx,0,0] = rho0/units.density
-        vhone.data.zpr[0:nx,0,0] = P0/units.pressure
+        vhone.data.zstate[0:nx,0,0,0] = rho0/units.density
+        vhone.data.zstate[0:nx,0,0,1] = P0/units.pressure
 
         initialised = True
 
@@ -3,10 +3,60 @@
 Sam Geen, February 2018
 """
 
+import collections
 import h5py
 import numpy as np
 
-from . import cooling, hydro, gravity, sources, units, radiation, processtimer, outflowtracker, vhone
+from . import cooling, hydro as _hydro, gravity, sources, units, radiation, processtimer, outflowtracker, regrid, timestep
+
+# Riemann solvers in VH1 (see Integrator.SetRiemannSolver)
+_riemannsolvers = {"exact": 0, "twoshock": 1, "hllc": 2}
+
+class TimestepCollapseError(RuntimeError):
+    """
+    Raised when the hydro timestep becomes too small to go on (or NaN), e.g. if the gas has gone unphysical
+    The integrator first tries to recover from this by itself (see Integrator.SetRecovery)
+    """
+    pass
+
+def _CheckTimestep():
+    """
+    Raise TimestepCollapseError if VH1 stopped because the timestep collapsed
+    """
+    if _hydro.vh1().errorcode == 1:
+        time = _hydro.vh1().time * units.time
+        print("Error: the hydro timestep has collapsed at time", time, "s")
+        raise TimestepCollapseError("timestep collapsed at time "+str(time)+" s")
+
+def _CheckLogGrid(ncells, rmax, rmin):
+    """
+    Check a logarithmic grid of ncells cells out to rmax can start with a cell of width rmin
+    Each cell is wider than the one inside it, so rmin has to be less than rmax/ncells
+
+    Parameters
+    ----------
+
+    ncells: integer
+        Number of cells in the grid
+    rmax, rmin: float
+        Size of the grid and width of the innermost cell in cm
+    """
+    if not rmin > 0.0:
+        print("Error: rmin must be larger than 0, got", rmin)
+        raise ValueError
+    if rmin*ncells >= rmax:
+        print("Error: rmin must be smaller than rmax/ncells =", rmax/ncells, "for a logarithmic grid, got", rmin)
+        raise ValueError
+
+def _CheckGridMade():
+    """
+    Raise ValueError if VH1 couldn't make the grid asked for in setup, leaving no grid set up
+    """
+    if _hydro.vh1().errorcode == 2:
+        _hydro.vh1().reset()
+        _hydro.vh1().errorcode = 0
+        print("Error: VH1 couldn't make the logarithmic grid, rmin is too large or not positive")
+        raise ValueError
 
 # Instance the integrator, using singleton pattern
 _integrator = None
@@ -69,15 +119,20 @@ def Save(self):
         filename = self._folder+"/snapshot_"+str(self._iout).zfill(5)
         integrator.Save(filename)
 
-    def CheckSave(self):
+    def NextSaveTime(self):
         """
-        Check if we need to save, and do it if so
+        Find the next time this saver needs to save at
+
+        Returns
+        -------
+
+        timeToSave: float
+            Next time to save in seconds, or None if there is nothing to save
         """
-        integrator = Integrator()
         timesToSave = []
         if self._dtout is None and self._timesToSave is None:
                 # No instructions for when to save, just return
-                return
+                return None
         # Use the list of times to save
         if self._timesToSave is not None:
             try:
@@ -86,18 +141,27 @@ def CheckSave(self):
                 timesToSave.append(timeToSave)
             except IndexError:
                 # Current time outside time bounds, ignore
-                return
+                return None
         if self._dtout is not None:
             # Find the next time to save by incrementing from the last time we saved
             timeToSave = self._tlast + self._dtout
             timesToSave.append(timeToSave)
         if len(timesToSave) == 0:
-            return
+            return None
         # Find the first time to save (if more than one method of saving is implemented)
-        timeToSave = min(timesToSave)
+        return min(timesToSave)
+
+    def CheckSave(self):
+        """
+        Check if we need to save, and do it if so
+        """
+        integrator = Integrator()
+        timeToSave = self.NextSaveTime()
+        if timeToSave is None:
+            return
         atTargetTime = False
         if self._forceExactTimes:
-            atTargetTime = integrator.ForceTimeTarget(timeToSave)
+            atTargetTime = integrator.ForceTimeTarget(timeToSave, name="save")
         # Add a paranoid check where either:
         # 1. the integrator reports hitting its target time, or
         # 2. the integrator's current time is past the time to save
@@ -126,6 +190,32 @@ def __init__(self):
         # Make an empty process timer object
         self._processTimer = processtimer.ProcessTimer() 
         self._outflowTracker = None
+        self._grid = "uniform"
+        self._fast1d = False
+        self._eos = "adiabatic"
+        self._precision = "double"
+        self._advect = True
+        # Hydro settings kept across runs, sent to whichever build of VH1 Setup chooses (see _ApplySettings)
+        self._riemannSolver = "exact"
+        self._ompMinCells = 10000
+        # Expanding grid settings (off if _expandFraction is None, see SetExpandingGrid)
+        self._expandFraction = None
+        self._expandFactor = 2.0
+        self._expandBackground = None
+        self._expandTolerance = 1e-6
+        # Recent states to go back to if the timestep collapses (see SetRecovery, off until it is called)
+        self._snapshots = collections.deque(maxlen=0)
+        self._recoveryRetries = 3
+        self._recoveryCourantFactor = 0.5
+        self._recoverySolver = "hllc"
+        self._recoveryInterval = 1000
+        self._recoveries = 0
+        # How the hydro keeps up with fast cooling (see SetCoolingPolicy)
+        self._coolingPolicy = "none"
+        self._coolingFraction = 0.5
+        self._maxCoolingSubcycles = 100
+        # Sets the Courant number and logs the constraints on each step
+        self._timestep = timestep.TimestepController()
 
     def Save(self,filename):
         '''
@@ -138,21 +228,28 @@ def Save(self,filename):
         # Save a file format version
         # v1.0.0 - Original format
         # v1.01 - Added B field
-        version = 1.04
+        # v1.05 - Added grid type
+        # v1.06 - Added equation of state
+        version = 1.06
         file.attrs['version'] = str(version)
         # Save setup parameters
         hydro = self.hydro
         ncells = hydro.ncells
         file.create_dataset("ncells", data=(ncells,), dtype=np.int32)
-        rmax = vhone.data.xmax * units.distance
+        rmax = _hydro.vh1().xmax * units.distance
         file.create_dataset("rmax", data=(rmax,), dtype=np.float64)
+        # Grid type (0 = uniform, 1 = logarithmic) and width of the innermost cell
+        file.create_dataset("xgrid", data=(_hydro.vh1().xgrid,), dtype=np.int32)
+        file.create_dataset("rmin", data=(_hydro.vh1().zdx[0] * units.distance,), dtype=np.float64)
         # (Note: we don't save n0 and T0 because these overwritten by the grid state)
         file.create_dataset("gamma",data=(hydro.gamma,),dtype=np.float64)
+        # Equation of state (0 = adiabatic, 1 = isothermal)
+        file.create_dataset("isothermal",data=(int(self._eos == "isothermal"),),dtype=np.int32)
         # Save the time variables
-        file.create_dataset("time",data=(vhone.data.time,),dtype=np.float64)
+        file.create_dataset("time",data=(_hydro.vh1().time,),dtype=np.float64)
         file.create_dataset("dt",data=(self._dt_code,),dtype=np.float64)
         # Save courant limiter
-        file.create_dataset("vcourant",data=(vhone.data.vdtext,),dtype=np.float64)
+        file.create_dataset("vcourant",data=(_hydro.vh1().vdtext,),dtype=np.float64)
         # Save the basic hydro variables
         file.create_dataset("rho",data=hydro.rho[0:ncells],dtype=np.float64)
         file.create_dataset("P",data=hydro.P[0:ncells],dtype=np.float64)
@@ -198,6 +295,15 @@ def loaditem(varname):
         ncells = loaditem("ncells")
         rmax = loaditem("rmax")
         gamma = loaditem("gamma")
+        grid = "uniform"
+        rmin = None
+        if version >= 1.05:
+            if loaditem("xgrid") == 1:
+                grid = "log"
+                rmin = loaditem("rmin")
+        eos = "adiabatic"
+        if version >= 1.06 and loaditem("isothermal") == 1:
+            eos = "isothermal"
         # Do a check that the loaded values don't clash with the setup values
         if self._initialised:
             hydro = self.hydro
@@ -205,11 +311,17 @@ def loaditem(varname):
             # Reset the grid?
             if hydro.ncells != ncells:
                 toReset = True
-            if vhone.data.xmax != rmax / units.distance:
+            if _hydro.vh1().xmax != rmax / units.distance:
+                toReset = True
+            if grid != self._grid:
+                toReset = True
+            if rmin is not None and _hydro.vh1().zdx[0] != rmin / units.distance:
                 toReset = True
             if gamma != hydro.gamma:
                 # TODO: Don't just reset for this? Check
                 toReset = True
+            if eos != self._eos:
+                toReset = True
             if toReset:
                 print("Grid properties have changed, resetting grid...")
                 self.Reset()
@@ -220,17 +332,23 @@ def loaditem(varname):
                 rmax = rmax,
                 n0 = 1000.0, # H atoms / cm^-3
                 T0 = 10.0, # K
-                gamma = gamma)
+                gamma = gamma,
+                grid = grid,
+                rmin = rmin,
+                fast1d = self._fast1d,
+                eos = eos,
+                precision = self._precision,
+                advect = self._advect)
             hydro = self.hydro
         # Update time
         time = loaditem("time")
         dt = loaditem("dt")
         self._time_code = time
-        vhone.data.time = time
+        _hydro.vh1().time = time
         self._dt_code = dt
-        vhone.data.time = time
+        _hydro.vh1().time = time
         # Update the courant limiter
-        vhone.data.vdtext = loaditem("vcourant")
+        _hydro.vh1().vdtext = loaditem("vcourant")
         # Update the hydro variables
         hydro.rho[0:ncells] = loaditem("rho")
         hydro.P[0:ncells] = loaditem("P")
@@ -287,7 +405,7 @@ def RemoveSaver(self, saver):
         saver: _Saver object
             Object to pop off the list of savers to monitor
         """
-        self._savers.remove(Saver)
+        self._savers.remove(saver)
 
 
     def Setup(self,
@@ -295,7 +413,13 @@ def Setup(self,
             rmax = 20.0*units.pc,
             n0 = 1000.0, # H atoms / cm^-3
             T0 = 10.0, # K
-            gamma = 5.0/3.0):
+            gamma = 5.0/3.0,
+            grid = "uniform",
+            rmin = None,
+            fast1d = False,
+            eos = "adiabatic",
+            precision = "double",
+            advect = True):
         """
         Main initialisation function
         Note that the grid can be altered at any time using the hydro module
@@ -318,14 +442,68 @@ def Setup(self,
         gamma: float
             Sets the adiabatic index of the gas
             default: 5/3 (monatomic)
+        grid: string
+            Spacing of the cells in radius, "uniform" or "log"
+            "log" makes each cell wider than the one inside it by a constant factor
+            default: "uniform"
+        rmin: float
+            Width of the innermost cell for grid="log" (ignored for a uniform grid)
+            default: None
+        fast1d: boolean
+            Use the 1D spherical fast path in VH1, which keeps the gas in 1D arrays
+              and sweeps them in place instead of copying them to and from 3D arrays
+            Gives the same results, but faster on large grids
+            default: False
+        eos: string
+            Equation of state of the gas, "adiabatic" or "isothermal"
+            "isothermal" gas has gamma = 1 (the gamma parameter is ignored) and no energy equation
+              in the hydro, so it is much cheaper when heating and cooling balance instantly
+            Each cell keeps the temperature it has at the start of each step as the gas moves,
+              so different gas can have different temperatures (e.g. T0 for neutral gas and
+              the temperature set by radiation for photoionised gas)
+            Cooling can't be used with isothermal gas
+            default: "adiabatic"
+        precision: string
+            Precision VH1 keeps the density, pressure and velocity of each cell in, "double" or "single"
+            "single" halves the memory the state takes up, so it is faster on big grids
+              but less accurate; the hydro itself still works in double precision
+            Fields are always returned in double precision, and saved files are the same
+            The 1D fast path (fast1d) keeps its state in double precision either way
+            default: "double"
+        advect: boolean
+            Move the ionisation fraction xhii and metallicity Zsolar with the gas in the hydro,
+              as passive scalars, rather than leaving them in place as the gas flows through
+            default: True
         """
 
         # Derived quantities
         rho0 = n0*units.mp # g cm^-3
         P0 = n0*units.kB*T0 # ergs cm^-3
 
+        # Check the grid type
+        if grid not in ("uniform", "log"):
+            print("Error: grid must be \"uniform\" or \"log\", got", grid)
+            raise ValueError
+        if grid == "log" and rmin is None:
+            print("Error: rmin must be set for a logarithmic grid")
+            raise ValueError
+        if grid == "log":
+            _CheckLogGrid(ncells, rmax, rmin)
+        # Check the equation of state
+        if eos not in ("adiabatic", "isothermal"):
+            print("Error: eos must be \"adiabatic\" or \"isothermal\", got", eos)
+            raise ValueError
+
         # Running twice is probably an error...?
         if not self._initialised:
+            # Choose the build of VH1 first, since each one has its own grid
+            # Limits on the first step given before Setup went to the build in use before (see timestep.Limit)
+            vdtext = _hydro.vh1().vdtext + 0.0
+            _hydro._SelectPrecision(precision)
+            self._precision = precision
+            self._ApplySettings()
+            vh1 = _hydro.vh1()
+
             """
             Reference from VH1:
             ! Set up geometry and boundary conditions of grid
@@ -346,42 +524,66 @@ def Setup(self,
             """
 
             # Define the computational grid...
-            vhone.data.imax = ncells
-            vhone.data.jmax = 1
-            vhone.data.kmax = 1
+            vh1.imax = ncells
+            vh1.jmax = 1
+            vh1.kmax = 1
             
-            vhone.data.ngeomx = 2
-            vhone.data.ngeomy = 4
-            vhone.data.ngeomz = 5
+            vh1.ngeomx = 2
+            vh1.ngeomy = 4
+            vh1.ngeomz = 5
             
-            vhone.data.nleftx = 0
-            vhone.data.nrightx= 1
-            vhone.data.nlefty = 0
-            vhone.data.nrighty= 1
-            vhone.data.nleftz = 0
-            vhone.data.nrightz= 1
+            vh1.nleftx = 0
+            vh1.nrightx= 1
+            vh1.nlefty = 0
+            vh1.nrighty= 1
+            vh1.nleftz = 0
+            vh1.nrightz= 1
             
-            vhone.data.xmin   = 0.0
-            vhone.data.xmax   = rmax/units.distance
-            vhone.data.ymin   = 0.0
-            vhone.data.ymax   = 1.0
-            vhone.data.zmin   = 0.0
-            vhone.data.zmax   = 1.0
+            vh1.xmin   = 0.0
+            vh1.xmax   = rmax/units.distance
+            vh1.ymin   = 0.0
+            vh1.ymax   = 1.0
+            vh1.zmin   = 0.0
+            vh1.zmax   = 1.0
 
-            #vhone.data.gam    = 1.4 # Diatomic, Value from RAMSES
-            vhone.data.gam    = gamma # Monatomic = 1.66
+            # Logarithmic grids are geometric from xmin with an innermost cell of width dxmin
+            if grid == "log":
+                vh1.xgrid = 1
+                vh1.dxmin = rmin/units.distance
+            else:
+                vh1.xgrid = 0
+            self._grid = grid
 
-            # Initialise the computational grid
-            vhone.data.setup()
+            #vh1.gam    = 1.4 # Diatomic, Value from RAMSES
+            vh1.gam    = gamma # Monatomic = 1.66
+            # Isothermal gas has gamma = 1 and keeps P/rho in each cell (see Setup docstring)
+            vh1.isothermal = int(eos == "isothermal")
+            if eos == "isothermal":
+                vh1.gam = 1.0
+            self._eos = eos
 
-            # Now set up the hydro variables for the problem
-            nx = vhone.data.imax
-            vhone.data.zro[0:nx,0,0] = rho0/units.density
-            vhone.data.zpr[0:nx,0,0] = P0/units.pressure
-            vhone.data.zux[0:nx,0,0] = 0.0
+            # Choose where VH1 keeps the gas and how it sweeps it
+            vh1.fast1d = int(fast1d)
+            self._fast1d = fast1d
+            # Keep the state of the gas used only in Python in the VH1 state block too (see hydro.state)
+            # VH1 advects the first of these fields with the gas
+            vh1.nzextra = len(_hydro._extrafields)
+            vh1.nzscalar = len(_hydro._scalarfields) if advect else 0
+            self._advect = advect
+
+            # Initialise the computational grid
+            vh1.setup()
+            _CheckGridMade()
+            vh1.vdtext = vdtext
 
             # Initialise hydro object for accessing variables
-            self._hydro = hydro.MakeNewHydro()
+            self._hydro = _hydro.MakeNewHydro()
+
+            # Now set up the hydro variables for the problem
+            nx = vh1.imax
+            self._hydro.rho[0:nx] = rho0
+            self._hydro.P[0:nx] = P0
+            self._hydro.vel[0:nx] = 0.0
 
             # Set up an outflow tracker
             self._outflowTracker = outflowtracker.OutflowTracker(self._hydro)
@@ -398,27 +600,94 @@ def Reset(self):
         If ncells and rmax is the same, you don't need to change anything
         """
         if self._initialised:
-            vhone.data.reset()
+            _hydro._UnbindState()
+            _hydro.vh1().reset()
             # Reset the sources
             sources.Sources().Reset()
         self._initialised = False
         self._hydro.Qion = 0.0
         self._outflowTracker.Reset()
+        self._expandFraction = None
+        self._coolingPolicy = "none"
+        cooling.ClearSkipCache()
+        radiation._lastFront = None
+        self._snapshots.clear()
+        self._timestep.Reset()
         # Internal time values
         self._time_code = 0.0
         self._dt_code = 0.0
 
+    def Regrid(self, ncells=None, rmax=None, grid=None, rmin=None, background=None):
+        """
+        Change the grid without stopping the run
+        The gas is remapped conservatively onto the new grid, keeping the total mass, 
+         momentum, energy, ionised hydrogen, metals and magnetic energy in each part of the grid
+        Time, sources and savers carry on as before, unlike Reset and Setup
+        NOTE: the remapped gas is uniform inside each old cell, so refining the grid 
+              doesn't add any detail until the hydro has evolved
+
+        Parameters
+        ----------
+        ncells: integer
+            Number of cells in the new grid (Optional, default: keep the same number)
+        rmax: float
+            Size of the new grid in cm (Optional, default: keep the same size)
+            Gas outside a smaller grid is lost
+        grid: string
+            Spacing of the new cells in radius, "uniform" or "log" (Optional, default: keep the same)
+        rmin: float
+            Width of the innermost cell for grid="log" 
+            (Optional, default: scale the innermost cell of a log grid with rmax/ncells)
+        background: function
+            gives the gas outside the old grid as nH, T = background(r) with r in cm (Optional)
+            default: copy the outermost cell
+        """
+        if not self._initialised:
+            print("Error: grid not initialised! Run integrator.Init()")
+            raise RuntimeError
+        oldrmax = _hydro.vh1().xmax * units.distance
+        if ncells is None:
+            ncells = self.hydro.ncells
+        if rmax is None:
+            rmax = oldrmax
+        if grid is None:
+            grid = self._grid
+        if grid not in ("uniform", "log"):
+            print("Error: grid must be \"uniform\" or \"log\", got", grid)
+            raise ValueError
+        if grid == "log" and self._grid != "log" and rmin is None:
+            print("Error: rmin must be set when changing to a logarithmic grid")
+            raise ValueError
+        if grid == "log" and rmin is not None:
+            _CheckLogGrid(ncells, rmax, rmin)
+        if rmax < oldrmax:
+            print("Warning: new grid is smaller than the old one, gas outside rmax will be lost")
+        timer = self._processTimer
+        timer.Begin("regrid")
+        regrid.RemapGrid(ncells, rmax, grid=grid, rmin=rmin, background=background)
+        self._grid = grid
+        # The states from before and the cooling times kept for skipping cells don't fit the new grid
+        self._snapshots.clear()
+        cooling.ClearSkipCache()
+        timer.End("regrid")
+
     def Step(self):
         """
         Run a single hydrodynamic step
+        If the timestep collapses, the step is retried as set by SetRecovery
         """
-        hydro = self._hydro
-        timer = self._processTimer
-        timer.Begin("step")
-        # Check if the grid has been initialised
         if not self._initialised:
             print("Error: grid not initialised! Run integrator.Init()")
             raise RuntimeError
+        self._RunRecoverable(self._Step)
+
+    def _Step(self):
+        """
+        Run a single hydrodynamic step, raising TimestepCollapseError if the timestep collapses
+        """
+        hydro = self._hydro
+        timer = self._processTimer
+        timer.Begin("step")
         # Update time
         #self._UpdateTime()
         # Gravity step
@@ -432,7 +701,15 @@ def Step(self):
         # Cooling step
         timer.Begin("cooling")
         if cooling.cooling_on:
-            cooling.solve_cooling(self.dt)
+            if self._eos == "isothermal":
+                print("Error: cooling can't be used with an isothermal equation of state")
+                raise RuntimeError
+            if self._coolingPolicy == "subcycle":
+                cooling.solve_cooling(self.dt, self._coolingFraction, self._maxCoolingSubcycles)
+            else:
+                cooling.solve_cooling(self.dt)
+            if self._coolingPolicy == "limit":
+                self._timestep.Limit("cooling", self._coolingFraction*cooling.tcoolmin)
         timer.End("cooling")
         # Inject sources and handle radiation transport
         timer.Begin("sources")
@@ -440,11 +717,18 @@ def Step(self):
         timer.End("sources")
         # Hydro step
         timer.Begin("hydro")
-        vhone.data.step()
+        _hydro.vh1().step()
+        # The derived fields (e.g. T) from before the step are out of date
+        hydro.InvalidateCache()
         timer.End("hydro")
+        if _hydro.vh1().errorcode != 0:
+            timer.End("step")
+            self._timestep._Discard()
+            _CheckTimestep()
         # Update time to make sure the code sees the correct time
         timer.Begin("cleanup")
         self._UpdateTime()
+        self._timestep._EndSteps(self.time, self.dt)
         # Final sanity check
         if cooling.cooling_on:
             cooling.CheckTemperature()
@@ -452,10 +736,404 @@ def Step(self):
         timer.End("step")
         # Run outflow tracker for this step
         self._outflowTracker.TrackForStep(self.dt)
+        # Grow the grid if the gas has expanded far enough
+        self._CheckExpandGrid()
         # Save if necessary (don't time this as it can affect timing)
         for saver in self._savers:
             saver.CheckSave()
 
+    def Advance(self, nsteps=None, tend=None):
+        """
+        Run many hydrodynamic steps in one call
+        Where possible the steps are run inside VH1 without returning to Python,
+         which is much faster than calling Step() on small grids
+        Control comes back to Python at save times, source event times 
+         (e.g. supernovae) and at the end of the run
+        Cooling, gravity, radiation and continuous sources (e.g. winds) need 
+         Python every step, so while they are active this just calls Step()
+
+        Parameters
+        ----------
+        nsteps: integer
+            Maximum number of steps to run (Optional)
+        tend: float
+            Time in seconds to run until (Optional)
+            The last step is shortened to end exactly at tend
+
+        Returns
+        -------
+        nstepsdone: integer
+            Number of steps that were run
+        """
+        if nsteps is None and tend is None:
+            print("Error: set nsteps and/or tend in Advance")
+            raise ValueError
+        if not self._initialised:
+            print("Error: grid not initialised! Run integrator.Init()")
+            raise RuntimeError
+        nstepsdone = 0
+        while nsteps is None or nstepsdone < nsteps:
+            if tend is not None and self._Reached(tend):
+                break
+            # Find the next time we have to come back to Python for
+            targetTimes = [sources.Sources().NextEventTime()]
+            for saver in self._savers:
+                targetTimes.append(saver.NextSaveTime())
+            if tend is not None:
+                targetTimes.append(tend)
+            targetTime = min([t for t in targetTimes if t is not None])
+            if self._NeedsPythonStep() or self._Reached(targetTime):
+                self.Step()
+                nstepsdone += 1
+            else:
+                # Fortran needs a finite number of steps to run
+                stepsleft = 2**31-1
+                if nsteps is not None:
+                    stepsleft = nsteps - nstepsdone
+                # Come back regularly to check whether the grid needs to grow
+                # A shock moves less than a cell per step, so this stops it reaching rmax in between
+                if self._expandFraction is not None:
+                    checksteps = int((1.0 - self._expandFraction) * self.hydro.ncells / 4)
+                    stepsleft = min(stepsleft, max(checksteps, 1))
+                # Keep a state to go back to every so often in case the timestep collapses
+                if self._RecoveryOn():
+                    stepsleft = min(stepsleft, self._recoveryInterval)
+                nstepsdone += self._RunRecoverable(lambda: self._AdvanceHydro(stepsleft, targetTime))
+                self._CheckExpandGrid()
+                for saver in self._savers:
+                    saver.CheckSave()
+        return nstepsdone
+
+    def _Reached(self, targetTime):
+        """
+        Check whether the grid has got to targetTime
+        VH1 lands exactly on targetTime in code units, but converting back to seconds
+         can round it to just below targetTime, so check both
+
+        Parameters
+        ----------
+        targetTime: float
+            Time in seconds
+
+        Returns
+        -------
+        reached: boolean
+            True if the grid time is at or past targetTime
+        """
+        return self.time >= targetTime or self._time_code >= targetTime/units.time
+
+    def _NeedsPythonStep(self):
+        """
+        Check whether anything on the Python side needs to run every step
+        """
+        return cooling.cooling_on or gravity.gravity_on or radiation.radiation_on
+
+    def _AdvanceHydro(self, nsteps, targetTime):
+        """
+        Run pure hydro steps inside VH1 until nsteps or the target time is reached
+
+        Parameters
+        ----------
+        nsteps: integer
+            Maximum number of steps to run
+        targetTime: float
+            Time in seconds to stop at
+
+        Returns
+        -------
+        nstepsdone: integer
+            Number of steps that were run
+        """
+        hydro = self._hydro
+        timer = self._processTimer
+        timer.Begin("advance")
+        # Gravity is off, so make sure nothing is left over from before
+        hydro.grav[0:hydro.ncells] = 0.0
+        # Clear the outflows so we only get the ones from these steps
+        _hydro.vh1().outvol = 0.0
+        _hydro.vh1().outmass = 0.0
+        _hydro.vh1().outmom = 0.0
+        _hydro.vh1().outke = 0.0
+        _hydro.vh1().outpdv = 0.0
+        oldtime = self.time
+        nstepsdone = _hydro.vh1().advance(nsteps, targetTime/units.time)
+        hydro.InvalidateCache()
+        if _hydro.vh1().errorcode != 0:
+            timer.End("advance")
+            self._timestep._Discard()
+            _CheckTimestep()
+        # Update time, using the length of the last step as dt
+        self._time_code = _hydro.vh1().time + 0.0
+        self._dt_code = _hydro.vh1().dt + 0.0
+        self._timestep._EndSteps(self.time, self.dt)
+        timer.End("advance")
+        # Add the flows lost from the grid over these steps
+        self._outflowTracker.TrackIntegratedFlows(self.time - oldtime,
+            _hydro.vh1().outvol * units.distance**3,
+            _hydro.vh1().outmass * units.mass,
+            _hydro.vh1().outmom * units.mass * units.velocity,
+            _hydro.vh1().outke * units.energy,
+            _hydro.vh1().outpdv * units.energy)
+        return nstepsdone
+
+    def SetRecovery(self,nstates=4,retries=3,courantfactor=0.5,solver="hllc",interval=1000):
+        """
+        Set how the integrator recovers if the hydro timestep collapses
+        Before each step (or each run of steps inside VH1 in Advance), the state of the grid 
+         is kept in a ring buffer of the last nstates states
+        If the timestep collapses, the grid goes back to the last state and the steps are 
+         retried with a smaller Courant number, and then with a different Riemann solver
+        If this doesn't work, TimestepCollapseError is raised with the grid as it was before the steps
+        Recovery is off until this is called, since keeping a state copies the whole grid 
+         before every step; without it, TimestepCollapseError is raised straight away
+
+        Parameters
+        ----------
+        nstates: integer
+            Number of states to keep, also for Rollback (Default: 4)
+            0 switches recovery off
+        retries: integer
+            Number of times to retry the steps (Default: 3), 0 switches recovery off
+        courantfactor: float
+            Multiply the Courant number by this on each retry (Default: 0.5)
+        solver: string
+            Riemann solver to use from the second retry on, see SetRiemannSolver (Default: "hllc")
+            None keeps the same solver
+        interval: integer
+            Most steps Advance runs inside VH1 between states (Default: 1000)
+        """
+        if nstates < 0 or retries < 0:
+            print("Error: nstates and retries must be at least 0, got", nstates, retries)
+            raise ValueError
+        if not 0.0 < courantfactor < 1.0:
+            print("Error: courantfactor must be between 0 and 1, got", courantfactor)
+            raise ValueError
+        if solver is not None and solver not in _riemannsolvers:
+            print("Error: Riemann solver must be one of", list(_riemannsolvers), "got", solver)
+            raise ValueError
+        if interval < 1:
+            print("Error: interval must be at least 1, got", interval)
+            raise ValueError
+        self._snapshots = collections.deque(self._snapshots, maxlen=nstates)
+        self._recoveryRetries = retries
+        self._recoveryCourantFactor = courantfactor
+        self._recoverySolver = solver
+        self._recoveryInterval = interval
+
+    @property
+    def recoveries(self):
+        """
+        Number of times the integrator has recovered from a collapsed timestep
+        """
+        return self._recoveries
+
+    def Rollback(self, nstates=1):
+        """
+        Take the grid back to one of the states kept for recovery (see SetRecovery)
+        The states are kept before each step, or each run of steps inside VH1 in Advance
+        Newer states are dropped from the buffer
+
+        Parameters
+        ----------
+        nstates: integer
+            How many states to go back, 1 is the last one kept (Default: 1)
+
+        Returns
+        -------
+        time: float
+            Time in seconds of the grid after going back
+        """
+        if not 1 <= nstates <= len(self._snapshots):
+            print("Error: can only go back between 1 and", len(self._snapshots), "states, got", nstates)
+            raise ValueError
+        for i in range(nstates-1):
+            self._snapshots.pop()
+        self._Restore(self._snapshots.pop())
+        return self.time
+
+    def _RecoveryOn(self):
+        """
+        Check whether states are kept to recover from a collapsed timestep
+        """
+        return self._snapshots.maxlen > 0 and self._recoveryRetries > 0
+
+    def _Snapshot(self):
+        """
+        Keep the current state of the grid in the ring buffer
+        """
+        data = _hydro.vh1()
+        snapshot = {"state": self._hydro.GetState(),
+                    "time": data.time + 0.0, "timep": data.timep + 0.0, "timem": data.timem + 0.0,
+                    "dt": data.dt + 0.0, "vdtext": data.vdtext + 0.0, "iactive": int(data.iactive),
+                    "time_code": self._time_code, "dt_code": self._dt_code,
+                    # The speed of the ionisation front is found from where it was last (see radiation.frontCourant)
+                    "lastFront": radiation._lastFront,
+                    # Sources keep track of what they've done (e.g. a supernova going off and removing itself)
+                    "sources": [(source, dict(source.__dict__)) for source in sources.Sources().sources]}
+        self._snapshots.append(snapshot)
+
+    def _Restore(self, snapshot):
+        """
+        Put the grid back to a state from the ring buffer
+        """
+        data = _hydro.vh1()
+        self._hydro.SetState(snapshot["state"])
+        data.time = snapshot["time"]
+        data.timep = snapshot["timep"]
+        data.timem = snapshot["timem"]
+        data.dt = snapshot["dt"]
+        data.vdtext = snapshot["vdtext"]
+        data.iactive = snapshot["iactive"]
+        cooling.ClearSkipCache()
+        self._time_code = snapshot["time_code"]
+        self._dt_code = snapshot["dt_code"]
+        radiation._lastFront = snapshot["lastFront"]
+        sources.Sources().sources[:] = [source for source, attributes in snapshot["sources"]]
+        for source, attributes in snapshot["sources"]:
+            source.__dict__.update(attributes)
+
+    def _RunRecoverable(self, run):
+        """
+        Run some steps, going back and retrying them if the timestep collapses (see SetRecovery)
+
+        Parameters
+        ----------
+        run: function
+            Runs the steps, raising TimestepCollapseError if the timestep collapses
+
+        Returns
+        -------
+        result: 
+            What run returns
+        """
+        if not self._RecoveryOn():
+            return run()
+        self._Snapshot()
+        try:
+            return run()
+        except TimestepCollapseError:
+            pass
+        snapshot = self._snapshots[-1]
+        courant = _hydro.vh1().courant + 0.0
+        solver = int(_hydro.vh1().riemannsolver)
+        try:
+            for attempt in range(1, self._recoveryRetries+1):
+                self._Restore(snapshot)
+                _hydro.vh1().courant = courant * self._recoveryCourantFactor**attempt
+                if attempt > 1 and self._recoverySolver is not None:
+                    _hydro.vh1().riemannsolver = _riemannsolvers[self._recoverySolver]
+                try:
+                    result = run()
+                except TimestepCollapseError:
+                    continue
+                self._recoveries += 1
+                # Make an adaptive Courant number go down too
+                self._timestep.Event()
+                print("Recovered from the collapsed timestep with Courant number", _hydro.vh1().courant + 0.0,
+                      "and Riemann solver", [name for name, value in _riemannsolvers.items()
+                                             if value == _hydro.vh1().riemannsolver][0])
+                return result
+        finally:
+            _hydro.vh1().courant = courant
+            _hydro.vh1().riemannsolver = solver
+        # Leave the grid as it was before the steps
+        self._Restore(snapshot)
+        print("Error: couldn't recover from the collapsed timestep after", self._recoveryRetries, "retries")
+        raise TimestepCollapseError("couldn't recover after "+str(self._recoveryRetries)+" retries at time "
+                                    +str(self.time)+" s")
+
+    def SetExpandingGrid(self,expand=True,fraction=0.8,factor=2.0,background=None,tolerance=1e-6):
+        """
+        Make the grid grow with the gas flow, keeping the same number of cells
+        Once a disturbance (e.g. a shock) reaches fraction*rmax, the state is remapped 
+         conservatively onto a grid that is factor times bigger (see Regrid)
+        This keeps roughly the same number of cells across a self-similar shell for the whole run
+        Time, sources and savers carry on as before
+        NOTE: the gas outside the disturbance should be a static background like the outermost cell
+
+        Parameters
+        ----------
+        expand: boolean
+            switch the expanding grid on or off (Default: True)
+        fraction: float
+            fraction of rmax the disturbance has to reach before the grid grows (Default: 0.8)
+        factor: float
+            factor to multiply rmax by each time the grid grows (Default: 2)
+        background: function
+            gives the gas outside the old grid as nH, T = background(r) with r in cm (Optional)
+            default: copy the outermost cell
+        tolerance: float
+            relative change in density or pressure that counts as a disturbance (Default: 1e-6)
+        """
+        if not expand:
+            self._expandFraction = None
+            return
+        if fraction <= 0.0 or fraction >= 1.0:
+            print("Error: expanding grid fraction must be between 0 and 1, got", fraction)
+            raise ValueError
+        if factor <= 1.0:
+            print("Error: expanding grid factor must be larger than 1, got", factor)
+            raise ValueError
+        self._expandFraction = fraction
+        self._expandFactor = factor
+        self._expandBackground = background
+        self._expandTolerance = tolerance
+
+    def SetCoolingPolicy(self,policy="limit",fraction=0.5,maxsubcycles=100):
+        """
+        Choose how the hydro keeps up with gas that cools quickly
+        The cooling is solved at the start of each step over the length of the last step,
+         so gas with a cooling time shorter than this (e.g. in a shocked shell) cools
+         without the hydro seeing it
+        "limit": limit the step to fraction times the shortest cooling time on the grid
+                 (cooling.tcoolmin), shown as "cooling" in the timestep log
+        "subcycle": solve the cooling in up to maxsubcycles subcycles each step, each
+                    no longer than fraction times the shortest cooling time (see cooling.nsubcycles)
+        "none": solve the cooling once a step of whatever length the hydro takes (the default)
+        "limit" is cheaper when the hydro costs less than the cooling (e.g. small grids),
+         "subcycle" when only a few cells cool quickly on a grid that is costly to step
+        The policy goes back to "none" on Reset
+
+        Parameters
+        ----------
+        policy: string
+            "limit", "subcycle" or "none" (Default: "limit")
+        fraction: float
+            longest step or subcycle as a fraction of the shortest cooling time (Default: 0.5)
+        maxsubcycles: integer
+            largest number of subcycles in a step for "subcycle" (Default: 100)
+        """
+        if policy not in ("limit", "subcycle", "none"):
+            print("Error: cooling policy must be \"limit\", \"subcycle\" or \"none\", got", policy)
+            raise ValueError
+        if fraction <= 0.0:
+            print("Error: cooling policy fraction must be larger than 0, got", fraction)
+            raise ValueError
+        if maxsubcycles < 1:
+            print("Error: maxsubcycles must be at least 1, got", maxsubcycles)
+            raise ValueError
+        self._coolingPolicy = policy
+        self._coolingFraction = fraction
+        self._maxCoolingSubcycles = int(maxsubcycles)
+
+    @property
+    def coolingSkipped(self):
+        """
+        Number of active cells the cooling was skipped in during the last step
+        Cells are only skipped if cooling.skipCells is on
+        """
+        return cooling.nskipped
+
+    def _CheckExpandGrid(self):
+        """
+        Grow the grid if the expanding grid is on and the gas has reached far enough out
+        """
+        if self._expandFraction is None:
+            return
+        rmax = _hydro.vh1().xmax * units.distance
+        if regrid.ShockRadius(self._expandTolerance) > self._expandFraction * rmax:
+            self.Regrid(rmax = rmax * self._expandFactor, background = self._expandBackground)
+
     @property
     def outflowTracker(self):
         '''
@@ -467,7 +1145,7 @@ def outflowTracker(self):
     # HYDRO FUNCTIONS
     # ---------------
     # Courant limiter function
-    def CourantLimiter(self,vin):
+    def CourantLimiter(self,vin,name="wind"):
         """
         Limits the timestep to prevent flows faster than vin
         VH1 has this already, so in general this isn't really needed
@@ -479,11 +1157,107 @@ def CourantLimiter(self,vin):
         ----------
         vin: float
             velocity to limit the timestep to 
+        name: string
+            name of the constraint in the timestep log (see timestep) (Default: "wind")
+        """
+        # Sources are injected into the first cell
+        self._timestep.Limit(name, self.hydro.dx[0] / vin, courant=True)
+
+    def SetThreads(self,nthreads,mincells=None):
+        """
+        Sets the number of OpenMP threads used by the hydro solver and the cooling
+        This only has an effect if Weltgeist was built with -DWELTGEIST_OPENMP=ON
+        A single grid splits its cells between threads if it has at least mincells cells,
+         since smaller grids run faster on one thread
+        The cooling splits the cells between threads in batches of 128 on any grid
+
+        Parameters
+        ----------
+        nthreads: integer
+            number of threads to use
+        mincells: integer
+            smallest grid to split between threads (Optional, default 10000)
+        """
+        nthreadsnow, openmp = _hydro.vh1().getthreads()
+        if not openmp and nthreads > 1:
+            print("Warning: VH1 was built without OpenMP, running on one thread")
+        _hydro.vh1().setthreads(nthreads)
+        if mincells is not None:
+            self._ompMinCells = mincells
+            _hydro.vh1().ompmincells = mincells
+
+    def SetActiveRegion(self,active=True,buffer=20,tolerance=1e-6):
+        """
+        Only evolve the cells out to just past the furthest disturbance in the gas
+        Cells further out are frozen, which saves time while a shock is small compared to the grid
+        The hydro, timestep, cooling and radiation only run on the active cells
+        The active region grows to keep buffer cells outside the last cell that 
+         has changed from its state when this was called (see hydro.nactive)
+        NOTE: the gas outside the active region should be a uniform, static background 
+              the same as the outermost cell, otherwise everything will be active
+              With cooling on, the background should also be in thermal equilibrium
+        NOTE: only for Integrator (not BatchIntegrator); gravity still runs on every cell
+
+        Parameters
+        ----------
+        active: boolean
+            switch the active region on or off (Default: True)
+        buffer: integer
+            number of cells to keep active past the last disturbed cell (Default: 20)
+        tolerance: float
+            relative change in density or pressure that counts as a disturbance (Default: 1e-6)
+            cells moving faster than tolerance times the sound speed are also disturbed
+        """
+        if not self._initialised:
+            print("Error: grid not initialised! Run integrator.Init()")
+            raise RuntimeError
+        # The hydro stencil reaches 4 cells and a disturbance moves up to one cell per step
+        if buffer < 8:
+            print("Error: active region buffer must be at least 8 cells, got", buffer)
+            raise ValueError
+        _hydro.vh1().setactive(0)
+        if active:
+            _hydro.vh1().activebuffer = buffer
+            _hydro.vh1().activetol = tolerance
+            _hydro.vh1().setactive(1)
+
+    def SetRiemannSolver(self,solver="exact"):
+        """
+        Sets the Riemann solver used by the hydro at each cell interface
+        Can be changed between steps; it also applies to BatchIntegrator since VH1 only has one
+
+        Parameters
+        ----------
+        solver: string
+            "exact" - two-shock solver iterated to convergence (Default)
+            "twoshock" - a single pass of the two-shock solver, cheaper but less accurate for strong shocks
+            "hllc" - HLLC solver, cheapest and most diffusive
+        """
+        if solver not in _riemannsolvers:
+            print("Error: Riemann solver must be one of", list(_riemannsolvers), "got", solver)
+            raise ValueError
+        self._riemannSolver = solver
+        _hydro.vh1().riemannsolver = _riemannsolvers[solver]
+
+    def _ApplySettings(self):
         """
-        vnew = vin / units.velocity / (self.hydro.dx / units.distance)
-        vhone.data.vdtext = max(vhone.data.vdtext,vnew)
+        Send the hydro settings kept on the integrator to the build of VH1 in use
+        Each build keeps its own copy of them, so this is called after choosing 
+         the build in Setup (see hydro._SelectPrecision)
+        """
+        _hydro.vh1().riemannsolver = _riemannsolvers[self._riemannSolver]
+        _hydro.vh1().ompmincells = self._ompMinCells
+        self._timestep._Apply()
+
+    @property
+    def threads(self):
+        """
+        Number of OpenMP threads used by the hydro solver (1 if built without OpenMP)
+        """
+        nthreads, openmp = _hydro.vh1().getthreads()
+        return nthreads
 
-    def ForceTimeTarget(self,targetTime):
+    def ForceTimeTarget(self,targetTime,name="target"):
         """
         Forces the timestep to hit a specific time, e.g. for supernova explosions etc
 
@@ -491,6 +1265,8 @@ def ForceTimeTarget(self,targetTime):
         ----------
         targetTime: float
             time to hit in seconds
+        name: string
+            name of the constraint in the timestep log (see timestep) (Default: "target")
 
         Returns
         -------
@@ -506,7 +1282,7 @@ def ForceTimeTarget(self,targetTime):
             if self.dt > targetdt:
                 # Set the target (inverse) dt in the hydro solver
                 # Use a number slightly < 1 to ensure anything triggers at the correct time
-                vhone.data.vdtext = units.time / targetdt * 0.999999999
+                self._timestep.Limit(name, targetdt / 0.999999999, courant=True)
                 targetHit = True
         return targetHit
 
@@ -518,7 +1294,7 @@ def _UpdateTime(self):
         oldtime = self._time_code
         # The + 0.0 is a fun Python trick to ensure copy by value 
         #   and not reference
-        self._time_code = vhone.data.time + 0.0
+        self._time_code = _hydro.vh1().time + 0.0
         self._dt_code = self._time_code - oldtime
 
     @property
@@ -563,6 +1339,18 @@ def dt(self):
         """
         return self._dt_code*units.time
 
+    @property
+    def timestep(self):
+        """
+        Return the object that sets the Courant number and logs the constraints on each step
+
+        Returns
+        -------
+        timestep : TimestepController
+            controller for the hydro timestep
+        """
+        return self._timestep
+
     @property
     def hydro(self):
         """
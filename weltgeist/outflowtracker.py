@@ -63,7 +63,7 @@ def TrackForStep(self, dt):
             vel = max(0.0,vel)
         vol = h.vol[last]
         # Get area of outer edge of cell
-        area = 4.0 * np.pi * (h.x[last] + 0.5*h.dx)**2
+        area = 4.0 * np.pi * (h.x[last] + 0.5*h.dx[last])**2
         # Volume per timestep leaving the grid
         flowVolume = vel * area * dt
         # Calculate flows through the surface of the last cell
@@ -74,6 +74,29 @@ def TrackForStep(self, dt):
         #   so just roughly integrate over the timstep
         self._photons += h.Qion[last] * dt
 
+    def TrackIntegratedFlows(self, dt, volume, mass, momentum, kinetic, pressurevolume):
+        '''
+        Track flows already summed over several steps, e.g. by Integrator.Advance
+        Only works for the outer edge of the grid, where VH1 sums the flows
+        dt (float) : total time over the steps in seconds
+        volume (float) : volume of gas that left the grid in cm^3
+        mass (float) : mass that left the grid in g
+        momentum (float) : momentum that left the grid in g cm/s
+        kinetic (float) : kinetic energy that left the grid in erg
+        pressurevolume (float) : sum of P * volume leaving the grid in erg
+        '''
+        if self._cellindex != -1:
+            print("Error: VH1 only sums flows through the outer edge of the grid")
+            raise ValueError
+        h = self._hydro
+        last = self._cellindex
+        self._mass += mass
+        self._momentum += momentum
+        # Thermal energy is 3/2 P V, without the magnetic pressure, as in TrackForStep
+        self._energy += kinetic + 1.5*(pressurevolume - h.PMagnetic[last]*volume)
+        # Qion doesn't change when radiation isn't being traced
+        self._photons += h.Qion[last] * dt
+
     def Save(self, fileh5py, version):
         '''
         Save results to file
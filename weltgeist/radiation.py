@@ -5,7 +5,7 @@
 
 import numpy as np
 from . import sources, integrator, units, ionisedtemperatures
-from . import raytracing
+from . import hydro as _hydro, raytracing
 
 # Dust cross section to use (Draine suggests 1e-21 cm^2 / H)
 sigmaDust = 1e-21 
@@ -16,6 +16,13 @@
 # Turn on radiation tracing?
 radiation_on = True
 
+# Limit the timestep so the ionisation front moves at most this fraction of a cell in a step? (None for no limit)
+# The limit is logged with the other constraints on the timestep (see Integrator().timestep)
+frontCourant = None
+
+# Last radius of the ionisation front and the time it was there, to find how fast it moves
+_lastFront = None
+
 def alpha_B_HII(temperature):
     """
     Calculate the HII recombination rate
@@ -57,6 +64,52 @@ def IonisedGasTemperature(Teff, metal):
     Tion = ionisedtemperatures.FindTemperature(Teff, metal)
     return Tion
 
+def limit_front(radius, width):
+    """
+    Limit the next timestep to the time the ionisation front takes to move frontCourant of a cell
+
+    Parameters
+    ----------
+
+    radius : float
+        Radius of the ionisation front in cm
+
+    width : float
+        Width of the cell the front is in, in cm
+    """
+    global _lastFront
+    time = integrator.Integrator().time
+    if _lastFront is not None and time > _lastFront[1]:
+        vfront = abs(radius - _lastFront[0]) / (time - _lastFront[1])
+        if vfront > 0.0:
+            integrator.Integrator().timestep.Limit("ionisation front", frontCourant * width / vfront)
+    _lastFront = (radius, time)
+
+def recombinations_out_to(nx, alpha_B):
+    """
+    Rate of recombinations per radial element in the first nx cells, and the
+     total number of ionising photon absorptions out to each of them
+
+    Parameters
+    ----------
+
+    nx : integer
+        Number of cells from the centre to find the recombinations in
+
+    alpha_B : float
+        HII recombination rate in cm^3 / s
+    """
+    hydro = integrator.Integrator().hydro
+    T = hydro.T[0:nx]
+    x = hydro.x[0:nx]
+    dx = hydro.dx[0:nx]
+    # Rate of recombinations per radial element
+    drecombinationsdr = 4.0*np.pi*(x+dx)**2.0 * hydro.nH[0:nx]**2.0 * alpha_B
+    drecombinationsdr[T > 1e5] = 0.0 # Assume collisionally ionised
+    # Total number of ionising photon absorptions
+    recombinations = np.cumsum(drecombinationsdr * dx)
+    return drecombinationsdr, recombinations
+
 def trace_radiation(Lionising, Lnonionising, Eionising, Tion, doRadiationPressure):
     """
     Trace a ray through the spherical grid and ionise everything in the way
@@ -99,34 +152,40 @@ def trace_radiation(Lionising, Lnonionising, Eionising, Tion, doRadiationPressur
         # Fallback to just using the gas temperature for recombining gas
         alpha_B = alpha_B_HII(hydro.T[:]) 
     alpha_B = 2.7e-13
-    nx = hydro.ncells
+    # Only trace through the active region (see Integrator.SetActiveRegion)
+    nx = hydro.nactive
+    drecombinationsdr, recombinations = recombinations_out_to(nx, alpha_B)
+
+    # If the photons get out of the active region, widen it once to just past
+    #  the cell where they are all used up (or to the whole grid)
+    if nx < hydro.ncells and recombinations[-1] < QH:
+        drecombinationsdr, recombinations = recombinations_out_to(hydro.ncells, alpha_B)
+        reach = min(np.searchsorted(recombinations, QH), hydro.ncells-1)
+        _hydro.vh1().extendactive(reach+1)
+        nx = hydro.nactive
+        drecombinationsdr = drecombinationsdr[0:nx]
+        recombinations = recombinations[0:nx]
+
     T = hydro.T[0:nx]
     x = hydro.x[0:nx]
-    dx = hydro.dx
+    dx = hydro.dx[0:nx]
     c = units.c
 
     # Set up radiation tracing
     hydro.Qion[0] = QH
     if sigmaDust is not None:
         hydro.sigmaDust[0:nx] = sigmaDust # cm^2 / H based on Draine+ 2011
-    hydro.sigmaDust[T > 1e5] = 0.0 # simplicity hack - remove dust from hot gas
-
-    # Rate of recombinations per radial element
-    drecombinationsdr = 4.0*np.pi*(x[0:nx]+dx)**2.0 * hydro.nH[0:nx]**2.0 * alpha_B
-    drecombinationsdr[T > 1e5] = 0.0 # Assume collisionally ionised
-
-    # Total number of ionising photon absorptions
-    recombinations = np.cumsum(drecombinationsdr) * dx
+    hydro.sigmaDust[np.where(T > 1e5)[0]] = 0.0 # simplicity hack - remove dust from hot gas
 
     # Calculate new Qion along ray (function will modify hydro.Qion)
     raytracing.trace_radiation(dx,hydro.Qion[0:nx],hydro.sigmaDust[0:nx],hydro.nH[0:nx],drecombinationsdr,nx)
 
     # Calculate optical depth for non-ionising radiation
-    opticalDepth = np.cumsum(hydro.nH[0:nx] * hydro.sigmaDust[0:nx]) * dx
+    opticalDepth = np.cumsum(hydro.nH[0:nx] * hydro.sigmaDust[0:nx] * dx)
 
     # Calculate recombinations first
-    numatomspercell = hydro.nH*hydro.vol
-    numionspercell = numatomspercell * hydro.xhii
+    numatomspercell = hydro.nH[0:nx]*hydro.vol[0:nx]
+    numionspercell = numatomspercell * hydro.xhii[0:nx]
     numionspercell -= recombinations*dt
     numionspercell[np.where(numionspercell < 0)] = 0.0
     hydro.xhii[0:nx] = numionspercell / numatomspercell
@@ -146,7 +205,7 @@ def trace_radiation(Lionising, Lnonionising, Eionising, Tion, doRadiationPressur
             toionise = (recombinations < QH)
         #print(len(hydro.xhii[ionised]) / len(hydro.xhii[toionise]))
         hydro.xhii[ionised] = 1.0
-        hydro.T[toionise] = Tion
+        hydro.T[np.where(toionise)[0]] = Tion
         edge = ionised[-1]+1
 
     # Ionise the partially ionised frontier cell provided it's not outside the box
@@ -161,6 +220,8 @@ def trace_radiation(Lionising, Lnonionising, Eionising, Tion, doRadiationPressur
         # Fractionally heat the edge cell as if the ionisation front is sharp
         if hydro.T[edge] < Tion:
             hydro.T[edge] = hydro.T[edge]*(1.0-fracion) + fracion*Tion
+        if frontCourant is not None:
+            limit_front(x[edge] + fracion*dx[edge], dx[edge])
     
     # Now do radiation pressure
     # Also check if we have photons to exert pressure
@@ -172,7 +233,7 @@ def trace_radiation(Lionising, Lnonionising, Eionising, Tion, doRadiationPressur
         # Calculate F = PA rather than P since there is a singularity in 1/(4 pi r^2) at r=0
 
         # Add dust contribution
-        dFdrDust = hydro.nH[0:nx] * hydro.sigmaDust * \
+        dFdrDust = hydro.nH[0:nx] * hydro.sigmaDust[0:nx] * \
             (Lnonionising * np.exp(-opticalDepth) + hydro.Qion[0:nx] * Eionising) / c
 
         # Add the direct radiation pressure contribution
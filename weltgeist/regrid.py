@@ -0,0 +1,197 @@
+"""
+Conservative remapping of the simulation state onto a new grid
+Used to change the grid mid-run (see Integrator.Regrid) and to grow 
+ the grid as a bubble expands (see Integrator.SetExpandingGrid)
+"""
+
+import numpy as np
+
+from . import hydro as _hydro, integrator, units
+
+def RemapConserved(oldedges, newedges, content):
+    """
+    Share the contents of the old cells between the new cells
+    The contents are assumed to be spread evenly in volume inside each old cell
+    New cells (or parts of cells) outside the old grid get nothing
+
+    Parameters
+    ----------
+
+    oldedges: array
+        Radii of the cell edges of the old grid, from the centre (ncellsold+1 values)
+    newedges: array
+        Radii of the cell edges of the new grid, from the centre (ncellsnew+1 values)
+    content: array
+        Amount of a conserved quantity in each old cell (e.g. mass)
+
+    Returns
+    -------
+
+    newcontent: array
+        Amount of the conserved quantity in each new cell
+    """
+    # Interpolate the running total in r^3, which is exact for uniform cells
+    # (np.interp keeps the total constant outside the old grid)
+    total = np.concatenate(([0.0], np.cumsum(content)))
+    return np.diff(np.interp(newedges**3, oldedges**3, total))
+
+def RemapGrid(ncells, rmax, grid=None, rmin=None, background=None):
+    """
+    Remap the current state of the integrator onto a new grid
+    Mass, momentum, energy, ions, metals and magnetic energy are conserved
+    Isothermal gas has no energy equation, so its temperature is remapped weighted by mass instead,
+     and the pressure found from it at the isothermal sound speed of each new cell
+    Time, sources, savers and the outflow tracker are kept
+    Parts of the new grid outside the old one are filled with the background
+
+    Parameters
+    ----------
+
+    ncells: integer
+        Number of cells in the new grid
+    rmax: float
+        Size of the new grid in cm
+    grid: string
+        Spacing of the new cells in radius, "uniform" or "log" (Optional)
+        default: the same as the old grid
+    rmin: float
+        Width of the innermost cell if the new grid is logarithmic (Optional)
+        default: scale the innermost cell of the old grid with rmax and ncells
+    background: function
+        Gives the gas outside the old grid as nH, T = background(r) with r in cm (Optional)
+        The background is static and neutral, with the metallicity of the outermost cell
+        default: copy the outermost cell of the old grid
+    """
+    integ = integrator.Integrator()
+    hydro = integ.hydro
+    vh1 = _hydro.vh1()
+    gamma = hydro.gamma
+    isothermal = vh1.isothermal == 1
+
+    # Save the old state as conserved quantities in each cell
+    n = hydro.ncells
+    oldx = hydro.x[0:n]
+    oldedges = np.append(oldx, oldx[-1]+hydro.dx[-1])
+    mass = hydro.mass[0:n]
+    momentum = mass * hydro.vel[0:n]
+    if isothermal:
+        # gamma = 1, so there is no thermal energy to remap (see Integrator.Setup)
+        energy = mass * hydro.T[0:n]
+    else:
+        energy = hydro.PThermal[0:n] * hydro.vol / (gamma - 1.0) + hydro.KE[0:n]
+    magnetic = hydro.PMagnetic[0:n] * hydro.vol
+    ions = hydro.nH[0:n] * hydro.xhii[0:n] * hydro.vol
+    metals = hydro.Zsolar[0:n] * mass
+    Qion = hydro.Qion[0:n]
+    sigmaDust = hydro.sigmaDust[0:n]
+    # Densities of each quantity in the outermost cell
+    outer = np.array([mass[-1], momentum[-1], energy[-1], magnetic[-1],
+                      ions[-1], metals[-1]]) / hydro.vol[-1]
+    # (+ 0 copies the values rather than referencing the Fortran variables)
+    time = vh1.time + 0.0
+    dt = vh1.dt + 0.0
+    vdtext = vh1.vdtext + 0.0
+    activeregion = vh1.activeregion + 0
+
+    # Make the new grid in VH1 (this resets the time and the active region)
+    # Check a logarithmic grid can be made first, since the old one is lost once it is reset
+    loggrid = vh1.xgrid == 1 if grid is None else grid == "log"
+    if loggrid:
+        if rmin is None:
+            rmin = hydro.dx[0] * rmax / oldedges[-1] * n / ncells
+        integrator._CheckLogGrid(ncells, rmax, rmin)
+        vh1.dxmin = rmin / units.distance
+    vh1.xgrid = int(loggrid)
+    _hydro._UnbindState()
+    vh1.reset()
+    vh1.imax = ncells
+    vh1.xmax = rmax / units.distance
+    vh1.setup()
+    integrator._CheckGridMade()
+    vh1.time = time
+    vh1.dt = dt
+    vh1.vdtext = vdtext
+    hydro._SetupGrid()
+
+    # Share the old quantities between the new cells
+    newx = hydro.x[0:ncells]
+    newedges = np.append(newx, newx[-1]+hydro.dx[-1])
+    vol = hydro.vol
+    newmass, newmomentum, newenergy, newmagnetic, newions, newmetals = \
+        [RemapConserved(oldedges, newedges, q) for q in
+         (mass, momentum, energy, magnetic, ions, metals)]
+
+    # Fill the parts of the new cells outside the old grid with the background
+    covered = (np.minimum(newedges[1:], oldedges[-1])**3 - newedges[:-1]**3) / \
+              (newedges[1:]**3 - newedges[:-1]**3)
+    uncoveredvol = vol * (1.0 - np.clip(covered, 0.0, 1.0))
+    if background is None:
+        newmass += outer[0] * uncoveredvol
+        newmomentum += outer[1] * uncoveredvol
+        newenergy += outer[2] * uncoveredvol
+        newmagnetic += outer[3] * uncoveredvol
+        newions += outer[4] * uncoveredvol
+        newmetals += outer[5] * uncoveredvol
+    else:
+        nH, T = background(newx + 0.5*hydro.dx)
+        rho = nH * units.mH / units.X
+        newmass += rho * uncoveredvol
+        if isothermal:
+            newenergy += rho * T * uncoveredvol
+        else:
+            newenergy += nH * units.kB * T / (gamma - 1.0) * uncoveredvol
+        newmetals += rho * uncoveredvol * outer[5] / outer[0]
+
+    # Set the new state, putting the kinetic energy lost by averaging the velocities into heat
+    # (isothermal gas radiates it away instantly)
+    vel = newmomentum / newmass
+    hydro.rho[0:ncells] = newmass / vol
+    hydro.vel[0:ncells] = vel
+    hydro.xhii[0:ncells] = newions / (hydro.nH[0:ncells] * vol)
+    hydro.Zsolar[0:ncells] = newmetals / newmass
+    if not isothermal:
+        hydro.P[0:ncells] = (newenergy - 0.5 * newmass * vel**2) * (gamma - 1.0) / vol
+    hydro.PMagnetic[0:ncells] = newmagnetic / vol
+    if isothermal:
+        hydro.T[0:ncells] = newenergy / newmass
+    # Instantaneous radiation quantities come from the old cell at the centre of each new cell
+    # (they are recalculated in the next step anyway)
+    iold = np.clip(np.searchsorted(oldedges, newx + 0.5*hydro.dx) - 1, 0, n-1)
+    hydro.Qion[0:ncells] = Qion[iold]
+    hydro.sigmaDust[0:ncells] = sigmaDust[iold]
+
+    # Start a new active region on the new grid
+    if activeregion == 1:
+        vh1.setactive(1)
+
+def ShockRadius(tolerance=1e-6):
+    """
+    Find the outer edge of the gas that differs from the outermost cell
+    i.e. how far a shock or other disturbance has got into a uniform background
+
+    Parameters
+    ----------
+
+    tolerance: float
+        relative change in density or pressure that counts as a disturbance (Default: 1e-6)
+        cells moving faster than tolerance times the sound speed are also disturbed
+
+    Returns
+    -------
+
+    radius: float
+        Outer radius of the last disturbed cell in cm (0 if nothing is disturbed)
+    """
+    hydro = integrator.Integrator().hydro
+    n = hydro.ncells
+    rho = hydro.rho[0:n]
+    P = hydro.P[0:n]
+    vel = hydro.vel[0:n]
+    cs = np.sqrt(hydro.gamma * P[-1] / rho[-1])
+    disturbed = np.where((np.abs(rho - rho[-1]) > tolerance*rho[-1]) +
+                         (np.abs(P - P[-1]) > tolerance*P[-1]) +
+                         (np.abs(vel) > tolerance*cs))[0]
+    if len(disturbed) == 0:
+        return 0.0
+    last = disturbed[-1]
+    return hydro.x[last] + hydro.dx[last]
@@ -58,11 +58,11 @@ def InjectSources(self, sources):
 
         # Dump input values onto the grid
         if self._totalmass > 0:
-            hydro.mass[0] += self._totalmass
+            hydro.Add("mass", self._totalmass, 0)
         if self._totalte > 0:
-            hydro.TE[0] += self._totalte
+            hydro.Add("TE", self._totalte, 0)
         if self._totalke > 0:
-            hydro.KE[0] += self._totalke
+            hydro.Add("KE", self._totalke, 0)
 
         # Turn radiation on if trying to inject sources
         if self._totalLionising > 0 or self._totalLnonionising > 0:
@@ -235,6 +235,18 @@ def MakeSimpleRadiation(self, QH, Tion=1e4):
         source = SimpleRadiationSource(QH,Tion=Tion)
         self.AddSource(source)
 
+    def NextEventTime(self):
+        """
+        Find the next time any source needs to inject onto the grid
+
+        Returns
+        -------
+        time : float
+            Time of the next event in seconds (np.inf if there are none)
+        """
+        eventTimes = [source.NextEventTime() for source in self._sources]
+        return min(eventTimes, default=np.inf)
+
     def InjectSources(self):
         """
         Gathers all of the sources and injects them onto the grid
@@ -258,6 +270,18 @@ def Inject(self,injector):
         """
         pass
 
+    def NextEventTime(self):
+        """
+        Time of the next event that this source needs to inject at
+        By default sources inject every step, so this is the current time
+
+        Returns
+        -------
+        time : float
+            Time of the next event in seconds (np.inf if there are none)
+        """
+        return integrator.Integrator().time
+
 class SupernovaSource(AbstractSource):
     def __init__(self,energy,mass,time=0.0):
         self._energy = energy
@@ -277,7 +301,7 @@ def Inject(self,injector):
         """
         # Should the SN happen?
         # TODO: Shorten dt so that the SN happens exactly on time
-        integrator.Integrator().ForceTimeTarget(self._time)
+        integrator.Integrator().ForceTimeTarget(self._time, name="supernova")
         if integrator.Integrator().time >= self._time and not self._exploded:
             self._exploded = True
             injector.AddMass(self._mass)
@@ -286,7 +310,20 @@ def Inject(self,injector):
             # (Unnecessary since self._exploded is set, but makes things a bit quicker)
             injector.RemoveSource(self)
 
-            
+    def NextEventTime(self):
+        """
+        The supernova only needs to inject when it explodes
+
+        Returns
+        -------
+        time : float
+            Time of the supernova in seconds (np.inf if it has exploded)
+        """
+        if self._exploded:
+            return np.inf
+        return self._time
+
+
 class WindSource(AbstractSource):
     def __init__(self,lum,massloss):
         # Luminosity in ergs/s
@@ -409,7 +446,7 @@ def Inject(self,injector):
         # Check whether the star is "alive" or not
         if age > 0.0 and not self._expired:
             # Fix timestep to make SN at exact time of supernova
-            integrator.Integrator().ForceTimeTarget(self._supernovaTime)
+            integrator.Integrator().ForceTimeTarget(self._supernovaTime, name="supernova")
             # Check first whether the star should explode before putting in supernova feedback
             if t >= self._supernovaTime:
                 self._expired = True
@@ -476,6 +513,25 @@ def Inject(self,injector):
                     Eionising = Lionising / QH
                     injector.AddPhotons(Lionising, Lnonionising, Eionising, Tion)
 
+    def NextEventTime(self):
+        """
+        Winds and radiation inject every step, otherwise only birth and 
+         the supernova need to be injected
+
+        Returns
+        -------
+        time : float
+            Time of the next event in seconds (np.inf if there are none)
+        """
+        t = integrator.Integrator().time
+        if self._expired:
+            return np.inf
+        if t < self._tbirth:
+            return self._tbirth
+        if self._wind or self._radiation:
+            return t
+        return self._supernovaTime
+
     def _TableSetup(self):
         """
         Set up the single star table if not done already
@@ -0,0 +1,287 @@
+"""
+Controls the length of the hydro timestep
+Sets the Courant number VH1 uses and logs which constraint limits each step
+"""
+
+import collections
+import numpy as np
+
+from . import hydro, units
+
+# Constraints VH1 finds in dtcon, in the order of dtlimiter in VH1 (see dtcon.f90)
+# "external" is whichever constraint given to Limit is the smallest, and "target" is landing on a time in Advance
+_vh1limiters = ("hydro", "external", "growth", "target")
+
+def _Seconds(dt):
+    '''
+    Convert a timestep from VH1 to seconds, where VH1 uses the largest float for no limit
+    '''
+    if dt >= np.finfo(np.float64).max:
+        return np.inf
+    return dt * units.time
+
+class TimestepController(object):
+    '''
+    Sets the timestep of the hydro and logs the constraints on it
+    The hydro step is the Courant number times the time for sound or the flow to cross a cell,
+     but it can't grow by more than the growth factor in one step
+    Other parts of the code (e.g. winds, supernovae and savers) add their own limits with Limit
+    Access this with Integrator().timestep
+    '''
+    def __init__(self, courant=0.5, growth=1.1, loglength=10000):
+        '''
+        Constructor
+
+        Parameters
+        ----------
+
+        courant: float
+            Courant number (Default: 0.5)
+        growth: float
+            Largest factor the timestep can grow by in one step (Default: 1.1)
+        loglength: integer
+            Number of steps to keep in the log (Default: 10000)
+        '''
+        self._adaptive = False
+        self._cflmin = 0.05
+        self._tolerance = 1.0
+        self._kI = 0.3
+        self._kP = 0.1
+        self._lastError = 1.0
+        self._events = 0
+        self._constraints = {}
+        self._log = collections.deque(maxlen=loglength)
+        self._counts = {}
+        self.courant = courant
+        self.growth = growth
+
+    def _Apply(self):
+        '''
+        Send the Courant number and growth factor to the build of VH1 in use
+        Each build keeps its own copy, so the integrator calls this after choosing one in Setup
+        '''
+        hydro.vh1().courant = self._courant
+        hydro.vh1().dtgrowth = self._growth
+
+    def Reset(self):
+        '''
+        Clear the log, forget the limits given to Limit and go back to the full Courant number
+        '''
+        self._log.clear()
+        self._counts = {}
+        self._constraints = {}
+        self._events = 0
+        self._lastError = 1.0
+        self._Apply()
+        hydro.vh1().vdtext = 0.0
+        hydro.vh1().dtlimitcount[:] = 0
+        hydro.vh1().nfloor = 0
+
+    @property
+    def courant(self):
+        '''
+        Courant number, the largest one if adaptive (see SetAdaptive)
+        '''
+        return self._courant
+
+    @courant.setter
+    def courant(self, courant):
+        if not 0.0 < courant <= 1.0:
+            print("Error: the Courant number must be between 0 and 1, got", courant)
+            raise ValueError
+        self._courant = courant
+        hydro.vh1().courant = courant
+
+    @property
+    def current(self):
+        '''
+        Courant number used for the next step
+        '''
+        return hydro.vh1().courant + 0.0
+
+    @property
+    def growth(self):
+        '''
+        Largest factor the timestep can grow by in one step
+        '''
+        return self._growth
+
+    @growth.setter
+    def growth(self, growth):
+        if growth <= 1.0:
+            print("Error: the timestep growth factor must be larger than 1, got", growth)
+            raise ValueError
+        self._growth = growth
+        hydro.vh1().dtgrowth = growth
+
+    def SetAdaptive(self, adaptive=True, cflmin=0.05, tolerance=1.0, kI=0.3, kP=0.1):
+        '''
+        Adapt the Courant number to how well the hydro is coping
+        The events are cells where the hydro had to put the density or pressure up to
+         its floor, and steps that had to be retried (see Integrator.SetRecovery)
+        After each step (or each run of steps inside VH1 in Advance), a PI controller
+         changes the Courant number by (e_last/e)^kP / e^kI, with e = (1 + events)/(1 + tolerance)
+        So it goes down when there are more events than the tolerance and back up
+         to courant when there are fewer
+
+        Parameters
+        ----------
+
+        adaptive: boolean
+            Adapt the Courant number? (Default: True)
+        cflmin: float
+            Smallest Courant number to go down to (Default: 0.05)
+        tolerance: float
+            Number of events per step to put up with (Default: 1)
+        kI, kP: float
+            Integral and proportional gains of the controller (Default: 0.3 and 0.1)
+        '''
+        if not 0.0 < cflmin <= self._courant:
+            print("Error: cflmin must be between 0 and the Courant number, got", cflmin)
+            raise ValueError
+        if tolerance < 0.0 or kI < 0.0 or kP < 0.0:
+            print("Error: tolerance, kI and kP can't be negative, got", tolerance, kI, kP)
+            raise ValueError
+        self._adaptive = adaptive
+        self._cflmin = cflmin
+        self._tolerance = tolerance
+        self._kI = kI
+        self._kP = kP
+        self._lastError = 1.0
+        hydro.vh1().courant = self._courant
+
+    @property
+    def adaptive(self):
+        '''
+        Is the Courant number adapted to how well the hydro is coping? (see SetAdaptive)
+        '''
+        return self._adaptive
+
+    def Limit(self, name, dt, courant=False):
+        '''
+        Limit the length of the next step
+        Call this before the step, e.g. when injecting sources
+
+        Parameters
+        ----------
+
+        name: string
+            Name of the constraint in the log, e.g. "wind"
+        dt: float
+            Longest step allowed in seconds
+        courant: boolean
+            If True, dt is a crossing time and the step is limited to the Courant number times this
+            (as for the hydro) (Default: False)
+        '''
+        if not dt > 0.0:
+            print("Error: timestep limit", name, "must be larger than 0, got", dt)
+            raise ValueError
+        dtcode = dt / units.time
+        if courant:
+            vdt = 1.0 / dtcode
+            dt = dt * hydro.vh1().courant
+        else:
+            vdt = hydro.vh1().courant / dtcode
+        hydro.vh1().vdtext = max(hydro.vh1().vdtext, vdt)
+        self._constraints[name] = min(dt, self._constraints.get(name, np.inf))
+
+    def Event(self, nevents=1):
+        '''
+        Tell the controller about something going wrong in the hydro,
+         making an adaptive Courant number go down (see SetAdaptive)
+
+        Parameters
+        ----------
+
+        nevents: integer
+            Number of events (Default: 1)
+        '''
+        self._events += nevents
+
+    @property
+    def log(self):
+        '''
+        The last steps, oldest first
+        Each record is a dictionary with:
+         "time", "dt": the time after the step and its length in seconds
+         "courant": the Courant number used
+         "limiter": the constraint that limited the step
+         "constraints": the longest step allowed by each constraint in seconds
+         "steps", "limiters": the number of steps and the number limited by each constraint
+                             (more than one for runs of steps inside VH1 in Advance)
+         "floors": the number of cells where the density or pressure was put up to its floor
+        '''
+        return list(self._log)
+
+    @property
+    def counts(self):
+        '''
+        Number of steps limited by each constraint since the last Reset
+        '''
+        return dict(self._counts)
+
+    def _EndSteps(self, time, dt):
+        '''
+        Log the steps just taken and adapt the Courant number
+        Called by the integrator after each step or run of steps inside VH1
+
+        Parameters
+        ----------
+
+        time, dt: float
+            Time after the steps and length of the last one in seconds
+        '''
+        data = hydro.vh1()
+        # The external limits are only set in Python, so the smallest given to Limit is the one VH1 saw
+        external = "external"
+        if len(self._constraints) > 0:
+            external = min(self._constraints, key=self._constraints.get)
+        limiters = {}
+        for index, nsteps in enumerate(data.dtlimitcount):
+            if nsteps > 0:
+                name = _vh1limiters[index]
+                if name == "external":
+                    name = external
+                limiters[name] = int(nsteps)
+                self._counts[name] = self._counts.get(name, 0) + int(nsteps)
+        limiter = _vh1limiters[data.dtlimiter-1]
+        if limiter == "external":
+            limiter = external
+        constraints = {"hydro": _Seconds(data.dthydro), "growth": _Seconds(data.dtgrown)}
+        constraints.update(self._constraints)
+        floors = int(data.nfloor)
+        self._log.append({"time": time, "dt": dt, "courant": data.courant + 0.0, "limiter": limiter,
+                          "constraints": constraints, "steps": sum(limiters.values()), "limiters": limiters,
+                          "floors": floors})
+        if self._adaptive:
+            self._Adapt(floors + self._events, sum(limiters.values()))
+        self._Discard()
+
+    def _Discard(self):
+        '''
+        Forget the constraints and events of steps that weren't taken (e.g. after the timestep collapsed)
+        '''
+        self._constraints = {}
+        self._events = 0
+        hydro.vh1().dtlimitcount[:] = 0
+        hydro.vh1().nfloor = 0
+
+    def _Adapt(self, nevents, nsteps):
+        '''
+        Change the Courant number with a PI controller on the number of events (see SetAdaptive)
+
+        Parameters
+        ----------
+
+        nevents: integer
+            Number of events in the steps just taken
+        nsteps: integer
+            Number of steps just taken
+        '''
+        error = (1.0 + nevents) / (1.0 + self._tolerance)
+        factor = error**(-self._kI) * (self._lastError / error)**self._kP
+        # Runs of steps without any events inside VH1 count as that many clean steps
+        if nevents == 0:
+            factor *= error**(-self._kI*(nsteps-1))
+        self._lastError = error
+        hydro.vh1().courant = min(max(hydro.vh1().courant * factor, self._cflmin), self._courant)